@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from posts_app.metrics import register_collector
+
+        from . import signals  # noqa: F401
+        from .authentication import token_cache_metrics
+        register_collector(token_cache_metrics)
@@ -0,0 +1,119 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import (HttpResponse, HttpResponseNotAllowed, JsonResponse,
+                         StreamingHttpResponse)
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from posts.cache import (USERS_SCOPE, CachedPage, author_scope, fill_reads,
+                         list_versions)
+from posts.models import Post
+from posts.pagination import CreatedKeysetPaginator, KeysetPaginator
+from posts_app.replicas import read_from_replica, use_replica
+
+from .filters import created_range
+from .renderers import NDJSONRenderer
+from .serializers import PostSerializer, UserSerializer
+
+User = get_user_model()
+
+# Async-версии публичных списков API для запуска под ASGI (ASYNC_VIEWS).
+# DRF 3.14 не поддерживает async-представления, поэтому ответы собираются
+# напрямую: формат, пагинация, кэш и потоковый режим те же, что у
+# UserListViewSet и UserPostsView.
+
+
+def _link(request, cursor):
+    if cursor is None:
+        return None
+    return replace_query_param(request.build_absolute_uri(), 'cursor', cursor)
+
+
+async def _stream(queryset, serializer_class, ndjson):
+    """Генератор отдает строки queryset пачками, читая их из базы
+    через aiterator(), в формате NDJSON или JSON-массива."""
+    serializer = serializer_class()
+    renderer = NDJSONRenderer()
+    chunk_size = settings.STREAM_CHUNK_SIZE
+    chunk = [] if ndjson else ['[']
+    number = 0
+    async for obj in queryset.aiterator(chunk_size=chunk_size):
+        item = renderer.dumps(serializer.to_representation(obj))
+        if ndjson:
+            chunk.append(f'{item}\n')
+        else:
+            chunk.append(f',{item}' if number else item)
+        number += 1
+        if len(chunk) >= chunk_size:
+            yield ''.join(chunk).encode()
+            chunk = []
+    if not ndjson:
+        chunk.append(']')
+    if chunk:
+        yield ''.join(chunk).encode()
+
+
+async def _list_response(request, name, scopes, queryset, serializer_class,
+                         paginator_class=KeysetPaginator):
+    """Функция возвращает страницу списка, закэшированную под версиями
+    областей scopes, или весь список потоком (?stream=1 или
+    Accept: application/x-ndjson)."""
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    ndjson = NDJSONRenderer.media_type in request.headers.get('Accept', '')
+    content_type = NDJSONRenderer.media_type if ndjson else (
+        'application/json')
+    versions = await sync_to_async(list_versions)(scopes)
+    cached_page = CachedPage(name, versions, request, variant=content_type)
+    not_modified = cached_page.not_modified(request)
+    if not_modified is not None:
+        return not_modified
+    if ndjson or request.GET.get('stream'):
+        response = StreamingHttpResponse(
+            _stream(use_replica(queryset), serializer_class, ndjson),
+            content_type=content_type)
+        return cached_page.set_headers(response)
+    data = await sync_to_async(cached_page.get)()
+    if data is None:
+        paginator = paginator_class(queryset, api_settings.PAGE_SIZE)
+        with fill_reads(versions):
+            page = await paginator.aget_page(request.GET.get('cursor'))
+        data = {
+            'next': _link(request, page.next_cursor),
+            'previous': _link(request, page.previous_cursor),
+            'results': serializer_class(page, many=True).data,
+        }
+        await sync_to_async(cached_page.set)(data)
+    response = HttpResponse(
+        JSONRenderer().render(data), content_type='application/json')
+    return cached_page.set_headers(response)
+
+
+@read_from_replica
+async def user_list(request):
+    """Функция асинхронно отдает список пользователей."""
+    return await _list_response(
+        request, 'UserListViewSet', [USERS_SCOPE], User.objects.all(),
+        UserSerializer)
+
+
+@read_from_replica
+async def user_posts(request, id):
+    """Функция асинхронно отдает список постов пользователя."""
+    if not await User.objects.filter(id=id).aexists():
+        return JsonResponse(
+            {'detail': str(NotFound.default_detail)}, status=404,
+            json_dumps_params={'ensure_ascii': False})
+    try:
+        lookups = created_range(request.GET)
+    except ValidationError as error:
+        return JsonResponse(
+            error.detail, status=400,
+            json_dumps_params={'ensure_ascii': False})
+    return await _list_response(
+        request, 'UserPostsView', [author_scope(id)],
+        Post.objects.for_api().filter(user_id=id, **lookups),
+        PostSerializer, CreatedKeysetPaginator)
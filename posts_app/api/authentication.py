@@ -0,0 +1,130 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+class TokenCache:
+    """Класс хранит токены авторизации вместе с пользователями в памяти
+    процесса: не больше max_size записей (вытесняются давно не
+    использованные), каждая живет local_timeout секунд. Если задан
+    общий кэш Django, он используется вторым уровнем, общим для всех
+    процессов, с временем жизни записи timeout. Удаление токена
+    очищает память текущего процесса и общий кэш, поэтому другие
+    процессы принимают отозванный токен не дольше local_timeout
+    секунд."""
+
+    def __init__(self, max_size, timeout, shared_alias=None,
+                 local_timeout=None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.local_timeout = local_timeout or timeout
+        self.shared_alias = shared_alias
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    @staticmethod
+    def shared_key(key):
+        return f'api:token:{key}'
+
+    def get(self, key):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self.entries[key]
+        token = None
+        if self.shared is not None:
+            token = self.shared.get(self.shared_key(key))
+            if token is not None:
+                self.set(key, token, shared=False)
+        with self.lock:
+            if token is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return token
+
+    def set(self, key, token, shared=True):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.local_timeout, token)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        if shared and self.shared is not None:
+            self.shared.set(self.shared_key(key), token, self.timeout)
+
+    def delete(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+        if self.shared is not None:
+            self.shared.delete_many([self.shared_key(key) for key in keys])
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self.entries),
+            }
+
+
+token_cache = TokenCache(
+    max_size=settings.TOKEN_AUTH_CACHE['MAX_SIZE'],
+    timeout=settings.TOKEN_AUTH_CACHE['TIMEOUT'],
+    shared_alias=settings.TOKEN_AUTH_CACHE['SHARED_CACHE_ALIAS'],
+    local_timeout=settings.TOKEN_AUTH_CACHE['LOCAL_TIMEOUT'],
+)
+
+
+def token_cache_metrics():
+    """Метрики кэша токенов для /metrics."""
+    stats = token_cache.stats()
+    return [
+        ('posts_app_token_cache_hits_total', 'counter',
+         'Попадания в кэш токенов', stats['hits']),
+        ('posts_app_token_cache_misses_total', 'counter',
+         'Промахи кэша токенов', stats['misses']),
+        ('posts_app_token_cache_size', 'gauge',
+         'Число токенов в кэше процесса', stats['size']),
+    ]
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Класс авторизации по токену, который берет токен и пользователя
+    из token_cache и обращается к базе только при промахе кэша."""
+
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key)
+        if token is None:
+            try:
+                token = Token.objects.select_related('user').get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            token_cache.set(key, token)
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.'))
+        return (token.user, token)
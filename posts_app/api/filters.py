@@ -0,0 +1,30 @@
+from rest_framework import exceptions, serializers
+from rest_framework.filters import BaseFilterBackend
+
+
+def created_range(params):
+    """Функция возвращает условия на время создания поста из параметров
+    since (включительно) и until (не включая) в формате ISO 8601.
+    При неверной дате выбрасывает ValidationError."""
+    lookups = {}
+    field = serializers.DateTimeField()
+    for param, lookup in (('since', 'created_at__gte'),
+                          ('until', 'created_at__lt')):
+        value = params.get(param)
+        if not value:
+            continue
+        try:
+            lookups[lookup] = field.to_internal_value(value)
+        except exceptions.ValidationError as error:
+            raise exceptions.ValidationError({param: error.detail})
+    return lookups
+
+
+class CreatedRangeFilter(BaseFilterBackend):
+    """Класс фильтрует посты по времени создания: ?since= и ?until=.
+    Вместе с CreatedKeysetPagination запрос читает диапазон индекса
+    (user, created_at, id), поэтому клиент может забирать только
+    посты, появившиеся после прошлой синхронизации."""
+
+    def filter_queryset(self, request, queryset, view):
+        return queryset.filter(**created_range(request.query_params))
@@ -0,0 +1,124 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from posts.cache import CachedPage, fill_reads, list_versions
+from posts_app.replicas import (start_replica_reads, stop_replica_reads,
+                                use_replica)
+
+from .renderers import NDJSONRenderer
+
+
+class StreamingListMixin:
+    """Класс-примесь добавляет спискам потоковый режим ответа.
+    Режим включается параметром ?stream=1 или заголовком
+    Accept: application/x-ndjson. Строки читаются из базы
+    через QuerySet.iterator() и отдаются клиенту пачками,
+    поэтому память процесса не растет с длиной списка."""
+
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer]
+    stream_query_param = 'stream'
+    stream_chunk_size = settings.STREAM_CHUNK_SIZE
+
+    def list(self, request, *args, **kwargs):
+        ndjson = isinstance(request.accepted_renderer, NDJSONRenderer)
+        if not ndjson and not request.query_params.get(
+                self.stream_query_param):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        if ndjson:
+            content = self.stream_ndjson(queryset)
+            content_type = NDJSONRenderer.media_type
+        else:
+            content = self.stream_json_array(queryset)
+            content_type = 'application/json'
+        return StreamingHttpResponse(content, content_type=content_type)
+
+    def stream_items(self, queryset):
+        """Метод по одной сериализует строки queryset
+        в JSON, не загружая весь список в память."""
+        serializer = self.get_serializer()
+        renderer = NDJSONRenderer()
+        for obj in queryset.iterator(chunk_size=self.stream_chunk_size):
+            yield renderer.dumps(serializer.to_representation(obj))
+
+    def stream_chunks(self, lines):
+        chunk = []
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) >= self.stream_chunk_size:
+                yield ''.join(chunk).encode()
+                chunk = []
+        if chunk:
+            yield ''.join(chunk).encode()
+
+    def stream_ndjson(self, queryset):
+        lines = (f'{item}\n' for item in self.stream_items(queryset))
+        return self.stream_chunks(lines)
+
+    def stream_json_array(self, queryset):
+        def lines():
+            yield '['
+            for number, item in enumerate(self.stream_items(queryset)):
+                yield f',{item}' if number else item
+            yield ']'
+        return self.stream_chunks(lines())
+
+
+class CachedListMixin:
+    """Класс-примесь кэширует страницы публичного списка. Ключ кэша
+    содержит версии областей из get_cache_scopes(), поэтому запись
+    устаревает сразу после изменения данных. Ответ отдается с ETag,
+    и клиент с актуальной копией получает 304
+    без запроса списка и сериализации. Потоковые ответы не кэшируются,
+    но тоже получают ETag, поэтому примесь стоит в базовых классах
+    перед StreamingListMixin."""
+
+    def get_cache_scopes(self):
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        versions = list_versions(self.get_cache_scopes())
+        page = CachedPage(
+            self.__class__.__name__, versions, request,
+            variant=request.accepted_media_type)
+        not_modified = page.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+        data = page.get()
+        if data is None:
+            with fill_reads(versions):
+                response = super().list(request, *args, **kwargs)
+            if response.streaming:
+                return page.set_headers(response)
+            page.set(response.data)
+        else:
+            response = Response(data)
+        return page.set_headers(response)
+
+
+class ReplicaReadMixin:
+    """Класс-примесь разрешает представлению читать из реплики.
+    Реплика выбирается после авторизации, чтобы пользователь,
+    недавно писавший в базу, читал из основной. queryset
+    привязывается к реплике явно: потоковый ответ читает строки
+    уже после выхода из представления."""
+
+    replica_read_methods = ('GET', 'HEAD')
+
+    def dispatch(self, request, *args, **kwargs):
+        self._replica_token = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._replica_token is not None:
+                stop_replica_reads(self._replica_token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in self.replica_read_methods:
+            self._replica_token = start_replica_reads(request)
+
+    def get_queryset(self):
+        return use_replica(super().get_queryset())
@@ -0,0 +1,87 @@
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from posts.feeds import FollowFeedPaginator
+from posts.pagination import CreatedKeysetPaginator, KeysetPaginator
+from posts.search import SearchPaginator
+from posts.timeline import TimelinePaginator
+
+
+class KeysetPagination(BasePagination):
+    """Класс курсорной пагинации для API. Использует тот же
+    KeysetPaginator, что и HTML-страницы: ответ содержит
+    непрозрачные ссылки next/previous и список results."""
+
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    ordering = '-id'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        paginator = self.get_paginator(queryset)
+        self.page = paginator.get_page(
+            request.query_params.get(self.cursor_query_param))
+        return list(self.page)
+
+    def get_paginator(self, queryset):
+        return KeysetPaginator(queryset, self.page_size, self.ordering)
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_link(self.page.next_cursor),
+            'previous': self.get_link(self.page.previous_cursor),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class CreatedKeysetPagination(KeysetPagination):
+    """Класс курсорной пагинации постов от новых к старым по времени
+    создания (CreatedKeysetPaginator)."""
+
+    def get_paginator(self, queryset):
+        return CreatedKeysetPaginator(queryset, self.page_size)
+
+
+class FeedPagination(KeysetPagination):
+    """Класс курсорной пагинации общей ленты: первые страницы
+    отдаются из буфера последних постов без запроса к базе."""
+
+    def get_paginator(self, queryset):
+        return TimelinePaginator(queryset, self.page_size)
+
+
+class FollowFeedPagination(KeysetPagination):
+    """Класс курсорной пагинации ленты подписок текущего пользователя."""
+
+    def get_paginator(self, queryset):
+        return FollowFeedPaginator(
+            queryset, self.request.user.id, self.page_size)
+
+
+class SearchPagination(KeysetPagination):
+    """Класс курсорной пагинации результатов полнотекстового поиска:
+    страницы упорядочены по релевантности."""
+
+    search_query_param = 'q'
+
+    def get_paginator(self, queryset):
+        query = self.request.query_params.get(self.search_query_param, '')
+        return SearchPaginator(queryset, query, self.page_size)
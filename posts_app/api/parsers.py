@@ -0,0 +1,43 @@
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """Класс разбирает тело запроса в формате NDJSON: каждая непустая
+    строка - отдельный JSON-объект. Результат - список объектов.
+    Тело читается по строкам и отклоняется, как только в нем
+    оказывается больше settings.BULK_MAX_ITEMS объектов или больше
+    settings.BULK_MAX_BYTES байт."""
+
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        max_bytes = settings.BULK_MAX_BYTES
+        items = []
+        size = number = 0
+        while True:
+            # Длина строки ограничена остатком лимита, поэтому даже
+            # одна длинная строка не читается в память целиком.
+            line = stream.readline(max_bytes - size + 1)
+            if not line:
+                return items
+            size += len(line)
+            number += 1
+            if size > max_bytes:
+                raise ParseError(
+                    f'Тело запроса больше {max_bytes} байт.')
+            line = line.strip()
+            if not line:
+                continue
+            if len(items) >= settings.BULK_MAX_ITEMS:
+                raise ParseError(
+                    f'В запросе больше {settings.BULK_MAX_ITEMS} объектов.')
+            try:
+                items.append(json.loads(line.decode(encoding)))
+            except ValueError as exc:
+                raise ParseError(f'NDJSON parse error - line {number}: {exc}')
@@ -0,0 +1,25 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Класс отдает данные в формате NDJSON: каждый объект
+    списка выводится отдельной строкой JSON."""
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+    encoder_class = JSONEncoder
+
+    def dumps(self, item):
+        return json.dumps(
+            item, cls=self.encoder_class, ensure_ascii=False,
+            separators=(',', ':'))
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        items = data if isinstance(data, list) else [data]
+        return ''.join(f'{self.dumps(item)}\n' for item in items).encode()
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib.auth import authenticate, get_user_model
 from django.contrib.auth.password_validation import validate_password
 from django.core import exceptions as django_exceptions
@@ -21,8 +22,9 @@ class UserSerializer(serializers.ModelSerializer):
             'id',
             'email',
             'name',
+            'posts_count',
         )
-        read_only_fields = ('email',)
+        read_only_fields = ('email', 'posts_count')
 
 
 class UserCreateSerializer(serializers.ModelSerializer):
@@ -113,4 +115,14 @@ class PostSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Post
-        fields = ('id', 'title', 'body', 'user')
+        fields = ('id', 'title', 'body', 'user', 'created_at', 'updated_at')
+
+
+class PostBulkDeleteSerializer(serializers.Serializer):
+    """Класс для проверки списка id постов при массовом удалении."""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_MAX_ITEMS,
+    )
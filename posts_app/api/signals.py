@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+
+User = get_user_model()
+
+
+def evict(keys):
+    token_cache.delete(*keys)
+    # Параллельный запрос мог прочитать токен из базы до фиксации
+    # изменения и снова положить его в кэш.
+    transaction.on_commit(lambda: token_cache.delete(*keys))
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def evict_token(sender, instance, **kwargs):
+    """Выход из системы и смена токена удаляют токен из кэша."""
+    evict([instance.key])
+
+
+@receiver(post_save, sender=User)
+def evict_user_tokens(sender, instance, update_fields=None, **kwargs):
+    """Изменение пользователя (в том числе блокировка) удаляет из кэша
+    его токены, чтобы следующий запрос прочитал пользователя из базы.
+    Обновление только last_login при входе кэш не трогает."""
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    keys = list(Token.objects.filter(
+        user_id=instance.id).values_list('key', flat=True))
+    if keys:
+        evict(keys)
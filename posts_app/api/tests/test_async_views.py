@@ -0,0 +1,127 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from api import async_views
+from api.authentication import token_cache
+from posts.models import Post
+from posts_app import replicas
+
+User = get_user_model()
+
+
+class ApiAsyncViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_one = User.objects.create_user(
+            name='UserOne',
+            email='user_one@test.test',
+        )
+        Post.objects.bulk_create(
+            Post(title=f'Пост {number}', body='Текст', user=cls.user_one)
+            for number in range(15)
+        )
+        cls.factory = AsyncRequestFactory()
+
+    def setUp(self):
+        cache.clear()
+
+    def get_request(self, path, headers=None, **params):
+        request = self.factory.get(path, params, headers=headers)
+        request.user = AnonymousUser()
+        return request
+
+    @override_settings(REPLICA_DATABASES=['replica1'])
+    async def test_token_client_pinned_after_write(self):
+        """Клиент API с токеном, который только что писал в базу,
+        читает async-список из основной базы, как и в DRF-представлении."""
+        token_cache.clear()
+        token = await Token.objects.acreate(user=self.user_one)
+        headers = {'Authorization': f'Token {token.key}'}
+        write = self.factory.post('/api/posts/', headers=headers)
+        write.user = self.user_one
+        replicas.pin_to_primary(write, HttpResponse())
+        with mock.patch.object(
+                replicas, 'choose_replica',
+                return_value='default') as choose:
+            response = await async_views.user_list(
+                self.get_request('/api/users/', headers=headers))
+            self.assertEqual(response.status_code, 200)
+            choose.assert_not_called()
+            await async_views.user_list(self.get_request('/api/users/'))
+            choose.assert_called_once()
+
+    async def test_user_list_returns_page(self):
+        """Список пользователей отдается в формате DRF-эндпойнта."""
+        response = await async_views.user_list(
+            self.get_request('/api/users/'))
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertEqual(set(data), {'next', 'previous', 'results'})
+        self.assertEqual(
+            set(data['results'][0]), {'id', 'email', 'name', 'posts_count'})
+
+    async def test_user_posts_follows_cursor(self):
+        """Посты пользователя отдаются страницами по курсору."""
+        path = f'/api/users/{self.user_one.id}/posts/'
+        response = await async_views.user_posts(
+            self.get_request(path), self.user_one.id)
+        first = json.loads(response.content)
+        self.assertEqual(len(first['results']), 10)
+        cursor = first['next'].split('cursor=')[1]
+        response = await async_views.user_posts(
+            self.get_request(path, cursor=cursor), self.user_one.id)
+        second = json.loads(response.content)
+        self.assertEqual(len(second['results']), 5)
+        self.assertIsNone(second['next'])
+
+    async def test_user_posts_unknown_user(self):
+        """Для несуществующего пользователя возвращается 404."""
+        response = await async_views.user_posts(
+            self.get_request('/api/users/0/posts/'), 0)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_user_posts_stream(self):
+        """В потоковом режиме отдаются все посты пользователя."""
+        request = self.get_request(
+            '/', headers={'Accept': 'application/x-ndjson'})
+        response = await async_views.user_posts(request, self.user_one.id)
+        content = b''.join([chunk async for chunk in response])
+        self.assertEqual(len(content.decode().splitlines()), 15)
+
+    async def test_user_posts_stream_not_modified(self):
+        """Потоковый ответ отдается с ETag, и клиент с актуальной
+        копией получает 304."""
+        path = f'/api/users/{self.user_one.id}/posts/'
+        headers = {'Accept': 'application/x-ndjson'}
+        response = await async_views.user_posts(
+            self.get_request(path, headers), self.user_one.id)
+        headers['If-None-Match'] = response['ETag']
+        response = await async_views.user_posts(
+            self.get_request(path, headers), self.user_one.id)
+        self.assertEqual(response.status_code, 304)
+
+    async def test_user_posts_since(self):
+        """Параметр since отбирает посты, созданные не раньше даты,
+        а неверная дата приводит к ошибке 400."""
+        path = f'/api/users/{self.user_one.id}/posts/'
+        newest = await Post.objects.filter(user=self.user_one).afirst()
+        await Post.objects.exclude(id=newest.id).aupdate(
+            created_at=newest.created_at - timedelta(days=1))
+        since = newest.created_at - timedelta(hours=1)
+        response = await async_views.user_posts(
+            self.get_request(path, since=since.isoformat()),
+            self.user_one.id)
+        results = json.loads(response.content)['results']
+        self.assertEqual([post['id'] for post in results], [newest.id])
+        response = await async_views.user_posts(
+            self.get_request(path, since='вчера'), self.user_one.id)
+        self.assertEqual(response.status_code, 400)
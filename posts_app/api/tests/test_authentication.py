@@ -0,0 +1,114 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import exceptions, status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase
+
+from api.authentication import (CachedTokenAuthentication, TokenCache,
+                                token_cache)
+
+User = get_user_model()
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_one = User.objects.create_user(
+            name='UserOne',
+            email='user_one@test.test',
+        )
+        cls.factory = APIRequestFactory()
+
+    def setUp(self):
+        token_cache.clear()
+        self.token = Token.objects.create(user=self.user_one)
+
+    def authenticate(self, key):
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Token {key}')
+        return CachedTokenAuthentication().authenticate(request)
+
+    def test_second_request_skips_database(self):
+        """Повторная авторизация тем же токеном не обращается к базе,
+        попадания и промахи учитываются в статистике."""
+        with self.assertNumQueries(1):
+            user, token = self.authenticate(self.token.key)
+        with self.assertNumQueries(0):
+            cached_user, _ = self.authenticate(self.token.key)
+        self.assertEqual(user, self.user_one)
+        self.assertEqual(cached_user, self.user_one)
+        stats = token_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_logout_evicts_token(self):
+        """Выход через api-logout удаляет токен и из кэша."""
+        self.authenticate(self.token.key)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        response = client.post(reverse('api-logout'))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate(self.token.key)
+
+    def test_token_rotation_evicts_old_token(self):
+        """Старый токен перестает работать после замены токена."""
+        self.authenticate(self.token.key)
+        self.token.delete()
+        new_token = Token.objects.create(user=self.user_one)
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate(self.token.key)
+        user, _ = self.authenticate(new_token.key)
+        self.assertEqual(user, self.user_one)
+
+    def test_deactivation_evicts_user(self):
+        """Заблокированный пользователь не проходит авторизацию,
+        даже если его токен был в кэше."""
+        self.authenticate(self.token.key)
+        self.user_one.is_active = False
+        self.user_one.save()
+        try:
+            with self.assertRaises(exceptions.AuthenticationFailed):
+                self.authenticate(self.token.key)
+        finally:
+            self.user_one.is_active = True
+
+    def test_cache_evicts_least_recently_used(self):
+        """При переполнении вытесняется давно не использованный токен."""
+        max_size = token_cache.max_size
+        token_cache.max_size = 1
+        try:
+            other = User.objects.create_user(
+                name='UserTwo', email='user_two@test.test')
+            other_token = Token.objects.create(user=other)
+            self.authenticate(self.token.key)
+            self.authenticate(other_token.key)
+            self.assertEqual(token_cache.stats()['size'], 1)
+            with self.assertNumQueries(1):
+                self.authenticate(self.token.key)
+        finally:
+            token_cache.max_size = max_size
+
+    def test_other_worker_drops_revoked_token(self):
+        """Воркер, в памяти которого остался токен, перестает его
+        принимать через local_timeout секунд после выхода в другом
+        воркере, хотя общий кэш хранит записи дольше."""
+        cache.clear()
+        key = self.token.key
+        worker, other_worker = (
+            TokenCache(max_size=10, timeout=60, shared_alias='default',
+                       local_timeout=5)
+            for _ in range(2))
+        with mock.patch('api.authentication.token_cache', worker):
+            self.authenticate(key)
+        self.assertIsNotNone(worker.get(key))
+        with mock.patch('api.signals.token_cache', other_worker):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.token.delete()
+        later = worker.entries[key][0] + 1
+        with mock.patch('api.authentication.time.monotonic',
+                        return_value=later):
+            self.assertIsNone(worker.get(key))
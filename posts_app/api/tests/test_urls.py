@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from rest_framework.test import APIClient, APITestCase
 
 from posts.models import Post
@@ -38,12 +39,16 @@ class ApiViewsTests(APITestCase):
         cls.authorized_client = APIClient()
         cls.authorized_client.force_authenticate(user=cls.user_two)
 
+    def setUp(self):
+        cache.clear()
+
     def test_urls_are_available_for_guest(self):
         """Проверка доступности страниц из списка
         неавторизованному пользователю."""
         urls_for_guest = [
             ('/api/users/', 200),
             (f'/api/users/{self.user_one.id}/posts/', 200),
+            ('/api/posts/search/?q=пост', 200),
         ]
         for each_url, code in urls_for_guest:
             with self.subTest(each_url=each_url):
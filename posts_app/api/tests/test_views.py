@@ -1,15 +1,37 @@
+import csv
+import gzip
+import io
+import json
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
 from django.urls import reverse
-from rest_framework import status
+from django.utils import timezone
+from rest_framework import serializers, status
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient, APITestCase
 
 from posts.models import Post
+from posts.pagination import encode_cursor
+from posts.tests.mixins import QueryCountMixin
 
 User = get_user_model()
+POST_KEYS = sorted(['id', 'title', 'body', 'user', 'created_at', 'updated_at'])
+
 
+def expected_field(post, key):
+    """Значение поля поста в том виде, в каком его отдает API."""
+    value = getattr(post, key)
+    if key == 'user':
+        return value.id
+    if key in ('created_at', 'updated_at'):
+        return serializers.DateTimeField().to_representation(value)
+    return value
 
-class ApiViewsTests(APITestCase):
+
+class ApiViewsTests(QueryCountMixin, APITestCase):
 
     @classmethod
     def setUpClass(cls):
@@ -41,14 +63,18 @@ class ApiViewsTests(APITestCase):
         cls.authorized_client = APIClient()
         cls.authorized_client.force_authenticate(user=cls.user_two)
 
+    def setUp(self):
+        cache.clear()
+
     def test_api_user_list_get_returns_correct_data(self):
         """Метод GET Эндпойнта api-user-list отдает правильный ответ."""
         response = self.guest_client.get(reverse('api-user-list'))
         expected_users = User.objects.all().order_by('-id')
-        expected_keys = sorted(['id', 'name', 'email'])
+        expected_keys = sorted(['id', 'name', 'email', 'posts_count'])
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), len(expected_users))
-        for user_idx, response_user in enumerate(response.data):
+        results = response.data['results']
+        self.assertEqual(len(results), len(expected_users))
+        for user_idx, response_user in enumerate(results):
             self.assertEqual(sorted(response_user.keys()), expected_keys)
             for key, response_value in response_user.items():
                 expected_value = getattr(expected_users[user_idx], key)
@@ -144,16 +170,138 @@ class ApiViewsTests(APITestCase):
         response = self.guest_client.get(
             reverse('api-user-posts', args=[self.user_one.id]))
         expected_posts = Post.objects.all().order_by('-id')
-        expected_keys = sorted(['id', 'title', 'body', 'user'])
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), len(expected_posts))
-        for post_idx, response_post in enumerate(response.data):
-            self.assertEqual(sorted(response_post.keys()), expected_keys)
+        results = response.data['results']
+        self.assertEqual(len(results), len(expected_posts))
+        for post_idx, response_post in enumerate(results):
+            self.assertEqual(sorted(response_post.keys()), POST_KEYS)
             for key, response_value in response_post.items():
-                expected_value = getattr(expected_posts[post_idx], key)
-                if key == 'user':
-                    expected_value = expected_value.id
-                self.assertEqual(response_value, expected_value)
+                self.assertEqual(
+                    response_value,
+                    expected_field(expected_posts[post_idx], key))
+
+    def test_api_user_posts_cursor_pagination(self):
+        """Эндпойнт api-user-posts разбивает список постов на страницы
+        курсором и позволяет вернуться на предыдущую страницу."""
+        posts = [
+            Post(title=f'Пост {number}', body='Текст', user=self.user_three)
+            for number in range(15)
+        ]
+        Post.objects.bulk_create(posts)
+        expected_ids = list(Post.objects.filter(
+            user=self.user_three).values_list('id', flat=True))
+        url = reverse('api-user-posts', args=[self.user_three.id])
+        first_page = self.guest_client.get(url).data
+        self.assertIsNone(first_page['previous'])
+        self.assertIsNotNone(first_page['next'])
+        second_page = self.guest_client.get(first_page['next']).data
+        self.assertIsNone(second_page['next'])
+        received_ids = [
+            post['id']
+            for page in (first_page, second_page)
+            for post in page['results']
+        ]
+        self.assertEqual(received_ids, expected_ids)
+        previous_page = self.guest_client.get(second_page['previous']).data
+        self.assertEqual(previous_page['results'], first_page['results'])
+
+    def test_api_user_posts_invalid_cursor_returns_first_page(self):
+        """Курсор с неверной датой, id вне диапазона BIGINT или
+        не той формы отдает первую страницу, а не ошибку 500."""
+        url = reverse('api-user-posts', args=[self.user_three.id])
+        expected = self.guest_client.get(url).data['results']
+        positions = (
+            ['2020-01-01T00:00:00+00:00', 10 ** 30],
+            ['не дата', 1],
+            ['2020-01-01T00:00:00+00:00', '1'],
+            ['2020-13-45T00:00:00', 1],
+            42,
+        )
+        for position in positions:
+            for direction in ('n', 'p'):
+                with self.subTest(position=position, direction=direction):
+                    response = self.guest_client.get(
+                        url, {'cursor': encode_cursor(direction, position)})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(response.data['results'], expected)
+
+    def test_api_user_posts_filters_by_created_at(self):
+        """Параметры since и until ограничивают время создания постов,
+        курсор ведет по отфильтрованному списку, а неверная дата
+        приводит к ошибке 400."""
+        posts = Post.objects.bulk_create(
+            Post(title=f'Пост {number}', body='Текст', user=self.user_three)
+            for number in range(15)
+        )
+        start = timezone.now() - timedelta(days=15)
+        for number, post in enumerate(posts):
+            post.created_at = start + timedelta(days=number)
+        Post.objects.bulk_update(posts, ['created_at'])
+        url = reverse('api-user-posts', args=[self.user_three.id])
+        params = {
+            'since': (start + timedelta(days=2)).isoformat(),
+            'until': (start + timedelta(days=14)).isoformat(),
+        }
+        first_page = self.guest_client.get(url, params).data
+        second_page = self.guest_client.get(first_page['next']).data
+        received_ids = [
+            post['id']
+            for page in (first_page, second_page)
+            for post in page['results']
+        ]
+        self.assertEqual(
+            received_ids, [post.id for post in reversed(posts[2:14])])
+        self.assertIsNone(second_page['next'])
+        for invalid in ({'since': 'вчера'}, {'until': '2024-13-01'}):
+            with self.subTest(params=invalid):
+                response = self.guest_client.get(url, invalid)
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn(next(iter(invalid)), response.data)
+
+    def test_api_lists_run_fixed_number_of_queries(self):
+        """Каждая страница списков API выполняет одинаковое
+        число запросов."""
+        Post.objects.bulk_create(
+            Post(title=f'Пост {number}', body='Текст', user=self.user_two)
+            for number in range(25)
+        )
+        pages = [
+            (reverse('api-user-list'), 1),
+            (reverse('api-user-posts', args=[self.user_two.id]), 2),
+        ]
+        for url, num in pages:
+            with self.subTest(url=url):
+                self.assertPageQueries(self.guest_client, url, num)
+
+    def test_api_user_posts_stream_returns_all_posts(self):
+        """Потоковый режим api-user-posts отдает все посты без пагинации
+        JSON-массивом или построчно в формате NDJSON."""
+        url = reverse('api-user-posts', args=[self.user_one.id])
+        expected_ids = list(Post.objects.filter(
+            user=self.user_one).values_list('id', flat=True))
+        response = self.guest_client.get(url, {'stream': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        posts = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([post['id'] for post in posts], expected_ids)
+
+        response = self.guest_client.get(
+            url, HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(
+            response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        posts = [json.loads(line) for line in lines]
+        self.assertEqual([post['id'] for post in posts], expected_ids)
+
+    def test_api_user_list_stream_returns_all_users(self):
+        """Потоковый режим api-user-list отдает всех пользователей."""
+        response = self.guest_client.get(
+            reverse('api-user-list'), {'stream': 1})
+        users = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(
+            [user['id'] for user in users],
+            list(User.objects.values_list('id', flat=True)))
 
     def test_api_login_invalid_methods_not_allowed(self):
         """Эндпойнт api-login не принимает запросы
@@ -240,14 +388,11 @@ class ApiViewsTests(APITestCase):
             title=post_data['title'],
             body=post_data['body'],
         ).order_by('-id').first()
-        expected_keys = sorted(['id', 'title', 'body', 'user'])
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(sorted(response.data.keys()), expected_keys)
+        self.assertEqual(sorted(response.data.keys()), POST_KEYS)
         for key in response.data.keys():
-            expected_value = getattr(expected_post, key)
-            if key == 'user':
-                expected_value = expected_value.id
-            self.assertEqual(response.data.get(key), expected_value)
+            self.assertEqual(
+                response.data.get(key), expected_field(expected_post, key))
 
     def test_api_post_list_post_unauthorized_fails(self):
         """неавторизованный пользователь не может создать отправить
@@ -291,7 +436,7 @@ class ApiViewsTests(APITestCase):
     def test_api_post_list_invalid_methods_not_allowed(self):
         """Эндпойнт api_post_list не принимает запросы
         с неразрешенными методами."""
-        methods = ['GET', 'PUT', 'PATCH', 'DELETE']
+        methods = ['PUT', 'PATCH', 'DELETE']
 
         for method in methods:
             with self.subTest(method=method):
@@ -340,3 +485,157 @@ class ApiViewsTests(APITestCase):
         self.assertEqual(len_posts_before - 1, len_posts_after)
         search_for_post = Post.objects.filter(id=post_delete_id)
         self.assertFalse(search_for_post)
+
+    def test_api_posts_count_follows_create_and_delete(self):
+        """Создание и удаление поста через API меняет
+        счетчик постов автора."""
+        count_before = User.objects.get(id=self.user_two.id).posts_count
+        response = self.authorized_client.post(
+            reverse('api-post-list'),
+            data={'title': 'Счетчик', 'body': 'Текст'},
+            format='json'
+        )
+        user = User.objects.get(id=self.user_two.id)
+        self.assertEqual(user.posts_count, count_before + 1)
+        self.authorized_client.delete(
+            reverse('api-post-detail', args=[response.data['id']]))
+        user = User.objects.get(id=self.user_two.id)
+        self.assertEqual(user.posts_count, count_before)
+
+    def test_api_post_search_returns_ranked_page(self):
+        """Эндпойнт api-post-search отдает найденные посты страницей."""
+        response = self.guest_client.get(
+            reverse('api-post-search'), {'q': 'пост 1'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [post['id'] for post in response.data['results']],
+            [self.post[1].id])
+        self.assertIsNone(response.data['next'])
+
+    def test_api_post_bulk_create_returns_created_posts(self):
+        """Метод POST эндпойнта api-post-bulk создает все посты из
+        JSON-массива и NDJSON одной транзакцией."""
+        count_before = User.objects.get(id=self.user_two.id).posts_count
+        posts_data = [
+            {'title': f'Пакетный пост {number}', 'body': 'Текст'}
+            for number in range(3)
+        ]
+        response = self.authorized_client.post(
+            reverse('api-post-bulk'), data=posts_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 3)
+        ndjson = '\n'.join(json.dumps(post) for post in posts_data)
+        response = self.authorized_client.post(
+            reverse('api-post-bulk'), data=ndjson,
+            content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        created = Post.objects.filter(
+            id__in=[post['id'] for post in response.data])
+        self.assertEqual(
+            sorted(created.values_list('title', flat=True)),
+            [post['title'] for post in posts_data])
+        self.assertTrue(all(post.user_id == self.user_two.id
+                            for post in created))
+        user = User.objects.get(id=self.user_two.id)
+        self.assertEqual(user.posts_count, count_before + 6)
+
+    def test_api_post_bulk_create_reports_item_errors(self):
+        """При ошибке в одном из постов api-post-bulk ничего не создает
+        и возвращает ошибки по каждому элементу."""
+        len_posts_before = Post.objects.count()
+        posts_data = [
+            {'title': 'Верный пост', 'body': 'Текст'},
+            {'title': 'Пост без текста'},
+        ]
+        response = self.authorized_client.post(
+            reverse('api-post-bulk'), data=posts_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('body', response.data[1])
+        self.assertEqual(Post.objects.count(), len_posts_before)
+
+    def test_api_post_bulk_delete_checks_ownership(self):
+        """Метод DELETE эндпойнта api-post-bulk удаляет только свои
+        посты и не удаляет ничего, если в списке есть чужой пост."""
+        own_ids = [post.id for post in self.post[:2]]
+        response = self.authorized_client.delete(
+            reverse('api-post-bulk'), data={'ids': own_ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Post.objects.filter(id__in=own_ids).count(), 2)
+        with self.assertNumQueries(7), \
+                self.captureOnCommitCallbacks() as callbacks:
+            # Проверка владельца, выборка постов сборщиком Django,
+            # DELETE строк ленты подписок и постов, счетчик, SAVEPOINT
+            # и RELEASE транзакции. Сброс кэша и пометка в общей
+            # ленте - по одному на весь запрос.
+            response = self.author_client.delete(
+                reverse('api-post-bulk'), data=own_ids, format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(len(callbacks), 2)
+        self.assertFalse(Post.objects.filter(id__in=own_ids).exists())
+
+    @override_settings(BULK_MAX_ITEMS=2, BULK_MAX_BYTES=200)
+    def test_api_post_bulk_create_ndjson_limits(self):
+        """Тело NDJSON отклоняется при превышении числа объектов или
+        размера, и ничего не создается."""
+        len_posts_before = Post.objects.count()
+        line = json.dumps({'title': 'Пост', 'body': 'Текст'})
+        bodies = ('\n'.join([line] * 3), 'x' * 201)
+        for body in bodies:
+            with self.subTest(size=len(body)):
+                response = self.authorized_client.post(
+                    reverse('api-post-bulk'), data=body,
+                    content_type='application/x-ndjson')
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Post.objects.count(), len_posts_before)
+
+    def test_api_post_bulk_delete_missing_posts_fails(self):
+        """api-post-bulk возвращает 404, если части постов нет."""
+        ids = [self.post[0].id, 10 ** 9]
+        response = self.author_client.delete(
+            reverse('api-post-bulk'), data={'ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(Post.objects.filter(id=self.post[0].id).exists())
+
+    def test_api_export_is_admin_only(self):
+        """Выгрузка постов доступна только администраторам."""
+        for client, code in ((self.guest_client, 401),
+                             (self.author_client, 403)):
+            with self.subTest(code=code):
+                response = client.get(reverse('api-export'))
+                self.assertEqual(response.status_code, code)
+
+    def test_api_export_formats(self):
+        """api-export отдает посты потоком в JSONL, CSV и gzip
+        с фильтром по автору."""
+        admin = APIClient()
+        admin.force_authenticate(User.objects.create_user(
+            name='Admin', email='admin@test.test', is_staff=True))
+        Post.objects.create(title='Чужой', body='Текст', user=self.user_two)
+        response = admin.get(
+            reverse('api-export'), {'user': self.user_one.id})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in
+                b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['id'] for row in rows],
+                         [post.id for post in self.post])
+        self.assertEqual(rows[0]['email'], self.user_one.email)
+        response = admin.get(reverse('api-export'), {'type': 'csv'})
+        self.assertIn('attachment; filename="posts.csv"',
+                      response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(
+            b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), Post.objects.count())
+        self.assertEqual(rows[-1]['title'], 'Чужой')
+        response = admin.get(
+            reverse('api-export'), {'type': 'csv', 'gzip': '1'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        content = gzip.decompress(b''.join(response.streaming_content))
+        self.assertTrue(content.startswith(b'id,user_id,email,name'))
+        for params in ({'type': 'xml'}, {'user': 'abc'}):
+            with self.subTest(params=params):
+                response = admin.get(reverse('api-export'), params)
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST)
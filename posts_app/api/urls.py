@@ -1,9 +1,12 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (CustomObtainAuthToken, PostViewSet, UserCreateView,
-                    UserListViewSet, UserPostsView)
+from . import async_views
+from .views import (CustomObtainAuthToken, ExportView, FollowFeedView,
+                    LogoutView, PostViewSet, UserCreateView, UserListViewSet,
+                    UserPostsView)
 
 User = get_user_model()
 
@@ -11,10 +14,23 @@ router = DefaultRouter()
 router.register('users', UserListViewSet, basename='api-user')
 router.register('posts', PostViewSet, basename='api-post')
 
-urlpatterns = [
+urlpatterns = []
+if settings.ASYNC_VIEWS:
+    # Под ASGI публичные списки обслуживаются async-представлениями,
+    # маршруты стоят раньше маршрутов роутера.
+    urlpatterns += [
+        path('users/', async_views.user_list, name='api-user-list'),
+        path('users/<int:id>/posts/',
+             async_views.user_posts,
+             name='api-user-posts'),
+    ]
+urlpatterns += [
     path('', include(router.urls)),
     path('auth/signup/', UserCreateView.as_view(), name='api-signup'),
     path('auth/login/', CustomObtainAuthToken.as_view(), name='api-login'),
+    path('auth/logout/', LogoutView.as_view(), name='api-logout'),
+    path('export/', ExportView.as_view(), name='api-export'),
+    path('feed/', FollowFeedView.as_view(), name='api-feed'),
     path('users/<int:id>/posts/',
          UserPostsView.as_view(),
          name='api-user-posts'),
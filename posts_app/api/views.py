@@ -1,30 +1,73 @@
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import status
+from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
-from rest_framework.generics import ListAPIView
+from rest_framework.decorators import action
+from rest_framework.generics import GenericAPIView, ListAPIView
 from rest_framework.mixins import (CreateModelMixin, DestroyModelMixin,
                                    ListModelMixin)
-from rest_framework.permissions import AllowAny, exceptions
+from rest_framework.permissions import (AllowAny, IsAdminUser,
+                                        IsAuthenticated, exceptions)
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet
 
+from posts.cache import (USERS_SCOPE, author_scope, invalidate_on_commit,
+                         post_scopes)
+from posts.exporting import (CONTENT_TYPES, FORMATS, export_chunks,
+                             export_filename, export_queryset)
+from posts.feeds import enqueue_fanout, follow, unfollow
 from posts.models import Post
+from posts.signals import bulk_post_delete
+from posts.timeline import timeline
 
-from .serializers import (CustomAuthTokenSerializer, PostSerializer,
-                          UserCreateSerializer, UserSerializer)
+from .filters import CreatedRangeFilter
+from .mixins import CachedListMixin, ReplicaReadMixin, StreamingListMixin
+from .pagination import (CreatedKeysetPagination, FeedPagination,
+                         FollowFeedPagination, SearchPagination)
+from .parsers import NDJSONParser
+from .serializers import (CustomAuthTokenSerializer, PostBulkDeleteSerializer,
+                          PostSerializer, UserCreateSerializer,
+                          UserSerializer)
 
 User = get_user_model()
 
 
-class UserListViewSet(ListModelMixin, GenericViewSet):
+class UserListViewSet(ReplicaReadMixin, CachedListMixin, StreamingListMixin,
+                      ListModelMixin, GenericViewSet):
     """Класс для обработки эндпойнта на вывод списка пользователей."""
 
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (AllowAny,)
 
+    def get_cache_scopes(self):
+        return [USERS_SCOPE]
+
+    @action(
+        detail=True,
+        methods=['post', 'delete'],
+        permission_classes=(IsAuthenticated,),
+    )
+    def follow(self, request, pk=None):
+        """Подписка на пользователя (POST) и отписка (DELETE)."""
+        author = get_object_or_404(User.objects.only('id'), id=pk)
+        if request.method == 'DELETE':
+            if not unfollow(request.user, author.id):
+                raise exceptions.NotFound('Вы не подписаны на автора.')
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        if author.id == request.user.id:
+            raise exceptions.ValidationError(
+                'Нельзя подписаться на самого себя.')
+        if not follow(request.user, author.id):
+            raise exceptions.ValidationError('Вы уже подписаны на автора.')
+        return Response(status=status.HTTP_201_CREATED)
+
 
 class UserCreateView(APIView):
     """Класс для обработки эндпойнта на создание пользователя."""
@@ -47,27 +90,188 @@ class CustomObtainAuthToken(ObtainAuthToken):
     serializer_class = CustomAuthTokenSerializer
 
 
-class PostViewSet(CreateModelMixin, DestroyModelMixin, GenericViewSet):
-    queryset = Post.objects.all()
+class LogoutView(APIView):
+    """Класс для обработки эндпойнта выхода: удаляет токен
+    авторизации пользователя."""
+
+    def post(self, request):
+        Token.objects.filter(user=request.user).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class PostViewSet(ListModelMixin, CreateModelMixin, DestroyModelMixin,
+                  GenericViewSet):
+    """Класс для обработки эндпойнтов постов. GET отдает общую ленту
+    постов всех авторов от новых к старым, доступную всем."""
+
+    queryset = Post.objects.for_api()
     serializer_class = PostSerializer
+    pagination_class = FeedPagination
+
+    def get_queryset(self):
+        if self.action == 'list':
+            return Post.objects.for_feed()
+        return super().get_queryset()
+
+    def get_permissions(self):
+        if self.action == 'list':
+            return [AllowAny()]
+        return super().get_permissions()
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            serializer.save(user=self.request.user)
+            User.objects.change_posts_count(self.request.user.id, 1)
 
     def perform_destroy(self, serializer):
-        if serializer.user != self.request.user:
+        if serializer.user_id != self.request.user.id:
             raise exceptions.PermissionDenied(
                 'Изменение чужого контента запрещено!'
             )
-        super(PostViewSet, self).perform_destroy(serializer)
+        with transaction.atomic():
+            super(PostViewSet, self).perform_destroy(serializer)
+            User.objects.change_posts_count(serializer.user_id, -1)
 
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='bulk',
+        parser_classes=[*api_settings.DEFAULT_PARSER_CLASSES, NDJSONParser],
+    )
+    def bulk(self, request):
+        """Массовое создание (POST) и удаление (DELETE) постов."""
+        if request.method == 'DELETE':
+            return self.bulk_destroy(request)
+        return self.bulk_create(request)
 
-class UserPostsView(ListAPIView):
+    def bulk_create(self, request):
+        """Создает посты из JSON-массива или NDJSON одной транзакцией.
+        Если хотя бы один пост не прошел проверку, ничего не создается,
+        а в ответе возвращаются ошибки по каждому элементу."""
+        if not isinstance(request.data, list):
+            raise exceptions.ValidationError(
+                'Ожидается список постов.')
+        serializer = self.get_serializer(
+            data=request.data, many=True,
+            max_length=settings.BULK_MAX_ITEMS)
+        serializer.is_valid(raise_exception=True)
+        posts = [
+            Post(user=request.user, **item)
+            for item in serializer.validated_data
+        ]
+        with transaction.atomic():
+            posts = Post.objects.bulk_create(
+                posts, batch_size=settings.BULK_BATCH_SIZE)
+            User.objects.change_posts_count(request.user.id, len(posts))
+            invalidate_on_commit(post_scopes(request.user.id))
+            timeline.push_on_commit(posts)
+            enqueue_fanout(request.user.id, [post.id for post in posts])
+        return Response(
+            self.get_serializer(posts, many=True).data,
+            status=status.HTTP_201_CREATED)
+
+    def bulk_destroy(self, request):
+        """Удаляет посты по списку id. Принадлежность всех постов
+        пользователю проверяется одним запросом до удаления."""
+        data = request.data
+        if isinstance(data, list):
+            data = {'ids': data}
+        serializer = PostBulkDeleteSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        ids = set(serializer.validated_data['ids'])
+        owners = dict(
+            Post.objects.filter(id__in=ids).values_list('id', 'user_id'))
+        missing = ids - owners.keys()
+        if missing:
+            raise exceptions.NotFound(
+                f'Посты не найдены: {sorted(missing)}')
+        if any(user_id != request.user.id for user_id in owners.values()):
+            raise exceptions.PermissionDenied(
+                'Изменение чужого контента запрещено!'
+            )
+        # Удаление идет через QuerySet.delete(), чтобы сборщик Django
+        # обработал все связанные модели (строки ленты подписок и те,
+        # что появятся позже). Обработчики post_delete в блоке
+        # bulk_post_delete() пропускают сброс кэша и пометку в общей
+        # ленте: они выполняются один раз на весь набор.
+        with transaction.atomic(), bulk_post_delete():
+            _, deleted = Post.objects.filter(
+                id__in=ids, user=request.user).delete()
+            deleted = deleted.get(Post._meta.label, 0)
+            User.objects.change_posts_count(request.user.id, -deleted)
+            invalidate_on_commit(post_scopes(request.user.id))
+            timeline.delete_on_commit(ids)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(
+        detail=False,
+        permission_classes=(AllowAny,),
+        pagination_class=SearchPagination,
+    )
+    def search(self, request):
+        """Полнотекстовый поиск по заголовку и тексту постов."""
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class UserPostsView(ReplicaReadMixin, CachedListMixin, StreamingListMixin,
+                    ListAPIView):
+    """Класс для обработки эндпойнта постов пользователя. Посты
+    отдаются от новых к старым, параметры ?since= и ?until=
+    ограничивают время создания."""
 
     serializer_class = PostSerializer
     permission_classes = (AllowAny,)
+    filter_backends = (CreatedRangeFilter,)
+    pagination_class = CreatedKeysetPagination
 
     def get_queryset(self):
         user_id = self.kwargs.get('id')
         user = get_object_or_404(User, id=user_id)
-        return user.posts.all()
+        return Post.objects.for_api().filter(user=user)
+
+    def get_cache_scopes(self):
+        return [author_scope(self.kwargs.get('id'))]
+
+
+class FollowFeedView(ReplicaReadMixin, ListAPIView):
+    """Класс для обработки эндпойнта ленты подписок: посты авторов,
+    на которых подписан пользователь, от новых к старым."""
+
+    queryset = Post.objects.for_feed()
+    serializer_class = PostSerializer
+    permission_classes = (IsAuthenticated,)
+    pagination_class = FollowFeedPagination
+
+
+class ExportView(ReplicaReadMixin, GenericAPIView):
+    """Класс для обработки эндпойнта выгрузки постов (только для
+    администраторов). Параметры: type=jsonl|csv, gzip=1 и user=<id>.
+    Ответ передается потоком, строки читаются из базы через
+    iterator(), поэтому память не растет с числом постов."""
+
+    queryset = export_queryset()
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        data_format = request.query_params.get('type', 'jsonl')
+        if data_format not in FORMATS:
+            raise exceptions.ValidationError(
+                {'type': f'Допустимые значения: {", ".join(FORMATS)}'})
+        compress = bool(request.query_params.get('gzip'))
+        queryset = self.get_queryset()
+        user_id = request.query_params.get('user')
+        if user_id is not None:
+            if not user_id.isdigit():
+                raise exceptions.ValidationError(
+                    {'user': 'Ожидается id пользователя.'})
+            queryset = queryset.filter(user_id=user_id)
+        response = StreamingHttpResponse(
+            export_chunks(queryset, data_format, compress,
+                          settings.STREAM_CHUNK_SIZE),
+            content_type=('application/gzip' if compress
+                          else CONTENT_TYPES[data_format]))
+        response['Content-Disposition'] = (
+            f'attachment; filename="{export_filename(data_format, compress)}"')
+        return response
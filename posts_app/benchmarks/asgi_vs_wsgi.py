@@ -0,0 +1,50 @@
+"""Сравнение страниц списков под gunicorn (WSGI, синхронные
+представления) и под uvicorn (ASGI, async-представления).
+
+Запуск из папки posts_app:
+    python -m benchmarks.asgi_vs_wsgi --concurrency 200 --duration 10
+"""
+import argparse
+import json
+import shutil
+
+from .run import measure, prepared_environment
+from .server import SERVERS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--port', type=int, default=8010)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--posts', type=int, default=20000)
+    parser.add_argument('--cache', action='store_true',
+                        help='Не отключать кэш ответов')
+    parser.add_argument('--json', help='Файл для сохранения результатов')
+    args = parser.parse_args()
+    folder, env, context = prepared_environment(args)
+    from .scenarios import listing
+    try:
+        results = {
+            mode: measure(args, mode, env, context, [listing])
+            for mode in SERVERS
+        }
+    finally:
+        shutil.rmtree(folder)
+    print(f'{"mode":<6} {"endpoint":<16} {"req/s":>8} {"p50 ms":>8} '
+          f'{"p99 ms":>8} {"errors":>7}')
+    for mode, endpoints in results.items():
+        for label, row in endpoints.items():
+            print(f'{mode:<6} {label:<16} {row["requests_per_sec"]:>8} '
+                  f'{row["p50_ms"]!s:>8} {row["p99_ms"]!s:>8} '
+                  f'{row["errors"]:>7}')
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Минимальный асинхронный HTTP-клиент для нагрузочных тестов.
+Каждый запрос открывает новое соединение: так ведут себя и синхронные
+воркеры gunicorn, которые закрывают соединение после ответа."""
+import asyncio
+import json
+from collections import namedtuple
+
+Response = namedtuple('Response', 'status headers body')
+
+
+async def request(host, port, method, path, headers=None, body=None):
+    if body is not None and not isinstance(body, bytes):
+        body = json.dumps(body).encode()
+        headers = {'Content-Type': 'application/json', **(headers or {})}
+    lines = [f'{method} {path} HTTP/1.1', f'Host: {host}',
+             'Connection: close']
+    lines += [f'{name}: {value}' for name, value in (headers or {}).items()]
+    if body is not None:
+        lines.append(f'Content-Length: {len(body)}')
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        head = '\r\n'.join(lines) + '\r\n\r\n'
+        writer.write(head.encode() + (body or b''))
+        await writer.drain()
+        raw = await reader.read()
+    finally:
+        writer.close()
+    head, _, content = raw.partition(b'\r\n\r\n')
+    status_line, *header_lines = head.decode('latin-1').split('\r\n')
+    response_headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(':')
+        response_headers[name.strip().lower()] = value.strip()
+    if response_headers.get('transfer-encoding') == 'chunked':
+        content = dechunk(content)
+    return Response(int(status_line.split()[1]), response_headers, content)
+
+
+def dechunk(content):
+    body = b''
+    while content:
+        size, _, content = content.partition(b'\r\n')
+        size = int(size.split(b';')[0], 16)
+        if not size:
+            break
+        body += content[:size]
+        content = content[size + 2:]
+    return body
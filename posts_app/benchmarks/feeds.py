@@ -0,0 +1,138 @@
+"""Стоимость записи и чтения ленты подписок.
+
+Бенчмарк создает временную базу SQLite и замеряет в одном процессе:
+- рассылку одного поста подписчикам (fan-out on write) в зависимости
+  от числа подписчиков автора;
+- чтение первой и глубокой страницы ленты читателя, подписанного на
+  --authors авторов, когда все авторы рассылают посты (строки FeedItem)
+  и когда все посты читаются при запросе (fan-out on read).
+
+Запуск из папки posts_app:
+    python -m benchmarks.feeds --followers 10,100,1000,10000 --authors 200
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from .seed import seed, setup_django
+
+
+def timed(function, repeat):
+    """Функция возвращает медиану времени вызова function в мс."""
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(durations), 3)
+
+
+def follow_all(user_ids, author_ids):
+    from django.contrib.auth import get_user_model
+    from posts.models import Follow
+
+    User = get_user_model()
+    Follow.objects.bulk_create(
+        (Follow(user_id=user_id, author_id=author_id)
+         for user_id in user_ids for author_id in author_ids
+         if user_id != author_id),
+        batch_size=1000)
+    for author_id in author_ids:
+        User.objects.filter(id=author_id).update(
+            followers_count=Follow.objects.filter(
+                author_id=author_id).count())
+
+
+def fanout_cost(user_ids, counts, repeat):
+    """Время рассылки одного поста автору с count подписчиками."""
+    from django.db import transaction
+    from posts.feeds import write_feed_items
+    from posts.models import Follow, Post
+
+    author_id = user_ids[0]
+    post_id = Post.objects.filter(user_id=author_id).values_list(
+        'id', flat=True).first()
+    results = {}
+    for count in counts:
+        Follow.objects.filter(author_id=author_id).delete()
+        follow_all(user_ids[1:count + 1], [author_id])
+
+        def fanout():
+            # Откат оставляет таблицу FeedItem пустой для следующего замера.
+            with transaction.atomic():
+                write_feed_items(author_id, [post_id])
+                transaction.set_rollback(True)
+        results[count] = timed(fanout, repeat)
+        print(f'рассылка поста {count} подписчикам: {results[count]} мс')
+    return results
+
+
+def read_cost(user_ids, authors, repeat):
+    """Время чтения первой и глубокой страницы ленты в режимах
+    push (все авторы рассылают посты) и pull (все читаются при
+    запросе)."""
+    from django.conf import settings
+    from posts.feeds import backfill_feed, feed_post_ids
+    from posts.models import Follow, Post
+
+    reader_id = user_ids[-1]
+    author_ids = user_ids[:authors]
+    Follow.objects.all().delete()
+    follow_all([reader_id], author_ids)
+    for author_id in author_ids:
+        backfill_feed(author_id, [reader_id])
+    limit = settings.PAGE_NO + 1
+    deep = list(Post.objects.filter(user_id__in=author_ids).order_by(
+        '-id').values_list('id', flat=True)[:limit * 20])[-1]
+    results = {}
+    for mode, threshold in (('push', 10 ** 9), ('pull', 0)):
+        settings.FEED_FANOUT_THRESHOLD = threshold
+        results[mode] = {
+            'first_page': timed(
+                lambda: feed_post_ids(reader_id, None, True, limit), repeat),
+            'deep_page': timed(
+                lambda: feed_post_ids(reader_id, deep, True, limit), repeat),
+        }
+        print(f'лента, {mode}: {results[mode]}')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='\n'.join(__doc__.splitlines()[2:]))
+    parser.add_argument('--followers', default='10,100,1000,10000',
+                        help='Числа подписчиков автора через запятую')
+    parser.add_argument('--authors', type=int, default=200,
+                        help='На сколько авторов подписан читатель')
+    parser.add_argument('--users', type=int, default=10001)
+    parser.add_argument('--posts', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', help='Файл для сохранения результатов')
+    args = parser.parse_args()
+    counts = [int(count) for count in args.followers.split(',')]
+    folder = tempfile.mkdtemp()
+    os.environ['SQLITE_PATH'] = os.path.join(folder, 'bench.db')
+    try:
+        setup_django()
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+        user_ids = seed(max(args.users, max(counts) + 1), args.posts)
+        results = {
+            'fanout_ms': fanout_cost(user_ids, counts, args.repeat),
+            'feed_ms': read_cost(user_ids, args.authors, args.repeat),
+        }
+    finally:
+        shutil.rmtree(folder)
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
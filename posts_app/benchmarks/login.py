@@ -0,0 +1,83 @@
+"""Пропускная способность входа через API для алгоритмов хэширования.
+
+Для каждого алгоритма из --hashers приложение запускается под gunicorn
+с --workers воркерами (по умолчанию один - одно ядро) и нагружается
+сценарием login. Выводятся req/s, req/s на воркер, задержки и число
+ошибок (в том числе ответов 503 от пула хэширования).
+
+Запуск из папки posts_app:
+    python -m benchmarks.login --hashers pbkdf2,scrypt --duration 10
+    python -m benchmarks.login --threads 8 --pool thread --pool-workers 2
+"""
+import argparse
+import json
+import shutil
+
+from .run import measure, prepared_environment
+from .seed import PASSWORD
+
+
+def rehash_users(name):
+    """Функция присваивает всем пользователям хэш PASSWORD, посчитанный
+    алгоритмом name, чтобы в замер не попал пересчет хэшей при первом
+    входе."""
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.utils.module_loading import import_string
+
+    hasher = import_string(settings.PASSWORD_HASHER_CLASSES[name])()
+    get_user_model().objects.update(
+        password=hasher.encode(PASSWORD, hasher.salt()))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='\n'.join(__doc__.splitlines()[2:]))
+    parser.add_argument('--hashers', default='pbkdf2,scrypt',
+                        help='Алгоритмы через запятую: pbkdf2, scrypt, '
+                             'argon2 (нужен argon2-cffi)')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--pool', choices=('', 'thread', 'process'),
+                        default='', help='PASSWORD_HASHING_POOL сервера')
+    parser.add_argument('--pool-workers', type=int, default=2)
+    parser.add_argument('--port', type=int, default=8010)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--posts', type=int, default=100)
+    parser.add_argument('--json', help='Файл для сохранения результатов')
+    args = parser.parse_args()
+    args.cache = False
+    folder, env, context = prepared_environment(args)
+    from .scenarios import login
+    results = {}
+    try:
+        for hasher in args.hashers.split(','):
+            rehash_users(hasher)
+            server_env = {
+                **env,
+                'PASSWORD_HASHER': hasher,
+                'PASSWORD_HASHING_POOL': args.pool,
+                'PASSWORD_HASHING_WORKERS': str(args.pool_workers),
+            }
+            results[hasher] = measure(
+                args, 'wsgi', server_env, context, [login])['login']
+    finally:
+        shutil.rmtree(folder)
+    print(f'{"hasher":<8} {"req/s":>8} {"req/s/worker":>12} '
+          f'{"p50 ms":>8} {"p99 ms":>8} {"errors":>7}')
+    for hasher, row in results.items():
+        print(f'{hasher:<8} {row["requests_per_sec"]:>8} '
+              f'{row["requests_per_sec"] / args.workers:>12.2f} '
+              f'{row["p50_ms"]!s:>8} {row["p99_ms"]!s:>8} '
+              f'{row["errors"]:>7}')
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
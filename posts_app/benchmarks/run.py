@@ -0,0 +1,303 @@
+"""Нагрузочный тест HTML-страниц и API.
+
+Бенчмарк создает временную базу SQLite, наполняет ее данными, запускает
+приложение под gunicorn на локальном порту и выполняет сценарии из
+benchmarks.scenarios заданным числом одновременных клиентов. Для
+каждого эндпойнта записываются req/s, задержки p50/p95/p99 и число
+SQL-запросов (заголовок X-Query-Count).
+
+Запуск из папки posts_app:
+    python -m benchmarks.run --scenarios listing,deep_pagination \\
+        --concurrency 50 --duration 10 --output before.json
+    python -m benchmarks.run compare before.json after.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+from . import client
+from .server import running_server
+from .seed import seed, setup_django
+
+HOST = '127.0.0.1'
+TOKEN_USERS = 20
+
+
+class Session:
+    """Класс хранит общие для клиентов данные прогона и собирает
+    задержки, ошибки и число SQL-запросов по меткам эндпойнтов."""
+
+    def __init__(self, port, context):
+        self.port = port
+        self.context = context
+        self.run_id = f'{int(time.time())}-{os.getpid()}'
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def random_email(self):
+        return random.choice(self.context['emails'])
+
+    def auth_headers(self):
+        token = random.choice(self.context['tokens'])
+        return {'Authorization': f'Token {token}'}
+
+    async def call(self, label, method, path, expect=200, headers=None,
+                   body=None):
+        """Метод выполняет запрос и учитывает его под меткой label
+        (None - служебный запрос, не учитывается). Возвращает ответ
+        или None при ошибке."""
+        started = time.monotonic()
+        try:
+            response = await client.request(
+                HOST, self.port, method, path, headers, body)
+        except OSError:
+            response = None
+        elapsed = time.monotonic() - started
+        if response is None or response.status != expect:
+            if label is not None:
+                self.errors[label] += 1
+            return None
+        if label is not None:
+            self.latencies[label].append(elapsed)
+            count = response.headers.get('x-query-count')
+            if count is not None:
+                self.queries[label].append(int(count))
+        return response
+
+
+def percentile(values, share):
+    values = sorted(values)
+    index = min(int(len(values) * share), len(values) - 1)
+    return round(values[index] * 1000, 2)
+
+
+def summarize(session, duration):
+    endpoints = {}
+    for label in sorted(set(session.latencies) | set(session.errors)):
+        latencies = session.latencies[label]
+        queries = session.queries[label]
+        endpoints[label] = {
+            'requests': len(latencies),
+            'errors': session.errors[label],
+            'requests_per_sec': round(len(latencies) / duration, 2),
+            'p50_ms': percentile(latencies, 0.50) if latencies else None,
+            'p95_ms': percentile(latencies, 0.95) if latencies else None,
+            'p99_ms': percentile(latencies, 0.99) if latencies else None,
+            'queries': statistics.median(queries) if queries else None,
+        }
+    return endpoints
+
+
+async def load(session, scenarios, concurrency, duration):
+    deadline = time.monotonic() + duration
+
+    async def worker(number):
+        while time.monotonic() < deadline:
+            await scenarios[number % len(scenarios)](session)
+            number += 1
+
+    await asyncio.gather(*(worker(number) for number in range(concurrency)))
+
+
+def prepare(users, posts):
+    """Функция наполняет пустую базу и возвращает данные для сценариев:
+    email пользователей, токены и автора с длинной лентой."""
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from posts.models import Post
+    from rest_framework.authtoken.models import Token
+
+    User = get_user_model()
+    user_ids = seed(users, posts)
+    author_id = user_ids[0]
+    author_posts = Post.objects.filter(user_id=author_id).order_by('id')
+    # Позиция курсора за несколько страниц до конца ленты автора.
+    deep_position = author_posts.values_list('id', flat=True)[
+        min(settings.PAGE_NO * 3, author_posts.count() - 1)]
+    tokens = [
+        Token.objects.get_or_create(user_id=user_id)[0].key
+        for user_id in user_ids[:TOKEN_USERS]
+    ]
+    emails = list(User.objects.filter(
+        id__in=user_ids[:TOKEN_USERS]).values_list('email', flat=True))
+    return {
+        'author_id': author_id,
+        'deep_position': deep_position,
+        'tokens': tokens,
+        'emails': emails,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def prepared_environment(args):
+    """Функция создает временную базу, наполняет ее и возвращает
+    переменные окружения сервера и данные для сценариев."""
+    folder = tempfile.mkdtemp()
+    env = {
+        'SQLITE_PATH': os.path.join(folder, 'bench.db'),
+        'QUERY_COUNT_HEADER': '1',
+    }
+    if not args.cache:
+        # Без кэша ответов замеряются сами представления и запросы к базе.
+        env['RESPONSE_CACHE_TIMEOUT'] = '0'
+    os.environ.update(env)
+    setup_django()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    return folder, env, prepare(args.users, args.posts)
+
+
+def measure(args, server, env, context, scenarios):
+    with running_server(
+            server, args.port, args.workers, env, args.threads):
+        session = Session(args.port, context)
+        asyncio.run(load(
+            session, scenarios, args.concurrency, args.duration))
+    return summarize(session, args.duration)
+
+
+def run(args):
+    from .scenarios import SCENARIOS
+
+    names = args.scenarios.split(',')
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f'Неизвестные сценарии: {", ".join(sorted(unknown))}')
+    folder, env, context = prepared_environment(args)
+    try:
+        endpoints = measure(
+            args, args.server, env, context,
+            [SCENARIOS[name] for name in names])
+    finally:
+        shutil.rmtree(folder)
+    result = {
+        'meta': {
+            'revision': git_revision(),
+            'server': args.server,
+            'workers': args.workers,
+            'threads': args.threads,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'users': args.users,
+            'posts': args.posts,
+            'scenarios': names,
+            'cache': args.cache,
+        },
+        'endpoints': endpoints,
+    }
+    print_endpoints(result['endpoints'])
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(result, output, indent=2, ensure_ascii=False)
+
+
+def print_endpoints(endpoints):
+    print(f'{"endpoint":<24} {"req/s":>8} {"p50":>8} {"p95":>8} '
+          f'{"p99":>8} {"queries":>7} {"errors":>6}')
+    for label, row in endpoints.items():
+        print(f'{label:<24} {row["requests_per_sec"]:>8} '
+              f'{row["p50_ms"]!s:>8} {row["p95_ms"]!s:>8} '
+              f'{row["p99_ms"]!s:>8} {row["queries"]!s:>7} '
+              f'{row["errors"]:>6}')
+
+
+def compare_endpoints(base, new, threshold):
+    """Функция сравнивает результаты двух прогонов и возвращает список
+    регрессий: req/s упал или p95 вырос больше чем на threshold
+    (доля), выросло число SQL-запросов или появились ошибки."""
+    regressions = []
+    for label, before in base.items():
+        after = new.get(label)
+        if after is None:
+            continue
+        if (before['requests_per_sec'] and after['requests_per_sec']
+                < before['requests_per_sec'] * (1 - threshold)):
+            regressions.append(
+                f'{label}: req/s {before["requests_per_sec"]} -> '
+                f'{after["requests_per_sec"]}')
+        if (before['p95_ms'] and after['p95_ms']
+                and after['p95_ms'] > before['p95_ms'] * (1 + threshold)):
+            regressions.append(
+                f'{label}: p95 {before["p95_ms"]} -> {after["p95_ms"]} мс')
+        if (before['queries'] is not None and after['queries'] is not None
+                and after['queries'] > before['queries']):
+            regressions.append(
+                f'{label}: SQL-запросов {before["queries"]} -> '
+                f'{after["queries"]}')
+        if after['errors'] > before['errors']:
+            regressions.append(
+                f'{label}: ошибок {before["errors"]} -> {after["errors"]}')
+    return regressions
+
+
+def compare(args):
+    with open(args.base) as base_file, open(args.new) as new_file:
+        base = json.load(base_file)
+        new = json.load(new_file)
+    for key, value in base['meta'].items():
+        if key != 'revision' and new['meta'].get(key) != value:
+            print(f'Параметры прогонов различаются: {key} = {value} и '
+                  f'{new["meta"].get(key)}')
+    regressions = compare_endpoints(
+        base['endpoints'], new['endpoints'], args.threshold / 100)
+    for line in regressions:
+        print(f'РЕГРЕССИЯ {line}')
+    if regressions:
+        sys.exit(1)
+    print('Регрессий нет')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='\n'.join(__doc__.splitlines()[2:]))
+    subparsers = parser.add_subparsers(dest='command')
+    compare_parser = subparsers.add_parser(
+        'compare', help='Сравнить два файла результатов')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument(
+        '--threshold', type=float, default=10,
+        help='Допустимое ухудшение req/s и p95, в процентах')
+    parser.add_argument(
+        '--scenarios',
+        default='signup,login,listing,deep_pagination,create,delete')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--posts', type=int, default=100000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--server', choices=('wsgi', 'asgi'), default='wsgi')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--port', type=int, default=8010)
+    parser.add_argument('--cache', action='store_true',
+                        help='Не отключать кэш ответов')
+    parser.add_argument('--output', help='Файл для сохранения результатов')
+    args = parser.parse_args()
+    if args.command == 'compare':
+        compare(args)
+    else:
+        run(args)
+
+
+if __name__ == '__main__':
+    main()
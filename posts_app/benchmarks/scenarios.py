@@ -0,0 +1,77 @@
+"""Сценарии нагрузки. Сценарий - асинхронная функция, которая выполняет
+один или несколько запросов через session.call(); каждый запрос
+учитывается под своей меткой эндпойнта."""
+import itertools
+import json
+
+from posts.pagination import NEXT, encode_cursor
+
+from .seed import PASSWORD
+
+_signup_numbers = itertools.count()
+
+
+async def signup(session):
+    number = next(_signup_numbers)
+    await session.call(
+        'signup', 'POST', '/api/auth/signup/', expect=201,
+        body={'email': f'{session.run_id}-{number}@signup.test',
+              'name': f'Signup{number}', 'password': PASSWORD})
+
+
+async def login(session):
+    await session.call(
+        'login', 'POST', '/api/auth/login/',
+        body={'email': session.random_email(), 'password': PASSWORD})
+
+
+async def listing(session):
+    user_id = session.context['author_id']
+    await session.call('index', 'GET', '/')
+    await session.call('user_posts_page', 'GET', f'/users/{user_id}/posts/')
+    await session.call('api_users', 'GET', '/api/users/')
+    await session.call(
+        'api_user_posts', 'GET', f'/api/users/{user_id}/posts/')
+
+
+async def deep_pagination(session):
+    """Страница в конце длинной ленты автора: курсорная пагинация
+    должна отдавать ее так же быстро, как первую."""
+    user_id = session.context['author_id']
+    cursor = encode_cursor(NEXT, session.context['deep_position'])
+    await session.call(
+        'user_posts_page_deep', 'GET',
+        f'/users/{user_id}/posts/?cursor={cursor}')
+    await session.call(
+        'api_user_posts_deep', 'GET',
+        f'/api/users/{user_id}/posts/?cursor={cursor}')
+
+
+async def create(session):
+    await session.call(
+        'create', 'POST', '/api/posts/', expect=201,
+        headers=session.auth_headers(),
+        body={'title': 'Пост бенчмарка', 'body': 'Текст поста.'})
+
+
+async def delete(session):
+    headers = session.auth_headers()
+    response = await session.call(
+        None, 'POST', '/api/posts/', expect=201, headers=headers,
+        body={'title': 'Пост для удаления', 'body': 'Текст поста.'})
+    if response is None:
+        return
+    post_id = json.loads(response.body)['id']
+    await session.call(
+        'delete', 'DELETE', f'/api/posts/{post_id}/', expect=204,
+        headers=headers)
+
+
+SCENARIOS = {
+    'signup': signup,
+    'login': login,
+    'listing': listing,
+    'deep_pagination': deep_pagination,
+    'create': create,
+    'delete': delete,
+}
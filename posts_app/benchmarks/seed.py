@@ -0,0 +1,62 @@
+"""Генератор тестовых данных для бенчмарков.
+
+Запуск из папки posts_app:
+    python -m benchmarks.seed --users 1000 --posts 100000
+"""
+import argparse
+import os
+import time
+
+PASSWORD = 'bench-password'
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'posts_app.settings')
+    import django
+    django.setup()
+
+
+def seed(users, posts, batch_size=1000):
+    """Функция создает users пользователей bench<N>@bench.test с паролем
+    PASSWORD и posts постов, распределенных между ними по кругу.
+    Пароль хэшируется один раз: хэширование каждого пользователя
+    заняло бы больше времени, чем вся остальная загрузка."""
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from posts.models import Post
+
+    User = get_user_model()
+    password = make_password(PASSWORD)
+    created = User.objects.bulk_create(
+        (User(email=f'bench{number}@bench.test', name=f'Bench{number}',
+              password=password)
+         for number in range(users)),
+        batch_size=batch_size)
+    user_ids = [user.id for user in created]
+    if user_ids[0] is None:
+        user_ids = list(User.objects.filter(
+            email__endswith='@bench.test').values_list('id', flat=True))
+    Post.objects.bulk_create(
+        (Post(title=f'Пост {number}', body='Текст поста. ' * 20,
+              user_id=user_ids[number % len(user_ids)])
+         for number in range(posts)),
+        batch_size=batch_size)
+    User.objects.rebuild_posts_count()
+    return user_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--posts', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+    setup_django()
+    started = time.monotonic()
+    seed(args.users, args.posts, args.batch_size)
+    print(f'Создано {args.users} пользователей и {args.posts} постов '
+          f'за {time.monotonic() - started:.1f} с')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Запуск приложения под gunicorn для бенчмарков."""
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from contextlib import contextmanager
+
+SERVERS = {
+    'wsgi': ['posts_app.wsgi:application'],
+    'asgi': ['posts_app.asgi:application',
+             '--worker-class', 'uvicorn.workers.UvicornWorker'],
+}
+
+
+def wait_ready(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/users/')
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Сервер на порту {port} не запустился')
+
+
+@contextmanager
+def running_server(mode, port, workers, env=None, threads=1):
+    """Контекстный менеджер запускает gunicorn в режиме mode (wsgi или
+    asgi) на 127.0.0.1:port и останавливает его при выходе.
+    ASYNC_VIEWS выставляется по режиму. threads > 1 запускает
+    WSGI-воркеры gthread."""
+    server_env = {**os.environ, **(env or {})}
+    server_env['ASYNC_VIEWS'] = '1' if mode == 'asgi' else ''
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', *SERVERS[mode],
+         '--workers', str(workers), '--threads', str(threads),
+         '--bind', f'127.0.0.1:{port}', '--log-level', 'warning'],
+        env=server_env)
+    try:
+        wait_ready(port)
+        yield
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
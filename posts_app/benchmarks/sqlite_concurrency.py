@@ -0,0 +1,139 @@
+"""Сравнение конкурентного чтения и записи в SQLite с настройками
+по умолчанию и с PRAGMA из settings.SQLITE_PRAGMAS.
+
+Запуск из папки posts_app:
+    python -m benchmarks.sqlite_concurrency --readers 4 --writers 2
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from posts_app.backends.sqlite3.pragmas import apply_pragmas
+from posts_app.settings import SQLITE_PRAGMAS
+
+SEED_USERS = 100
+SEED_POSTS = 20000
+
+
+def connect(path, pragmas):
+    # Как и Django, модуль sqlite3 по умолчанию ждет снятия блокировки
+    # до 5 секунд; в режиме tuned ожидание задает PRAGMA busy_timeout.
+    connection = sqlite3.connect(path, isolation_level=None)
+    apply_pragmas(connection, pragmas)
+    return connection
+
+
+def seed(path, pragmas):
+    connection = connect(path, pragmas)
+    connection.execute(
+        'CREATE TABLE posts_post (id INTEGER PRIMARY KEY, '
+        'user_id INTEGER NOT NULL, title TEXT, body TEXT)')
+    connection.execute(
+        'CREATE INDEX posts_user_idx ON posts_post (user_id, id)')
+    connection.executemany(
+        'INSERT INTO posts_post (user_id, title, body) VALUES (?, ?, ?)',
+        ((number % SEED_USERS, f'Пост {number}', 'Текст ' * 20)
+         for number in range(SEED_POSTS)))
+    connection.close()
+
+
+def reader(path, pragmas, deadline, results):
+    connection = connect(path, pragmas)
+    done = errors = 0
+    number = 0
+    while time.monotonic() < deadline:
+        number += 1
+        try:
+            connection.execute(
+                'SELECT id, title, body FROM posts_post WHERE user_id = ? '
+                'ORDER BY id DESC LIMIT 10',
+                (number % SEED_USERS,)).fetchall()
+            done += 1
+        except sqlite3.OperationalError:
+            errors += 1
+    results.put(('read', done, errors))
+
+
+def writer(path, pragmas, deadline, results):
+    connection = connect(path, pragmas)
+    done = errors = 0
+    number = 0
+    while time.monotonic() < deadline:
+        number += 1
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute(
+                'INSERT INTO posts_post (user_id, title, body) '
+                'VALUES (?, ?, ?)',
+                (number % SEED_USERS, 'Новый пост', 'Текст ' * 20))
+            connection.execute('COMMIT')
+            done += 1
+        except sqlite3.OperationalError:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            errors += 1
+    results.put(('write', done, errors))
+
+
+def run(mode, pragmas, readers, writers, duration):
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'bench.db')
+        seed(path, pragmas)
+        results = multiprocessing.Queue()
+        deadline = time.monotonic() + duration
+        processes = [
+            multiprocessing.Process(
+                target=reader, args=(path, pragmas, deadline, results))
+            for _ in range(readers)
+        ] + [
+            multiprocessing.Process(
+                target=writer, args=(path, pragmas, deadline, results))
+            for _ in range(writers)
+        ]
+        for process in processes:
+            process.start()
+        totals = {'read': [0, 0], 'write': [0, 0]}
+        for _ in processes:
+            kind, done, errors = results.get()
+            totals[kind][0] += done
+            totals[kind][1] += errors
+        for process in processes:
+            process.join()
+    return {
+        'mode': mode,
+        'reads_per_sec': round(totals['read'][0] / duration, 1),
+        'writes_per_sec': round(totals['write'][0] / duration, 1),
+        'read_errors': totals['read'][1],
+        'write_errors': totals['write'][1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--json', help='Файл для сохранения результатов')
+    args = parser.parse_args()
+    results = [
+        run('default', {}, args.readers, args.writers, args.duration),
+        run('tuned', SQLITE_PRAGMAS, args.readers, args.writers,
+            args.duration),
+    ]
+    print(f'{"mode":<8} {"reads/s":>10} {"writes/s":>10} '
+          f'{"read err":>9} {"write err":>9}')
+    for row in results:
+        print(f'{row["mode"]:<8} {row["reads_per_sec"]:>10} '
+              f'{row["writes_per_sec"]:>10} {row["read_errors"]:>9} '
+              f'{row["write_errors"]:>9}')
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Post
+from .models import Post, Task
+from .search import get_search_backend, split_terms
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -12,10 +13,39 @@ class PostAdmin(admin.ModelAdmin):
         'title',
         'body',
         'user',
+        'created_at',
     )
     search_fields = ('title', 'body',)
     list_filter = ('id', 'user')
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск в админке идет по полнотекстовому индексу,
+        а не через LIKE по search_fields."""
+        terms = split_terms(search_term)
+        if not terms:
+            return queryset, False
+        backend = get_search_backend(queryset.db)
+        return backend.filter(queryset, terms), False
+
 
 admin.site.register(Post, PostAdmin)
+
+
+class TaskAdmin(admin.ModelAdmin):
+    """Класс нужен для просмотра очереди фоновых задач, в том числе
+    задач, исчерпавших попытки."""
+
+    list_display = (
+        'id',
+        'name',
+        'status',
+        'attempts',
+        'available_at',
+        'created_at',
+    )
+    list_filter = ('status', 'name')
+    readonly_fields = ('created_at',)
+
+
+admin.site.register(Task, TaskAdmin)
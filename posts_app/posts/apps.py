@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class PostsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'posts'
+
+    def ready(self):
+        from posts_app.metrics import register_collector
+
+        from . import checks, signals  # noqa: F401
+        from .tasks import task_metrics
+        from .timeline import timeline_metrics
+        register_collector(timeline_metrics)
+        register_collector(task_metrics)
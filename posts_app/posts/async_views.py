@@ -0,0 +1,55 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import Http404
+from django.shortcuts import render
+
+from posts_app.async_utils import aget_user
+from posts_app.replicas import read_from_replica
+
+from .cache import USERS_SCOPE, author_scope, cache_public_page
+from .models import Post
+from .pagination import KeysetPaginator
+
+User = get_user_model()
+
+# Async-версии страниц списков для запуска под ASGI (ASYNC_VIEWS).
+# Все данные страницы загружаются асинхронным ORM до render():
+# шаблон получает готовые списки и не обращается к базе. Рендеринг
+# выполняется в потоке: тег render_cards читает карточки из кэша.
+
+
+@cache_public_page(lambda: [USERS_SCOPE])
+@read_from_replica
+async def index(request):
+    """Функция асинхронно выбирает страницу пользователей
+    и возвращает сгенерированную страницу."""
+    await aget_user(request)
+    paginator = KeysetPaginator(User.objects.all(), settings.PAGE_NO)
+    page = await paginator.aget_page(request.GET.get('cursor'))
+    return await sync_to_async(render)(
+        request, 'posts/index.html', {'page': page})
+
+
+@cache_public_page(lambda user_id: [author_scope(user_id)])
+@read_from_replica
+async def user_post_view(request, user_id):
+    """Функция асинхронно выбирает автора и страницу его постов
+    и возвращает сгенерированную страницу."""
+    current_user = await aget_user(request)
+    try:
+        user = await User.objects.only('id', 'name').aget(id=user_id)
+    except User.DoesNotExist:
+        raise Http404
+    post_list = Post.objects.with_author().filter(user_id=user.id)
+    paginator = KeysetPaginator(post_list, settings.PAGE_NO)
+    page = await paginator.aget_page(request.GET.get('cursor'))
+    return await sync_to_async(render)(
+        request,
+        'posts/posts.html',
+        {
+            'page': page,
+            'name': user.name,
+            'is_author': current_user.id == user.id,
+        },
+    )
@@ -0,0 +1,250 @@
+import hashlib
+import time
+from contextlib import nullcontext
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.http.request import split_domain_port
+
+from posts_app.async_utils import aget_user
+from posts_app.replicas import primary_reads
+
+USERS_SCOPE = 'users'
+# Общая лента последних постов (posts.timeline).
+FEED_SCOPE = 'feed'
+
+
+def author_scope(user_id):
+    return f'author:{user_id}'
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def _version_key(scope):
+    return f'posts:version:{scope}'
+
+
+def _now_version():
+    return time.time_ns() // 1000
+
+
+def get_versions(scopes):
+    """Функция возвращает версии областей кэша. Версия - время
+    последнего изменения данных области в микросекундах. Для области
+    без версии (новый или очищенный кэш) версией становится текущее
+    время: это только делает недействительными старые записи."""
+    cache = get_cache()
+    keys = {_version_key(scope): scope for scope in scopes}
+    found = cache.get_many(keys)
+    versions = {}
+    for key, scope in keys.items():
+        if key not in found:
+            cache.add(key, _now_version(), timeout=None)
+            found[key] = cache.get(key) or _now_version()
+        versions[scope] = found[key]
+    return versions
+
+
+def bump_versions(scopes):
+    """Функция делает недействительными закэшированные ответы
+    указанных областей, присваивая им новую версию, и возвращает ее."""
+    now = _now_version()
+    get_cache().set_many(
+        {_version_key(scope): now for scope in scopes}, timeout=None)
+    return now
+
+
+def invalidate_on_commit(scopes):
+    """Функция сбрасывает версии областей после фиксации текущей
+    транзакции, чтобы параллельный запрос не закэшировал под новой
+    версией еще не зафиксированные данные."""
+    scopes = list(scopes)
+    transaction.on_commit(lambda: bump_versions(scopes))
+
+
+def data_versions(scopes):
+    """Функция возвращает версии областей, посчитанные по данным базы:
+    для ленты автора - id последнего поста и число постов, для списка
+    пользователей - id последнего пользователя, их число и сумма
+    счетчиков постов. Запросы читают только индексы. В отличие от
+    версий в кэше такие версии одинаковы во всех процессах и не
+    теряются при очистке кэша, но не замечают правки существующих
+    строк (например, смену имени пользователя)."""
+    from django.contrib.auth import get_user_model
+    from django.db.models import Count, Max, Sum
+
+    from .models import Post
+
+    versions = {}
+    for scope in scopes:
+        if scope == USERS_SCOPE:
+            stamp = get_user_model().objects.aggregate(
+                Max('id'), Count('id'), Sum('posts_count'))
+        else:
+            stamp = Post.objects.filter(
+                user_id=scope.split(':', 1)[1]).aggregate(
+                Max('id'), Count('id'))
+        versions[scope] = '-'.join(
+            str(value or 0) for value in stamp.values())
+    return versions
+
+
+def list_versions(scopes):
+    """Версии областей для ETag и ключа кэша списков API: из кэша
+    или, при settings.API_ETAG_SOURCE = 'data', из базы."""
+    if settings.API_ETAG_SOURCE == 'data':
+        return data_versions(scopes)
+    return get_versions(scopes)
+
+
+def recently_changed(versions):
+    """Функция проверяет, менялась ли какая-то из областей последние
+    settings.REPLICA_STICKY_SECONDS секунд: реплика может еще не
+    содержать этих изменений. Версии, посчитанные по данным
+    (API_ETAG_SOURCE = 'data'), читаются из той же базы, что и ответ,
+    и всегда ему соответствуют."""
+    window = settings.REPLICA_STICKY_SECONDS * 1_000_000
+    now = _now_version()
+    return any(
+        isinstance(version, int) and now - version < window
+        for version in versions.values())
+
+
+def fill_reads(versions):
+    """Функция возвращает контекст для построения ответа, который
+    будет закэширован под версиями versions. Ответ реплики, еще
+    не получившей изменений, остался бы в кэше под новой версией
+    до RESPONSE_CACHE_TIMEOUT, поэтому вскоре после изменения
+    области ответ читается из основной базы."""
+    if settings.REPLICA_DATABASES and recently_changed(versions):
+        return primary_reads()
+    return nullcontext()
+
+
+def post_scopes(user_id):
+    """Области кэша, которые меняются при создании или удалении поста:
+    лента автора и список пользователей со счетчиками постов."""
+    return [author_scope(user_id), USERS_SCOPE]
+
+
+def cache_host(request):
+    """Функция возвращает хост запроса для ключа кэша или None, если
+    ответ для этого хоста не кэшируется. От хоста зависят абсолютные
+    ссылки в ответе, поэтому он входит в ключ, но только домен,
+    указанный в ALLOWED_HOSTS явно (не маской), с портом сервера или
+    без порта: иначе клиент мог бы создавать записи кэша, подставляя
+    произвольный заголовок Host."""
+    domain, port = split_domain_port(request.get_host())
+    if domain not in {host.lower() for host in settings.ALLOWED_HOSTS}:
+        return None
+    if not port:
+        return domain
+    return f'{domain}:{port}' if port == request.get_port() else None
+
+
+class CachedPage:
+    """Класс описывает ключ и ETag закэшированного ответа для заданных
+    версий областей и адреса запроса. Если хост запроса не подходит
+    для кэша (cache_host), ключа нет и ответ не кэшируется, но ETag
+    по-прежнему позволяет отдать 304. Last-Modified не отдается:
+    время с точностью до секунды не отличает ответ, полученный
+    до изменения в ту же секунду, от ответа после него."""
+
+    def __init__(self, name, versions, request, variant=''):
+        host = cache_host(request)
+        parts = [name, host or '', request.get_full_path(), variant]
+        parts += [f'{scope}={versions[scope]}' for scope in sorted(versions)]
+        digest = hashlib.md5(
+            '|'.join(parts).encode(), usedforsecurity=False).hexdigest()
+        self.key = f'posts:page:{digest}' if host else None
+        self.etag = f'"{digest}"'
+
+    def not_modified(self, request):
+        """Метод возвращает ответ 304, если у клиента актуальная копия."""
+        return get_conditional_response(request, etag=self.etag)
+
+    def get(self):
+        return get_cache().get(self.key) if self.key else None
+
+    def set(self, value):
+        if self.key:
+            get_cache().set(
+                self.key, value, settings.RESPONSE_CACHE_TIMEOUT)
+
+    def set_headers(self, response):
+        response['ETag'] = self.etag
+        patch_cache_control(response, no_cache=True)
+        return response
+
+
+def _cached_response(request, page):
+    not_modified = page.not_modified(request)
+    if not_modified is not None:
+        return not_modified
+    cached = page.get()
+    if cached is not None:
+        content, content_type = cached
+        response = HttpResponse(content, content_type=content_type)
+        return page.set_headers(response)
+    return None
+
+
+def _store_response(page, response):
+    if (response.status_code == 200 and not response.streaming
+            and not response.cookies):
+        page.set((response.content, response['Content-Type']))
+        page.set_headers(response)
+    return response
+
+
+def cache_public_page(scopes):
+    """Декоратор кэширует HTML-страницу для анонимных посетителей.
+    scopes - функция, которая по аргументам представления возвращает
+    области кэша, от которых зависит страница. Ответ хранится под
+    ключом с версиями этих областей и отдается с ETag, так что клиент
+    может получить 304 без обращения к базе.
+    Подходит и для async-представлений."""
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                user = await aget_user(request)
+                if (request.method not in ('GET', 'HEAD')
+                        or user.is_authenticated):
+                    return await view(request, *args, **kwargs)
+                # Обращения к кэшу блокируют поток, поэтому выполняются
+                # не в цикле событий.
+                versions = await sync_to_async(get_versions)(
+                    scopes(*args, **kwargs))
+                page = CachedPage(view.__name__, versions, request)
+                response = await sync_to_async(_cached_response)(
+                    request, page)
+                if response is not None:
+                    return response
+                with fill_reads(versions):
+                    response = await view(request, *args, **kwargs)
+                return await sync_to_async(_store_response)(page, response)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD')
+                    or request.user.is_authenticated):
+                return view(request, *args, **kwargs)
+            versions = get_versions(scopes(*args, **kwargs))
+            page = CachedPage(view.__name__, versions, request)
+            response = _cached_response(request, page)
+            if response is not None:
+                return response
+            with fill_reads(versions):
+                response = view(request, *args, **kwargs)
+            return _store_response(page, response)
+        return wrapper
+    return decorator
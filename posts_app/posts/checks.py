@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches, deploy=True)
+def check_response_cache(app_configs, **kwargs):
+    """Проверка (manage.py check --deploy) предупреждает, что кэш
+    ответов хранится в памяти процесса. Версии областей кэша в нем
+    свои у каждого воркера, и изменения, сделанные в другом воркере
+    или в воркере фоновых задач, не сбрасывают закэшированные
+    страницы до RESPONSE_CACHE_TIMEOUT."""
+    if not isinstance(caches[settings.RESPONSE_CACHE_ALIAS], LocMemCache):
+        return []
+    return [Warning(
+        'Кэш ответов хранится в памяти процесса',
+        hint='Для нескольких воркеров задайте общий кэш: '
+             'CACHE_BACKEND=file или redis.',
+        id='posts.W001',
+    )]
@@ -0,0 +1,75 @@
+import csv
+import json
+import zlib
+
+from .models import Post
+
+FORMATS = ('jsonl', 'csv')
+CONTENT_TYPES = {'jsonl': 'application/x-ndjson', 'csv': 'text/csv'}
+EXPORT_FIELDS = ('id', 'user_id', 'email', 'name', 'title', 'body')
+
+
+def export_queryset(user_id=None):
+    """Функция возвращает запрос для выгрузки постов по возрастанию id:
+    строки читаются кортежами, без создания объектов моделей. Поля
+    email, name, title и body совпадают с форматом import_posts."""
+    queryset = Post.objects.order_by('id').values_list(
+        'id', 'user_id', 'user__email', 'user__name', 'title', 'body')
+    if user_id is not None:
+        queryset = queryset.filter(user_id=user_id)
+    return queryset
+
+
+class _Line:
+    """Объект-приемник для csv.writer: возвращает записанную строку."""
+
+    def write(self, line):
+        return line
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(
+            dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False,
+            separators=(',', ':')) + '\n'
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Line())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(queryset, data_format, compress=False, chunk_size=2000):
+    """Функция выгружает посты в JSONL или CSV и отдает результат
+    кусками байтов по chunk_size строк (в gzip, если compress).
+    Строки читаются через iterator() - в PostgreSQL серверным
+    курсором, - поэтому память не растет с числом постов."""
+    lines = {'jsonl': jsonl_lines, 'csv': csv_lines}[data_format](
+        queryset.iterator(chunk_size=chunk_size))
+
+    def chunks():
+        chunk = []
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) >= chunk_size:
+                yield ''.join(chunk).encode()
+                chunk = []
+        if chunk:
+            yield ''.join(chunk).encode()
+
+    return gzip_chunks(chunks()) if compress else chunks()
+
+
+def export_filename(data_format, compress=False):
+    return f'posts.{data_format}' + ('.gz' if compress else '')
@@ -0,0 +1,198 @@
+import heapq
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+
+from .models import FeedItem, Follow, Post
+from .pagination import KeysetPaginator
+from .tasks import enqueue, task
+
+User = get_user_model()
+
+# Лента подписок собирается из двух источников. Посты автора, у которого
+# меньше FEED_FANOUT_THRESHOLD подписчиков, после публикации рассылаются
+# фоновой задачей (posts.tasks): каждому подписчику пишется строка
+# FeedItem (fan-out on write). Посты популярных авторов не рассылаются,
+# а читаются при запросе ленты из индекса (user, -id) поста (fan-out
+# on read). Страница ленты - слияние (heapq.merge) уже упорядоченных
+# по id диапазонов: строк FeedItem читателя и постов каждого
+# популярного автора.
+
+
+def is_pushed(followers_count):
+    """Посты автора с таким числом подписчиков рассылаются при записи."""
+    return 0 < followers_count < settings.FEED_FANOUT_THRESHOLD
+
+
+def write_feed_items(author_id, post_ids, follower_ids=None):
+    """Функция пишет строки FeedItem для постов post_ids автора всем
+    его подписчикам (или только подписчикам из follower_ids) пачками
+    по FEED_FANOUT_BATCH_SIZE строк. Повторная запись пропускается.
+    Задача могла ждать в очереди, поэтому подписчики и посты читаются
+    заново: удаленные посты и отмененные подписки не пишутся."""
+    post_ids = list(Post.objects.filter(id__in=post_ids).values_list(
+        'id', flat=True))
+    follows = Follow.objects.filter(author_id=author_id)
+    if follower_ids is not None:
+        follows = follows.filter(user_id__in=follower_ids)
+    follower_ids = follows.values_list('user_id', flat=True).iterator(
+        chunk_size=settings.FEED_FANOUT_BATCH_SIZE)
+    batch = []
+    written = 0
+    for follower_id in follower_ids:
+        batch += [
+            FeedItem(user_id=follower_id, post_id=post_id,
+                     author_id=author_id)
+            for post_id in post_ids
+        ]
+        if len(batch) >= settings.FEED_FANOUT_BATCH_SIZE:
+            FeedItem.objects.bulk_create(batch, ignore_conflicts=True)
+            written += len(batch)
+            batch = []
+    if batch:
+        FeedItem.objects.bulk_create(batch, ignore_conflicts=True)
+        written += len(batch)
+    return written
+
+
+@task('feeds.fanout_posts', batch=True)
+def fanout_posts(payloads):
+    """Задача рассылки новых постов подписчикам. payloads - пары
+    (автор, id постов) всех задач пачки: посты одного автора
+    рассылаются вместе. Посты автора, ставшего популярным, пока
+    задача ждала в очереди, не рассылаются."""
+    post_ids = defaultdict(list)
+    for author_id, ids in payloads:
+        post_ids[author_id] += ids
+    followers = dict(User.objects.filter(id__in=post_ids).values_list(
+        'id', 'followers_count'))
+    for author_id, ids in post_ids.items():
+        if is_pushed(followers.get(author_id, 0)):
+            write_feed_items(author_id, ids)
+
+
+@task('feeds.backfill')
+def backfill_feed(author_id, follower_ids=None):
+    """Задача записывает последние FEED_BACKFILL_POSTS постов автора
+    в ленты подписчиков: новому подписчику или всем, когда автор
+    перестал быть популярным и его посты снова рассылаются."""
+    post_ids = list(Post.objects.filter(user_id=author_id).order_by(
+        '-id').values_list('id', flat=True)[:settings.FEED_BACKFILL_POSTS])
+    if post_ids:
+        write_feed_items(author_id, post_ids, follower_ids)
+
+
+@task('feeds.remove')
+def remove_feed_items(user_id, author_id):
+    """Задача удаляет посты автора из ленты отписавшегося читателя."""
+    FeedItem.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def enqueue_fanout(author_id, post_ids):
+    """Функция ставит рассылку новых постов в очередь, если у автора
+    есть подписчики и он не популярен. Постов популярного автора
+    лента читает при запросе."""
+    followers_count = User.objects.filter(id=author_id).values_list(
+        'followers_count', flat=True).first()
+    if followers_count and is_pushed(followers_count):
+        enqueue(fanout_posts, author_id, list(post_ids))
+
+
+def follow(user, author_id):
+    """Функция подписывает user на автора. Возвращает False, если
+    подписка уже есть. Посты автора с небольшим числом подписчиков
+    дописываются в ленту нового подписчика фоновой задачей."""
+    try:
+        with transaction.atomic():
+            Follow.objects.create(user=user, author_id=author_id)
+            User.objects.change_followers_count(author_id, 1)
+            followers_count = User.objects.filter(
+                id=author_id).values_list('followers_count', flat=True)[0]
+            if is_pushed(followers_count):
+                enqueue(backfill_feed, author_id, [user.id])
+    except IntegrityError:
+        return False
+    return True
+
+
+def unfollow(user, author_id):
+    """Функция отменяет подписку. Возвращает False, если подписки
+    не было. Посты автора удаляются из ленты читателя фоновой задачей.
+    Если автор перестал быть популярным, его последние посты
+    рассылаются подписчикам: пока он был популярным, их читали при
+    запросе."""
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(
+            user=user, author_id=author_id).delete()
+        if not deleted:
+            return False
+        User.objects.change_followers_count(author_id, -1)
+        followers_count = User.objects.filter(id=author_id).values_list(
+            'followers_count', flat=True)[0]
+        enqueue(remove_feed_items, user.id, author_id)
+        if followers_count == settings.FEED_FANOUT_THRESHOLD - 1:
+            enqueue(backfill_feed, author_id)
+    return True
+
+
+def _range(queryset, key, position, forward, limit):
+    if position is not None:
+        queryset = queryset.filter(
+            **{f'{key}__lt' if forward else f'{key}__gt': position})
+    ordering = f'-{key}' if forward else key
+    return list(queryset.order_by(ordering).values_list(
+        key, flat=True)[:limit])
+
+
+def feed_post_ids(user_id, position, forward, limit):
+    """Функция возвращает до limit id постов ленты подписок user_id
+    после позиции курсора в порядке запроса KeysetPaginator: слияние
+    строк FeedItem читателя и постов популярных авторов. Каждый
+    источник читает не больше limit строк из своего индекса."""
+    follows = list(Follow.objects.filter(user_id=user_id).values_list(
+        'author_id', 'author__followers_count'))
+    pulled = [
+        author_id for author_id, followers_count in follows
+        if not is_pushed(followers_count)]
+    sources = [
+        _range(Post.objects.filter(user_id=author_id), 'id',
+               position, forward, limit)
+        for author_id in pulled
+    ]
+    if len(pulled) < len(follows):
+        sources.append(_range(
+            FeedItem.objects.filter(user_id=user_id), 'post_id',
+            position, forward, limit))
+    post_ids = []
+    # Пост автора, ставшего популярным, может быть и в FeedItem.
+    for post_id in heapq.merge(*sources, reverse=forward):
+        if post_ids and post_ids[-1] == post_id:
+            continue
+        post_ids.append(post_id)
+        if len(post_ids) == limit:
+            break
+    return post_ids
+
+
+class FollowFeedPaginator(KeysetPaginator):
+    """Класс выдает страницы ленты подписок читателя от новых постов
+    к старым. Курсор - id поста, как у остальных списков."""
+
+    def __init__(self, object_list, user_id, per_page):
+        super().__init__(object_list, per_page)
+        self.user_id = user_id
+
+    def valid_position(self, position):
+        return type(position) is int
+
+    def _page_request(self, cursor):
+        forward, position = self.decode_position(cursor)
+        return forward, position, self.page_posts(position, forward)
+
+    def page_posts(self, position, forward):
+        post_ids = feed_post_ids(
+            self.user_id, position, forward, self.per_page + 1)
+        posts = self.object_list.in_bulk(post_ids)
+        return [posts[post_id] for post_id in post_ids if post_id in posts]
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from posts_app.replicas import current_replica
+
+from .cache import author_scope, get_cache, get_versions, recently_changed
+
+# Шаблон карточки: имя объекта в контексте шаблона и атрибут с id
+# автора. Карточка зависит только от данных автора и его постов,
+# поэтому ее версия - версия области кэша автора: ее сбрасывают
+# сигналы сохранения и удаления Post и User и массовые операции.
+CARDS = {
+    'usercard.html': ('user', 'id'),
+    'postcard.html': ('post', 'user_id'),
+}
+
+
+def fragment_key(template_name, pk, version, extra):
+    options = ','.join(f'{name}={extra[name]}' for name in sorted(extra))
+    return f'posts:fragment:{template_name}:{pk}:{version}:{options}'
+
+
+def render_cards(template_name, objects, **extra):
+    """Функция возвращает HTML карточек для objects. Карточки берутся
+    из кэша одним get_many по ключу из id объекта и версии области
+    автора; недостающие рендерятся и сохраняются одним set_many.
+    extra - дополнительные переменные шаблона, они входят в ключ."""
+    objects = list(objects)
+    if not objects:
+        return []
+    name, author_attr = CARDS[template_name]
+    scopes = [author_scope(getattr(obj, author_attr)) for obj in objects]
+    versions = get_versions(set(scopes))
+    keys = [
+        fragment_key(template_name, obj.pk, versions[scope], extra)
+        for obj, scope in zip(objects, scopes)
+    ]
+    cache = get_cache()
+    found = cache.get_many(keys)
+    template = get_template(template_name)
+    rendered = {}
+    cards = []
+    for key, obj in zip(keys, objects):
+        html = found.get(key)
+        if html is None:
+            html = rendered[key] = template.render({name: obj, **extra})
+        cards.append(mark_safe(html))
+    # Объекты, прочитанные из реплики вскоре после изменения, могут
+    # быть устаревшими: такие карточки не кэшируются.
+    if rendered and not (current_replica() and recently_changed(versions)):
+        cache.set_many(rendered, settings.FRAGMENT_CACHE_TIMEOUT)
+    return cards
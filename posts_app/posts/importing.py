@@ -0,0 +1,95 @@
+import csv
+import json
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from .models import Post
+
+User = get_user_model()
+
+FORMATS = ('csv', 'jsonl')
+REQUIRED_FIELDS = ('email', 'title', 'body')
+TITLE_LENGTH = Post._meta.get_field('title').max_length
+
+
+class ImportDataError(ValueError):
+    """Ошибка во входных данных: номер строки и описание."""
+
+
+def read_rows(stream, data_format):
+    """Функция построчно читает посты из CSV (с заголовком) или JSONL.
+    У каждой строки есть email, title, body и необязательное name -
+    имя автора для нового пользователя. Файл не читается в память
+    целиком."""
+    if data_format == 'csv':
+        records = csv.DictReader(stream)
+    else:
+        records = (line for line in stream if line.strip())
+    for number, record in enumerate(records, start=1):
+        if data_format == 'jsonl':
+            try:
+                record = json.loads(record)
+            except json.JSONDecodeError as error:
+                raise ImportDataError(f'Строка {number}: {error}')
+        missing = [
+            field for field in REQUIRED_FIELDS if not record.get(field)]
+        if missing:
+            raise ImportDataError(
+                f'Строка {number}: нет полей {", ".join(missing)}')
+        if len(record['title']) > TITLE_LENGTH:
+            raise ImportDataError(
+                f'Строка {number}: заголовок длиннее {TITLE_LENGTH} '
+                f'символов')
+        email = User.objects.normalize_email(record['email'])
+        yield {
+            'email': email,
+            'name': record.get('name') or email.split('@')[0],
+            'title': record['title'],
+            'body': record['body'],
+        }
+
+
+def chunked(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def fixture_password(password=None, password_hash=None):
+    """Функция возвращает хэш пароля для новых пользователей импорта.
+    Пароль хэшируется один раз на весь импорт, а не для каждого
+    пользователя: полный PBKDF2 на каждую строку занимает больше
+    времени, чем сама загрузка. Без пароля пользователи получают
+    непригодный для входа пароль."""
+    if password_hash:
+        return password_hash
+    if password:
+        return make_password(password)
+    return None
+
+
+def import_chunk(rows, password_hash=None, batch_size=1000):
+    """Функция загружает одну пачку строк в одной транзакции: создает
+    недостающих авторов (уже существующие email пропускаются, поэтому
+    пачки можно загружать параллельно) и посты через bulk_create.
+    Возвращает число постов и id их авторов."""
+    authors = {}
+    for row in rows:
+        authors.setdefault(row['email'], row['name'])
+    with transaction.atomic():
+        User.objects.bulk_create(
+            (User(email=email, name=name,
+                  password=password_hash or make_password(None))
+             for email, name in authors.items()),
+            batch_size=batch_size, ignore_conflicts=True)
+        user_ids = dict(User.objects.filter(
+            email__in=authors).values_list('email', 'id'))
+        Post.objects.bulk_create(
+            (Post(title=row['title'], body=row['body'],
+                  user_id=user_ids[row['email']])
+             for row in rows),
+            batch_size=batch_size)
+    return len(rows), set(user_ids.values())
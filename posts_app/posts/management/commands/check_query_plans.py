@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from posts.models import FeedItem, Follow, Post, Task
+from posts.pagination import CreatedKeysetPaginator, KeysetPaginator
+from posts.query_plans import explain, plan_problems
+from posts.search import get_search_backend
+
+User = get_user_model()
+
+# Значения параметров не важны: план зависит только от формы запроса.
+SAMPLE_ID = 1
+SAMPLE_TIME = timezone.now()
+
+
+def page_queries(name, queryset, paginator_class=KeysetPaginator,
+                 position=SAMPLE_ID):
+    """Запросы следующей и предыдущей страницы с курсором. Первая
+    страница отличается только отсутствием условия на позицию."""
+    paginator = paginator_class(queryset, settings.PAGE_NO)
+    return [
+        (f'{name} (вперед)', paginator.page_queryset(position, True)),
+        (f'{name} (назад)', paginator.page_queryset(position, False)),
+    ]
+
+
+def view_queries():
+    """Функция возвращает пары (название, queryset) с запросами,
+    которые выполняют страницы сайта и эндпойнты API."""
+    posts = Post.objects.all()
+    return [
+        *page_queries('index, /api/users/', User.objects.all()),
+        *page_queries(
+            'user_post_view',
+            Post.objects.with_author().filter(user_id=SAMPLE_ID)),
+        *page_queries(
+            '/api/users/<id>/posts/',
+            Post.objects.for_api().filter(user_id=SAMPLE_ID),
+            CreatedKeysetPaginator, [SAMPLE_TIME.isoformat(), SAMPLE_ID]),
+        *page_queries(
+            '/api/users/<id>/posts/?since=&until=',
+            Post.objects.for_api().filter(
+                user_id=SAMPLE_ID, created_at__gte=SAMPLE_TIME,
+                created_at__lt=SAMPLE_TIME),
+            CreatedKeysetPaginator, [SAMPLE_TIME.isoformat(), SAMPLE_ID]),
+        *page_queries('feed, /api/posts/', Post.objects.for_feed()),
+        ('/api/feed/ (подписки)',
+         Follow.objects.filter(user_id=SAMPLE_ID).values_list(
+             'author_id', 'author__followers_count')),
+        ('/api/feed/ (FeedItem)',
+         FeedItem.objects.filter(
+             user_id=SAMPLE_ID, post_id__lt=SAMPLE_ID).order_by(
+             '-post_id').values_list('post_id', flat=True)),
+        ('/api/feed/ (посты популярного автора)',
+         posts.filter(user_id=SAMPLE_ID, id__lt=SAMPLE_ID).order_by(
+             '-id').values_list('id', flat=True)),
+        ('follow, рассылка постов',
+         Follow.objects.filter(author_id=SAMPLE_ID).values_list(
+             'user_id', flat=True)),
+        ('post_delete',
+         Post.objects.with_author().filter(id=SAMPLE_ID)),
+        ('/api/posts/<id>/', Post.objects.for_api().filter(id=SAMPLE_ID)),
+        ('/api/posts/bulk/ (DELETE)',
+         posts.filter(id__in=[SAMPLE_ID]).values_list('id', 'user_id')),
+        ('post_search, admin',
+         get_search_backend(posts.db).filter(posts, ['sample'])),
+        ('rebuild_posts_count',
+         posts.filter(user_id=SAMPLE_ID).values('user_id')),
+        ('run_workers, захват задач',
+         Task.objects.filter(
+             status=Task.QUEUED, available_at__lte=SAMPLE_TIME).order_by(
+             'available_at', 'id').values_list('id', flat=True)),
+        ('/metrics, задержка очереди',
+         Task.objects.filter(
+             status=Task.QUEUED, available_at__lte=SAMPLE_TIME).order_by(
+             'available_at').values_list('available_at', flat=True)[:1]),
+        ('token auth',
+         Token.objects.select_related('user').filter(key='sample')),
+    ]
+
+
+class Command(BaseCommand):
+    """Команда выполняет EXPLAIN для запросов страниц и API и завершается
+    с ошибкой, если какой-то из них читает таблицу целиком или
+    сортирует строки без индекса. Запускается после изменения
+    запросов или индексов, в том числе в CI."""
+
+    help = 'Проверяет, что запросы страниц и API используют индексы'
+
+    def handle(self, *args, **options):
+        failed = []
+        for name, queryset in view_queries():
+            plan = explain(queryset)
+            problems = plan_problems(plan, connections[queryset.db].vendor)
+            if options['verbosity'] > 1:
+                self.stdout.write(name)
+                for line in plan:
+                    self.stdout.write(f'    {line}')
+            if problems:
+                failed.append(f'{name}: {"; ".join(problems)}')
+        if failed:
+            raise CommandError(
+                'Запросы без подходящего индекса:\n' + '\n'.join(failed))
+        self.stdout.write(self.style.SUCCESS('Все запросы используют индексы'))
@@ -0,0 +1,53 @@
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.exporting import FORMATS, export_chunks, export_queryset
+
+
+class Command(BaseCommand):
+    """Команда выгружает посты с email и именем автора в JSONL или CSV.
+    В отличие от dumpdata строки читаются из базы и пишутся в файл
+    кусками, поэтому память не растет с числом постов. Результат
+    можно загрузить обратно командой import_posts."""
+
+    help = 'Выгружает посты в JSONL или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для выгрузки, "-" - стандартный вывод. Для имени '
+                 'с расширением .gz выгрузка сжимается')
+        parser.add_argument(
+            '--format', choices=FORMATS, default='jsonl',
+            help='Формат выгрузки')
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжать выгрузку gzip')
+        parser.add_argument(
+            '--user', type=int, help='Выгрузить только посты автора с id')
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.STREAM_CHUNK_SIZE,
+            help='Сколько строк читать из базы и писать за раз')
+
+    def handle(self, *args, **options):
+        path = options['output']
+        compress = options['gzip'] or path.endswith('.gz')
+        chunks = export_chunks(
+            export_queryset(options['user']), options['format'],
+            compress, options['chunk_size'])
+        started = time.monotonic()
+        written = 0
+        output = sys.stdout.buffer if path == '-' else open(path, 'wb')
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+        if path != '-':
+            self.stdout.write(self.style.SUCCESS(
+                f'Выгружено {written} байт в {path} '
+                f'за {time.monotonic() - started:.1f} с'))
@@ -0,0 +1,131 @@
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+# Модели импортируются внутри функций: при запуске воркеров методом
+# spawn модуль загружается в новом процессе до django.setup().
+
+
+def setup_worker():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'posts_app.settings')
+    import django
+    django.setup()
+
+
+def import_chunk(rows, password_hash, batch_size):
+    from posts.importing import import_chunk
+    return import_chunk(rows, password_hash, batch_size)
+
+
+class Command(BaseCommand):
+    """Команда загружает посты и их авторов из CSV или JSONL. Файл
+    читается потоком, строки загружаются пачками через bulk_create,
+    пачки можно загружать в нескольких процессах. Новые пользователи
+    получают один общий хэш пароля, посчитанный один раз. После
+    загрузки пересчитываются счетчики постов и сбрасывается кэш
+    страниц."""
+
+    help = 'Загружает посты и пользователей из CSV или JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл с данными, "-" - стандартный ввод')
+        parser.add_argument(
+            '--format', choices=('csv', 'jsonl'),
+            help='Формат данных (по умолчанию по расширению файла)')
+        parser.add_argument(
+            '--chunk-size', type=int, default=10000,
+            help='Сколько строк загружать одной транзакцией')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько строк вставлять одним INSERT')
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Число процессов загрузки (для SQLite полезен только 1)')
+        parser.add_argument(
+            '--password',
+            help='Пароль новых пользователей, хэшируется один раз')
+        parser.add_argument(
+            '--password-hash',
+            help='Готовый хэш пароля новых пользователей')
+
+    def handle(self, *args, **options):
+        from django.contrib.auth import get_user_model
+        from posts.cache import (FEED_SCOPE, USERS_SCOPE, author_scope,
+                                 bump_versions)
+        from posts.importing import (FORMATS, ImportDataError,
+                                     fixture_password, read_rows)
+
+        path = options['path']
+        data_format = options['format'] or os.path.splitext(path)[1][1:]
+        if data_format not in FORMATS:
+            raise CommandError('Укажите формат: --format csv или jsonl')
+        password_hash = fixture_password(
+            options['password'], options['password_hash'])
+        stream = (sys.stdin if path == '-'
+                  else open(path, newline='', encoding='utf-8'))
+        self.started = self.reported = time.monotonic()
+        self.imported = 0
+        try:
+            user_ids = self.load(
+                read_rows(stream, data_format), password_hash, options)
+        except ImportDataError as error:
+            raise CommandError(
+                f'{error}. Загружено постов до ошибки: {self.imported}')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        get_user_model().objects.rebuild_posts_count()
+        bump_versions(
+            [USERS_SCOPE, FEED_SCOPE,
+             *(author_scope(user_id) for user_id in user_ids)])
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено постов: {self.imported} от {len(user_ids)} авторов '
+            f'за {elapsed:.1f} с ({self.imported / elapsed:.0f} строк/с)'))
+
+    def load(self, rows, password_hash, options):
+        from posts.importing import chunked
+
+        chunks = chunked(rows, options['chunk_size'])
+        user_ids = set()
+        if options['workers'] <= 1:
+            for chunk in chunks:
+                self.done(user_ids, import_chunk(
+                    chunk, password_hash, options['batch_size']))
+            return user_ids
+        # Соединения закрываются, чтобы процессы, созданные через fork,
+        # не унаследовали открытые соединения с базой.
+        connections.close_all()
+        pending = set()
+        with ProcessPoolExecutor(
+                options['workers'], initializer=setup_worker) as pool:
+            # В очереди не больше двух пачек на процесс: файл не
+            # читается в память целиком, даже если база не успевает.
+            for chunk in chunks:
+                if len(pending) >= options['workers'] * 2:
+                    finished, pending = wait(
+                        pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        self.done(user_ids, future.result())
+                pending.add(pool.submit(
+                    import_chunk, chunk, password_hash,
+                    options['batch_size']))
+            for future in wait(pending).done:
+                self.done(user_ids, future.result())
+        return user_ids
+
+    def done(self, user_ids, result):
+        count, chunk_user_ids = result
+        self.imported += count
+        user_ids |= chunk_user_ids
+        now = time.monotonic()
+        if now - self.reported >= 1:
+            self.reported = now
+            self.stdout.write(
+                f'Загружено постов: {self.imported} '
+                f'({self.imported / (now - self.started):.0f} строк/с)')
@@ -0,0 +1,97 @@
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+EXECUTORS = {'thread': ThreadPoolExecutor, 'process': ProcessPoolExecutor}
+
+# Модели импортируются внутри функций: при запуске воркеров методом
+# spawn модуль загружается в новом процессе до django.setup().
+
+
+def setup_worker():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'posts_app.settings')
+    import django
+    django.setup()
+
+
+def work(stop, burst):
+    from posts.tasks import Worker
+    try:
+        return Worker().run(stop, burst)
+    finally:
+        # Соединения воркеров пула не закрываются обработчиком
+        # request_finished.
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    """Команда запускает воркеры очереди фоновых задач (posts.tasks)
+    в пуле потоков или процессов. Воркеры завершаются по SIGTERM или
+    SIGINT, доделав текущую пачку задач; с --burst - когда готовых
+    задач не осталось."""
+
+    help = 'Запускает воркеры очереди фоновых задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int,
+            help='Число воркеров (по умолчанию TASK_WORKERS)')
+        parser.add_argument(
+            '--pool', choices=tuple(EXECUTORS),
+            help='Пул воркеров (по умолчанию TASK_WORKER_POOL)')
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Выполнить готовые задачи и завершиться')
+
+    def handle(self, *args, **options):
+        workers = options['workers'] or settings.TASK_WORKERS
+        pool = options['pool'] or settings.TASK_WORKER_POOL
+        if workers > 1 and pool == 'process':
+            # Событие менеджера передается в процессы пула через pickle.
+            with multiprocessing.Manager() as manager:
+                results = self.run(manager.Event(), pool, workers, options)
+        else:
+            results = self.run(threading.Event(), pool, workers, options)
+        totals = {
+            key: sum(result[key] for result in results)
+            for key in ('processed', 'retried', 'failed')
+        }
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено задач: {totals["processed"]}, '
+            f'отложено для повтора: {totals["retried"]}, '
+            f'с ошибкой: {totals["failed"]}'))
+
+    def run(self, stop, pool, workers, options):
+        signals = (signal.SIGTERM, signal.SIGINT)
+        previous = [
+            signal.signal(signum, lambda *args: stop.set())
+            for signum in signals
+        ]
+        try:
+            if workers == 1:
+                from posts.tasks import Worker
+                return [Worker().run(stop, options['burst'])]
+            return self.run_pool(stop, pool, workers, options)
+        finally:
+            for signum, handler in zip(signals, previous):
+                signal.signal(signum, handler)
+
+    def run_pool(self, stop, pool, workers, options):
+        extra = {}
+        if pool == 'process':
+            # Процессы, созданные через fork, не должны унаследовать
+            # открытые соединения с базой.
+            connections.close_all()
+            extra['initializer'] = setup_worker
+        with EXECUTORS[pool](workers, **extra) as executor:
+            futures = [
+                executor.submit(work, stop, options['burst'])
+                for _ in range(workers)
+            ]
+            return [future.result() for future in futures]
@@ -0,0 +1,31 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    """Команда копирует основную базу SQLite в файлы реплик. Нужна для
+    проверки чтения из реплик на локальной машине: у SQLite нет
+    репликации, поэтому реплика - это копия базы на момент запуска."""
+
+    help = 'Копирует основную базу SQLite в файлы реплик'
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError(
+                'Команда нужна только для SQLite: реплики PostgreSQL '
+                'получают данные через потоковую репликацию')
+        if not settings.REPLICA_DATABASES:
+            raise CommandError('Реплики не заданы: см. DB_REPLICAS')
+        primary.ensure_connection()
+        for alias in settings.REPLICA_DATABASES:
+            connections[alias].close()
+            target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(self.style.SUCCESS(f'Скопировано в {alias}'))
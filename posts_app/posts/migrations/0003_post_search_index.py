@@ -0,0 +1,83 @@
+from django.db import migrations
+
+# SQL полнотекстового индекса зафиксирован в миграции: изменения
+# posts.search не должны менять уже примененные миграции.
+SQLITE_TRIGGERS = (
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_ai
+        AFTER INSERT ON posts_post BEGIN
+            INSERT INTO posts_post_fts(rowid, title, body)
+            VALUES (new.id, new.title, new.body);
+        END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_ad
+        AFTER DELETE ON posts_post BEGIN
+            INSERT INTO posts_post_fts(posts_post_fts, rowid, title, body)
+            VALUES ('delete', old.id, old.title, old.body);
+        END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_au
+        AFTER UPDATE ON posts_post BEGIN
+            INSERT INTO posts_post_fts(posts_post_fts, rowid, title, body)
+            VALUES ('delete', old.id, old.title, old.body);
+            INSERT INTO posts_post_fts(rowid, title, body)
+            VALUES (new.id, new.title, new.body);
+        END""",
+)
+SQLITE_INSTALL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS posts_post_fts USING fts5(
+        title, body,
+        content='posts_post', content_rowid='id', tokenize='unicode61'
+    )""",
+    *SQLITE_TRIGGERS,
+    "INSERT INTO posts_post_fts(posts_post_fts) VALUES ('rebuild')",
+)
+SQLITE_UNINSTALL = (
+    'DROP TRIGGER IF EXISTS posts_post_fts_ai',
+    'DROP TRIGGER IF EXISTS posts_post_fts_ad',
+    'DROP TRIGGER IF EXISTS posts_post_fts_au',
+    'DROP TABLE IF EXISTS posts_post_fts',
+)
+PG_INSTALL = (
+    'CREATE INDEX IF NOT EXISTS posts_post_search_idx ON posts_post '
+    "USING GIN (to_tsvector('russian', title || ' ' || body))",
+)
+PG_UNINSTALL = ('DROP INDEX IF EXISTS posts_post_search_idx',)
+
+
+def sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        options = {row[0] for row in cursor.fetchall()}
+    return 'ENABLE_FTS5' in options
+
+
+def forwards(apps, schema_editor):
+    # Полнотекстовый индекс: таблица FTS5 с триггерами для SQLite или
+    # GIN-индекс по tsvector для PostgreSQL; для остальных БД его нет.
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite' and sqlite_has_fts5(connection):
+        statements = SQLITE_INSTALL
+    elif connection.vendor == 'postgresql':
+        statements = PG_INSTALL
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def backwards(apps, schema_editor):
+    statements = {
+        'sqlite': SQLITE_UNINSTALL,
+        'postgresql': PG_UNINSTALL,
+    }.get(schema_editor.connection.vendor, ())
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
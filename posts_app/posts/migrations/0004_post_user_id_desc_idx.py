@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Триггеры полнотекстового индекса из 0003_post_search_index,
+# зафиксированные в миграции.
+SQLITE_TRIGGERS = (
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_ai
+        AFTER INSERT ON posts_post BEGIN
+            INSERT INTO posts_post_fts(rowid, title, body)
+            VALUES (new.id, new.title, new.body);
+        END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_ad
+        AFTER DELETE ON posts_post BEGIN
+            INSERT INTO posts_post_fts(posts_post_fts, rowid, title, body)
+            VALUES ('delete', old.id, old.title, old.body);
+        END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_au
+        AFTER UPDATE ON posts_post BEGIN
+            INSERT INTO posts_post_fts(posts_post_fts, rowid, title, body)
+            VALUES ('delete', old.id, old.title, old.body);
+            INSERT INTO posts_post_fts(rowid, title, body)
+            VALUES (new.id, new.title, new.body);
+        END""",
+)
+
+
+def reinstall_search_index(apps, schema_editor):
+    # SQLite пересоздает таблицу posts_post при изменении поля user
+    # и удаляет триггеры полнотекстового индекса.
+    connection = schema_editor.connection
+    if (connection.vendor != 'sqlite' or 'posts_post_fts'
+            not in connection.introspection.table_names()):
+        return
+    for statement in SQLITE_TRIGGERS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0003_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='post',
+            options={'ordering': ('-id',)},
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='title',
+            field=models.CharField(max_length=60, verbose_name='Заголовок поста'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='posts', to=settings.AUTH_USER_MODEL, verbose_name='Автор поста'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['user', '-id'], name='post_user_id_desc_idx'),
+        ),
+        migrations.RunPython(
+            reinstall_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.utils.timezone
+
+
+# Триггеры полнотекстового индекса из 0003_post_search_index,
+# зафиксированные в миграции.
+SQLITE_TRIGGERS = (
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_ai
+        AFTER INSERT ON posts_post BEGIN
+            INSERT INTO posts_post_fts(rowid, title, body)
+            VALUES (new.id, new.title, new.body);
+        END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_ad
+        AFTER DELETE ON posts_post BEGIN
+            INSERT INTO posts_post_fts(posts_post_fts, rowid, title, body)
+            VALUES ('delete', old.id, old.title, old.body);
+        END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_au
+        AFTER UPDATE ON posts_post BEGIN
+            INSERT INTO posts_post_fts(posts_post_fts, rowid, title, body)
+            VALUES ('delete', old.id, old.title, old.body);
+            INSERT INTO posts_post_fts(rowid, title, body)
+            VALUES (new.id, new.title, new.body);
+        END""",
+)
+
+
+def reinstall_search_index(apps, schema_editor):
+    # SQLite пересоздает таблицу posts_post при добавлении полей
+    # и удаляет триггеры полнотекстового индекса.
+    connection = schema_editor.connection
+    if (connection.vendor != 'sqlite' or 'posts_post_fts'
+            not in connection.introspection.table_names()):
+        return
+    for statement in SQLITE_TRIGGERS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0004_post_user_id_desc_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Дата создания'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='post_user_created_desc_idx'),
+        ),
+        migrations.RunPython(
+            reinstall_search_index, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,32 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
 
 User = get_user_model()
 
 
+class PostQuerySet(models.QuerySet):
+    """Класс содержит заготовки запросов к постам: выбираются только
+    те столбцы, которые нужны карточкам и API, а автор подтягивается
+    тем же запросом."""
+
+    def with_author(self):
+        """Посты вместе с именем автора для карточек на HTML-страницах."""
+        return self.select_related('user').only(
+            'id', 'title', 'body', 'user__id', 'user__name')
+
+    def for_feed(self):
+        """Посты общей ленты: поля для API и карточки с именем автора."""
+        return self.select_related('user').only(
+            'id', 'title', 'body', 'user_id', 'created_at', 'updated_at',
+            'user__id', 'user__name')
+
+    def for_api(self):
+        """Посты без JOIN: сериализатору нужен только id автора."""
+        return self.only(
+            'id', 'title', 'body', 'user_id', 'created_at', 'updated_at')
+
+
 class Post(models.Model):
     """Класс Post создает БД SQL для хранения статей."""
 
@@ -19,10 +42,183 @@ class Post(models.Model):
         on_delete=models.CASCADE,
         related_name='posts',
         verbose_name='Автор поста',
+        db_index=False,
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True,
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
     )
 
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         ordering = ('-id',)
+        indexes = (
+            # Лента автора: WHERE user_id = ? ORDER BY id DESC.
+            # Индекс заменяет индекс внешнего ключа user_id.
+            models.Index(
+                fields=('user', '-id'), name='post_user_id_desc_idx'),
+            # Лента автора в API и выборки за период:
+            # WHERE user_id = ? AND created_at >= ?
+            # ORDER BY created_at DESC, id DESC.
+            models.Index(
+                fields=('user', '-created_at', '-id'),
+                name='post_user_created_desc_idx'),
+        )
 
     def __str__(self):
         return self.title[:25]
+
+
+class Follow(models.Model):
+    """Класс Follow хранит подписки: user читает посты author."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name='Подписчик',
+        db_index=False,
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='followers',
+        verbose_name='Автор',
+        db_index=False,
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата подписки',
+        auto_now_add=True,
+    )
+
+    class Meta:
+        verbose_name = 'Подписка'
+        verbose_name_plural = 'Подписки'
+        constraints = (
+            # Индекс (user, author): авторы, на которых подписан user.
+            models.UniqueConstraint(
+                fields=('user', 'author'), name='follow_unique'),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='follow_not_self'),
+        )
+        indexes = (
+            # Рассылка поста: подписчики автора.
+            models.Index(
+                fields=('author', 'user'), name='follow_author_user_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.author_id}'
+
+
+class FeedItem(models.Model):
+    """Класс FeedItem хранит ленту подписок, разосланную при записи:
+    строка на каждого подписчика и каждый пост автора с небольшим
+    числом подписчиков (posts.feeds)."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Читатель',
+        db_index=False,
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Пост',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+        db_index=False,
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Записи ленты подписок'
+        constraints = (
+            # Лента читателя: WHERE user_id = ? ORDER BY post_id DESC.
+            models.UniqueConstraint(
+                fields=('user', 'post'), name='feed_item_unique'),
+        )
+        indexes = (
+            # Отписка: удаление постов автора из ленты читателя.
+            models.Index(
+                fields=('user', 'author'), name='feed_item_user_author_idx'),
+        )
+
+
+class Task(models.Model):
+    """Класс Task хранит очередь фоновых задач (posts.tasks). Строка
+    задачи пишется в транзакции, которая ее поставила, и выполняется
+    воркером manage.py run_workers; выполненная задача удаляется."""
+
+    QUEUED = 'queued'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(
+        verbose_name='Задача',
+        max_length=100,
+    )
+    args = models.JSONField(
+        verbose_name='Аргументы',
+        default=list,
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED,
+    )
+    attempts = models.PositiveIntegerField(
+        verbose_name='Попыток',
+        default=0,
+    )
+    # Время, с которого задачу можно взять: при захвате воркером
+    # сдвигается на TASK_LOCK_TIMEOUT, при ошибке - на время до повтора.
+    available_at = models.DateTimeField(
+        verbose_name='Доступна с',
+        default=timezone.now,
+    )
+    claimed_by = models.CharField(
+        verbose_name='Воркер',
+        max_length=32,
+        blank=True,
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата постановки',
+        auto_now_add=True,
+    )
+    error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = (
+            # Захват задач воркером и задержка очереди:
+            # WHERE status = ? AND available_at <= ?
+            # ORDER BY available_at, id.
+            models.Index(
+                fields=('status', 'available_at', 'id'),
+                name='task_status_available_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.name} #{self.id}'
@@ -0,0 +1,215 @@
+import base64
+import binascii
+import json
+import math
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+# Позиция курсора попадает в SQL-запрос: целое вне диапазона BIGINT
+# драйвер базы не может передать (OverflowError).
+MAX_POSITION = 2 ** 63 - 1
+
+
+def encode_cursor(direction, position):
+    """Функция упаковывает направление и позицию курсора
+    в непрозрачный токен для передачи в адресе страницы."""
+    raw = json.dumps([direction, position], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _valid_value(value):
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, int):
+        return -MAX_POSITION - 1 <= value <= MAX_POSITION
+    if isinstance(value, float):
+        return math.isfinite(value)
+    return isinstance(value, str)
+
+
+def decode_cursor(token):
+    """Функция распаковывает токен курсора. Для пустого или
+    поврежденного токена, а также для позиции, которую нельзя передать
+    в запрос (целое вне диапазона BIGINT, бесконечность, вложенные
+    структуры), возвращает None. Позиция - число, строка или пара
+    таких значений."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, position = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if direction not in (NEXT, PREVIOUS):
+        return None
+    values = position if isinstance(position, list) else [position]
+    if len(values) > 2 or not all(map(_valid_value, values)):
+        return None
+    return direction, position
+
+
+class KeysetPage:
+    """Класс описывает страницу, полученную курсорной пагинацией.
+    Повторяет ту часть интерфейса Page, которой пользуются шаблоны."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Класс разбивает queryset на страницы по уникальному ключу
+    (по умолчанию '-id') без COUNT(*) и OFFSET: каждая страница
+    выбирается условием на ключ и LIMIT, поэтому глубокая страница
+    стоит столько же, сколько первая."""
+
+    def __init__(self, object_list, per_page, ordering='-id'):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.descending = ordering.startswith('-')
+        self.key = ordering.lstrip('-')
+
+    def _order(self, forward):
+        if forward == self.descending:
+            return f'-{self.key}'
+        return self.key
+
+    def _bound(self, forward):
+        if forward == self.descending:
+            return f'{self.key}__lt'
+        return f'{self.key}__gt'
+
+    def _position(self, obj):
+        return getattr(obj, self.key)
+
+    def get_page(self, cursor=None):
+        """Метод возвращает страницу для токена курсора.
+        Некорректный токен приводит к первой странице."""
+        forward, position, queryset = self._page_request(cursor)
+        page = self._page_from_rows(list(queryset), forward, position)
+        return page if page is not None else self.get_page()
+
+    async def aget_page(self, cursor=None):
+        """Асинхронный вариант get_page для async-представлений."""
+        forward, position, queryset = self._page_request(cursor)
+        rows = [obj async for obj in queryset.aiterator()]
+        page = self._page_from_rows(rows, forward, position)
+        return page if page is not None else await self.aget_page()
+
+    def valid_position(self, position):
+        """Метод проверяет позицию из курсора. Позиция неподходящего
+        типа для ключа по умолчанию отсекается исключением запроса."""
+        return True
+
+    def decode_position(self, cursor):
+        """Метод возвращает направление (True - вперед) и позицию
+        курсора. Для неверного курсора - первая страница (True, None)."""
+        parsed = decode_cursor(cursor)
+        if parsed is None:
+            return True, None
+        direction, position = parsed
+        if not self.valid_position(position):
+            return True, None
+        return direction == NEXT, position
+
+    def _page_request(self, cursor):
+        forward, position = self.decode_position(cursor)
+        try:
+            return forward, position, self.page_queryset(position, forward)
+        except (TypeError, ValueError, ValidationError):
+            return True, None, self.page_queryset()
+
+    def _page_from_rows(self, rows, forward, position):
+        """Метод собирает страницу из строк запроса. Возвращает None,
+        если предыдущей страницы не оказалось и нужна первая."""
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if forward:
+            has_next, has_previous = has_more, position is not None
+        else:
+            if not rows:
+                return None
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        return self._build_page(rows, has_next, has_previous)
+
+    def page_queryset(self, position=None, forward=True):
+        """Метод возвращает запрос одной страницы (на строку больше
+        per_page) после позиции position в направлении forward."""
+        queryset = self.object_list
+        if position is not None:
+            queryset = queryset.filter(**{self._bound(forward): position})
+        queryset = queryset.order_by(self._order(forward))
+        return queryset[:self.per_page + 1]
+
+    def _build_page(self, rows, has_next, has_previous):
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor(NEXT, self._position(rows[-1]))
+        if rows and has_previous:
+            previous_cursor = encode_cursor(
+                PREVIOUS, self._position(rows[0]))
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+class CreatedKeysetPaginator(KeysetPaginator):
+    """Класс разбивает посты на страницы от новых к старым по паре
+    (created_at, id). Индекс (user, created_at, id) отдает такую
+    страницу чтением диапазона без сортировки и с условиями на время
+    создания (since/until). Позиция курсора - пара (дата в ISO 8601,
+    id) последнего поста страницы."""
+
+    def __init__(self, object_list, per_page):
+        super().__init__(object_list, per_page, '-created_at')
+
+    def _position(self, obj):
+        return [obj.created_at.isoformat(), obj.id]
+
+    def valid_position(self, position):
+        if not (isinstance(position, list) and len(position) == 2):
+            return False
+        created_at, post_id = position
+        try:
+            parsed = parse_datetime(created_at)
+        except (TypeError, ValueError):
+            return False
+        return parsed is not None and type(post_id) is int
+
+    def page_queryset(self, position=None, forward=True):
+        queryset = self.object_list
+        if position is not None:
+            created_at, post_id = position
+            # (created_at, id) < позиции: условие created_at <= даты
+            # задает начало диапазона в индексе.
+            suffix = 'lt' if forward else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'created_at__{suffix}': created_at})
+                | Q(**{f'id__{suffix}': post_id}),
+                **{f'created_at__{suffix}e': created_at})
+        ordering = ('-created_at', '-id') if forward else (
+            'created_at', 'id')
+        return queryset.order_by(*ordering)[:self.per_page + 1]
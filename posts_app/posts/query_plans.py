@@ -0,0 +1,37 @@
+import re
+
+from django.db import connections, transaction
+
+SQLITE_FULL_SCAN = re.compile(r'\bSCAN (?!.*\bUSING\b)(?!.*VIRTUAL TABLE)')
+SQLITE_SORT = re.compile(r'\bUSE TEMP B-TREE\b')
+PG_FULL_SCAN = re.compile(r'\bSeq Scan on\b')
+PG_SORT = re.compile(r'(^|->)\s*Sort\b')
+
+
+def explain(queryset):
+    """Функция возвращает строки плана выполнения запроса queryset.
+    Для PostgreSQL последовательное чтение отключается: на маленькой
+    таблице планировщик выбирает его даже при подходящем индексе,
+    а с enable_seqscan = off Seq Scan остается только без индекса."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.explain().splitlines()
+    with transaction.atomic(using=queryset.db):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain().splitlines()
+
+
+def plan_problems(plan, vendor):
+    """Функция возвращает строки плана, в которых таблица читается
+    целиком или результат сортируется без индекса."""
+    if vendor == 'postgresql':
+        patterns = (PG_FULL_SCAN, PG_SORT)
+    elif vendor == 'sqlite':
+        patterns = (SQLITE_FULL_SCAN, SQLITE_SORT)
+    else:
+        return []
+    return [
+        line.strip() for line in plan
+        if any(pattern.search(line) for pattern in patterns)
+    ]
@@ -0,0 +1,178 @@
+import re
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .pagination import KeysetPage, KeysetPaginator
+
+# Полнотекстовый индекс создает миграция 0003_post_search_index: таблица
+# FTS5 с триггерами для SQLite или GIN-индекс по PG_VECTOR для PostgreSQL.
+# Миграция, после которой SQLite пересоздает таблицу posts_post, должна
+# заново создать триггеры (см. 0004_post_user_id_desc_idx).
+FTS_TABLE = 'posts_post_fts'
+PG_CONFIG = 'russian'
+PG_VECTOR = f"to_tsvector('{PG_CONFIG}', title || ' ' || body)"
+
+
+def split_terms(query):
+    """Функция выделяет из поисковой строки слова. Операторы языка
+    запросов FTS5 и tsquery отбрасываются, поэтому ввод пользователя
+    не может сломать запрос."""
+    return re.findall(r'\w+', query or '')
+
+
+class SearchBackend:
+    """Базовый класс поиска: LIKE-поиск по заголовку и тексту.
+    Используется, если у БД нет полнотекстового индекса."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def filter(self, queryset, terms):
+        """Метод оставляет в queryset посты, содержащие все слова."""
+        for term in terms:
+            queryset = queryset.filter(
+                Q(title__icontains=term) | Q(body__icontains=term))
+        return queryset
+
+    def rank(self, queryset, terms, position, forward, limit):
+        """Метод возвращает список пар (id, score) найденных постов,
+        упорядоченных по (score, -id) для forward=True и в обратном
+        порядке иначе. position - пара (score, id), после которой
+        начинается выборка. Меньший score означает лучшее совпадение."""
+        queryset = self.filter(queryset, terms)
+        if position is not None:
+            bound = 'id__lt' if forward else 'id__gt'
+            queryset = queryset.filter(**{bound: position[1]})
+        ordering = '-id' if forward else 'id'
+        ids = queryset.order_by(ordering).values_list('id', flat=True)
+        return [(post_id, 0.0) for post_id in ids[:limit]]
+
+
+class RawRankBackend(SearchBackend):
+    """Базовый класс поиска по индексу БД. Наследник задает запрос
+    ranked_sql, который отдает столбцы id и score найденных постов."""
+
+    ranked_sql = None
+    ids_sql = None
+
+    def expression(self, terms):
+        raise NotImplementedError
+
+    def filter(self, queryset, terms):
+        return queryset.filter(
+            id__in=RawSQL(self.ids_sql, (self.expression(terms),)))
+
+    def rank(self, queryset, terms, position, forward, limit):
+        params = [self.expression(terms)]
+        sql = f'SELECT id, score FROM ({self.ranked_sql}) ranked'
+        if position is not None:
+            score, post_id = position
+            if forward:
+                sql += ' WHERE score > %s OR (score = %s AND id < %s)'
+            else:
+                sql += ' WHERE score < %s OR (score = %s AND id > %s)'
+            params += [score, score, post_id]
+        if forward:
+            sql += ' ORDER BY score, id DESC LIMIT %s'
+        else:
+            sql += ' ORDER BY score DESC, id LIMIT %s'
+        params.append(limit)
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+
+class SQLiteSearchBackend(RawRankBackend):
+    """Поиск по виртуальной таблице FTS5 с ранжированием bm25."""
+
+    ranked_sql = (
+        f'SELECT rowid AS id, bm25({FTS_TABLE}) AS score '
+        f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+    )
+    ids_sql = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+
+    def expression(self, terms):
+        return ' '.join(f'"{term}"*' for term in terms)
+
+
+class PostgresSearchBackend(RawRankBackend):
+    """Поиск по GIN-индексу tsvector с ранжированием ts_rank."""
+
+    # ts_rank возвращает real. Значение из курсора приходит как double
+    # precision, и без приведения сравнение score = %s для равных рангов
+    # не срабатывает: страницы повторяли бы или пропускали посты.
+    ranked_sql = (
+        f'SELECT id, (-ts_rank({PG_VECTOR}, query))::float8 AS score '
+        f"FROM posts_post, to_tsquery('{PG_CONFIG}', %s) query "
+        f'WHERE {PG_VECTOR} @@ query'
+    )
+    ids_sql = (
+        f'SELECT id FROM posts_post '
+        f"WHERE {PG_VECTOR} @@ to_tsquery('{PG_CONFIG}', %s)"
+    )
+
+    def expression(self, terms):
+        return ' & '.join(f'{term}:*' for term in terms)
+
+
+_sqlite_index_cache = {}
+
+
+def get_search_backend(using='default'):
+    """Функция выбирает класс поиска по типу БД."""
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend(connection)
+    if connection.vendor == 'sqlite':
+        key = connection.settings_dict['NAME']
+        if key not in _sqlite_index_cache:
+            _sqlite_index_cache[key] = (
+                FTS_TABLE in connection.introspection.table_names())
+        if _sqlite_index_cache[key]:
+            return SQLiteSearchBackend(connection)
+    return SearchBackend(connection)
+
+
+class SearchPaginator(KeysetPaginator):
+    """Класс выдает найденные посты страницами в порядке релевантности.
+    Позиция курсора - пара (score, id) последнего поста страницы."""
+
+    def __init__(self, object_list, query, per_page):
+        super().__init__(object_list, per_page)
+        self.terms = split_terms(query)
+        self.backend = get_search_backend(object_list.db)
+
+    def _position(self, obj):
+        return [obj.search_rank, obj.id]
+
+    def get_page(self, cursor=None):
+        if not self.terms:
+            return KeysetPage([])
+        forward, position = self.decode_position(cursor)
+        ranked = self.backend.rank(
+            self.object_list, self.terms, position, forward,
+            self.per_page + 1)
+        has_more = len(ranked) > self.per_page
+        ranked = ranked[:self.per_page]
+        if not forward:
+            if not ranked:
+                return self.get_page()
+            ranked.reverse()
+        posts = self.object_list.in_bulk([post_id for post_id, _ in ranked])
+        rows = []
+        for post_id, score in ranked:
+            if post_id in posts:
+                posts[post_id].search_rank = score
+                rows.append(posts[post_id])
+        if forward:
+            return self._build_page(rows, has_more, position is not None)
+        return self._build_page(rows, True, has_more)
+
+    def valid_position(self, position):
+        return (
+            isinstance(position, list)
+            and len(position) == 2
+            and all(isinstance(value, (int, float)) for value in position)
+        )
@@ -0,0 +1,90 @@
+import contextvars
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import (FEED_SCOPE, USERS_SCOPE, author_scope,
+                    invalidate_on_commit, post_scopes)
+from .feeds import enqueue_fanout
+from .models import Post
+from .timeline import timeline
+
+User = get_user_model()
+
+USER_PUBLIC_FIELDS = {'name', 'email'}
+
+_bulk_delete = contextvars.ContextVar('bulk_post_delete', default=False)
+
+
+@contextmanager
+def bulk_post_delete():
+    """Контекстный менеджер для массового удаления постов: обработчики
+    post_delete внутри блока не сбрасывают кэш и не помечают посты
+    в общей ленте. Вызывающий код делает это один раз на весь набор."""
+    token = _bulk_delete.set(True)
+    try:
+        yield
+    finally:
+        _bulk_delete.reset(token)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    """Создание, изменение и удаление поста сбрасывает кэш ленты
+    автора и списка пользователей."""
+    if _bulk_delete.get():
+        return
+    invalidate_on_commit(post_scopes(instance.user_id))
+
+
+@receiver(post_save, sender=Post)
+def push_to_timeline(sender, instance, created, **kwargs):
+    """Новый пост добавляется в общую ленту, а изменение поста
+    сбрасывает ее."""
+    if created:
+        timeline.push_on_commit([instance])
+    else:
+        invalidate_on_commit([FEED_SCOPE])
+
+
+@receiver(post_save, sender=Post)
+def fanout_new_post(sender, instance, created, **kwargs):
+    """Рассылка нового поста в ленты подписчиков автора ставится
+    в очередь в транзакции, которая создала пост."""
+    if created:
+        enqueue_fanout(instance.user_id, [instance.id])
+
+
+@receiver(post_delete, sender=Post)
+def delete_from_timeline(sender, instance, **kwargs):
+    """Удаленный пост помечается в общей ленте."""
+    if _bulk_delete.get():
+        return
+    timeline.delete_on_commit([instance.id])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_pages(sender, instance, update_fields=None, **kwargs):
+    """Изменение данных пользователя, которые видны на страницах,
+    сбрасывает кэш списка пользователей, его ленты и общей ленты.
+    Сохранение только служебных полей (например, last_login при
+    входе) кэш не трогает."""
+    if update_fields and not USER_PUBLIC_FIELDS & set(update_fields):
+        return
+    invalidate_on_commit(
+        [USERS_SCOPE, FEED_SCOPE, author_scope(instance.id)])
+
+
+@receiver(pre_delete, sender=User)
+def release_follows(sender, instance, **kwargs):
+    """Удаляемый пользователь перестает быть подписчиком: счетчики
+    подписчиков его авторов уменьшаются до каскадного удаления
+    подписок."""
+    User.objects.filter(followers__user=instance).update(
+        followers_count=Greatest(F('followers_count') - 1, 0))
@@ -0,0 +1,189 @@
+import logging
+import traceback
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger('posts_app.tasks')
+
+# Фоновые задачи выполняются после фиксации транзакции, которая их
+# поставила: строка Task пишется в той же транзакции, поэтому воркер
+# не увидит задачу раньше данных, а при откате задача пропадает вместе
+# с ними. Воркеры (manage.py run_workers) захватывают пачку готовых
+# задач, сдвигая available_at на TASK_LOCK_TIMEOUT: задачу упавшего
+# воркера возьмет другой воркер. Задачи одного типа из пачки
+# выполняются вместе. Задача может выполниться повторно (ошибка
+# в пачке, истекший захват), поэтому должна быть идемпотентной.
+
+TASKS = {}
+
+
+def task(name, batch=False):
+    """Декоратор регистрирует функцию как фоновую задачу name. Обычная
+    задача вызывается с аргументами из enqueue; задача с batch=True
+    получает список аргументов всех задач пачки и выполняет их одним
+    вызовом."""
+    def decorator(function):
+        TASKS[name] = (function, batch)
+        function.task_name = name
+        return function
+    return decorator
+
+
+def run_tasks(name, args_list):
+    function, batch = TASKS[name]
+    if batch:
+        function(args_list)
+        return
+    for args in args_list:
+        function(*args)
+
+
+def _run_eager(name, args):
+    try:
+        run_tasks(name, [args])
+    except Exception:
+        logger.exception('Задача %s завершилась с ошибкой', name)
+
+
+def enqueue(function, *args):
+    """Функция ставит задачу function (зарегистрированную декоратором
+    task) с аргументами args в очередь. Аргументы хранятся в JSON.
+    При settings.TASK_QUEUE_EAGER задача выполняется в этом процессе
+    сразу после фиксации транзакции, без воркеров и повторов."""
+    name = function.task_name
+    if settings.TASK_QUEUE_EAGER:
+        transaction.on_commit(lambda: _run_eager(name, list(args)))
+        return
+    Task.objects.create(name=name, args=list(args))
+
+
+def retry_delay(attempts):
+    """Пауза перед повтором задачи после attempts неудачных попыток."""
+    return settings.TASK_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+class Worker:
+    """Класс выполняет задачи очереди: захватывает до batch_size
+    готовых задач, выполняет их по типам и удаляет выполненные.
+    Задачи, завершившиеся ошибкой, откладываются на retry_delay, а
+    после settings.TASK_MAX_ATTEMPTS попыток получают статус failed."""
+
+    def __init__(self, batch_size=None):
+        self.token = uuid.uuid4().hex
+        self.batch_size = batch_size or settings.TASK_BATCH_SIZE
+        self.processed = self.retried = self.failed = 0
+
+    def claim(self):
+        now = timezone.now()
+        ready = Task.objects.filter(status=Task.QUEUED, available_at__lte=now)
+        ids = list(ready.order_by('available_at', 'id').values_list(
+            'id', flat=True)[:self.batch_size])
+        if not ids:
+            return []
+        # Задачу, которую успел захватить другой воркер, UPDATE
+        # не изменит: у нее уже сдвинут available_at.
+        ready.filter(id__in=ids).update(
+            claimed_by=self.token,
+            available_at=now + timedelta(seconds=settings.TASK_LOCK_TIMEOUT))
+        return list(Task.objects.filter(
+            id__in=ids, claimed_by=self.token).order_by('id'))
+
+    def process(self, tasks):
+        groups = defaultdict(list)
+        for claimed in tasks:
+            groups[claimed.name].append(claimed)
+        for name, group in groups.items():
+            try:
+                run_tasks(name, [claimed.args for claimed in group])
+            except Exception:
+                logger.exception('Задача %s завершилась с ошибкой', name)
+                self.reschedule(group, traceback.format_exc())
+                continue
+            Task.objects.filter(
+                id__in=[claimed.id for claimed in group],
+                claimed_by=self.token).delete()
+            self.processed += len(group)
+
+    def reschedule(self, group, error):
+        now = timezone.now()
+        for claimed in group:
+            claimed.attempts += 1
+            claimed.claimed_by = ''
+            claimed.error = error
+            if claimed.attempts >= settings.TASK_MAX_ATTEMPTS:
+                claimed.status = Task.FAILED
+                self.failed += 1
+            else:
+                claimed.available_at = now + timedelta(
+                    seconds=retry_delay(claimed.attempts))
+                self.retried += 1
+        Task.objects.bulk_update(
+            group,
+            ('attempts', 'claimed_by', 'error', 'status', 'available_at'))
+
+    def run_once(self):
+        """Метод выполняет одну пачку задач и возвращает ее размер."""
+        # Как после запроса, закрываются устаревшие и сломанные
+        # соединения; внутри внешней транзакции (тесты) - нельзя.
+        if not connection.in_atomic_block:
+            close_old_connections()
+        tasks = self.claim()
+        if tasks:
+            self.process(tasks)
+        return len(tasks)
+
+    def run(self, stop, burst=False):
+        """Метод выполняет задачи, пока не установлено событие stop.
+        При burst=True возвращается, когда готовых задач не осталось."""
+        while not stop.is_set():
+            if self.run_once():
+                continue
+            if burst:
+                break
+            stop.wait(settings.TASK_POLL_INTERVAL)
+        return self.stats()
+
+    def stats(self):
+        return {
+            'processed': self.processed,
+            'retried': self.retried,
+            'failed': self.failed,
+        }
+
+
+def queue_stats():
+    """Функция возвращает размер очереди (задачи в очереди и с ошибкой)
+    и задержку: сколько секунд ждет самая старая готовая задача."""
+    now = timezone.now()
+    counts = dict(Task.objects.values_list('status').annotate(Count('id')))
+    oldest = Task.objects.filter(
+        status=Task.QUEUED, available_at__lte=now).order_by(
+        'available_at').values_list('available_at', flat=True).first()
+    return {
+        'queued': counts.get(Task.QUEUED, 0),
+        'failed': counts.get(Task.FAILED, 0),
+        'lag': (now - oldest).total_seconds() if oldest else 0.0,
+    }
+
+
+def task_metrics():
+    """Метрики очереди фоновых задач для /metrics. Считаются по таблице
+    задач, поэтому одинаковы во всех процессах."""
+    stats = queue_stats()
+    return [
+        ('posts_app_tasks_queued', 'gauge',
+         'Задач в очереди (включая выполняемые и отложенные)',
+         stats['queued']),
+        ('posts_app_tasks_failed', 'gauge',
+         'Задач, исчерпавших попытки', stats['failed']),
+        ('posts_app_tasks_lag_seconds', 'gauge',
+         'Сколько ждет самая старая готовая задача', stats['lag']),
+    ]
@@ -0,0 +1,21 @@
+from django import template
+
+from posts.fragments import render_cards as render_cards_html
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def cursor_url(context, cursor):
+    """Тег возвращает строку запроса текущей страницы,
+    в которой параметр cursor заменен на переданный токен."""
+    query = context['request'].GET.copy()
+    query['cursor'] = cursor
+    return f'?{query.urlencode()}'
+
+
+@register.simple_tag
+def render_cards(template_name, objects, **extra):
+    """Тег возвращает список HTML карточек objects из кэша фрагментов:
+    {% render_cards "postcard.html" page is_author=is_author as cards %}."""
+    return render_cards_html(template_name, objects, **extra)
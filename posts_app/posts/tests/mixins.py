@@ -0,0 +1,38 @@
+from urllib.parse import parse_qs, urlsplit
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountMixin:
+    """Класс-примесь для тестов: проверяет, что каждая страница
+    списка обходится одним и тем же числом SQL-запросов."""
+
+    def assertPageQueries(self, client, url, num, max_pages=5):
+        """Проходит по страницам url по курсору next и проверяет,
+        что каждая из них выполняет ровно num запросов. Кэш ответов
+        очищается перед каждой страницей."""
+        params = {}
+        for _ in range(max_pages):
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url, params)
+            self.assertEqual(
+                len(context), num,
+                f'{url} {params}: выполнено {len(context)} запросов '
+                f'вместо {num}:\n'
+                + '\n'.join(query['sql'] for query in context))
+            next_cursor = self.get_next_cursor(response)
+            if next_cursor is None:
+                break
+            params = {'cursor': next_cursor}
+
+    @staticmethod
+    def get_next_cursor(response):
+        if response.context is not None and 'page' in response.context:
+            return response.context['page'].next_cursor
+        next_url = response.data.get('next')
+        if next_url is None:
+            return None
+        return parse_qs(urlsplit(next_url).query)['cursor'][0]
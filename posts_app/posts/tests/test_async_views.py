@@ -0,0 +1,93 @@
+import asyncio
+from contextlib import ExitStack
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import Http404
+from django.test import AsyncRequestFactory, TestCase
+
+from posts import async_views
+from posts.models import Post
+
+User = get_user_model()
+
+
+def off_event_loop(method):
+    """Обертка метода кэша, которая падает при вызове в цикле
+    событий."""
+    def wrapper(*args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return method(*args, **kwargs)
+        raise AssertionError(f'{method.__name__} вызван в цикле событий')
+    return wrapper
+
+
+class AsyncViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_one = User.objects.create_user(
+            name='UserOne',
+            email='user_one@test.test',
+        )
+        cls.posts = Post.objects.bulk_create(
+            Post(title=f'Пост {number}', body='Текст', user=cls.user_one)
+            for number in range(15)
+        )
+        cls.factory = AsyncRequestFactory()
+
+    def setUp(self):
+        cache.clear()
+
+    def get_request(self, path, user=None, **params):
+        request = self.factory.get(path, params)
+        request.user = user or AnonymousUser()
+        return request
+
+    async def test_index_lists_users(self):
+        """Async-главная выводит пользователей."""
+        response = await async_views.index(self.get_request('/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.user_one.name)
+
+    async def test_user_post_view_pages(self):
+        """Async-страница автора выводит посты постранично и
+        отмечает автора."""
+        request = self.get_request('/', user=self.user_one)
+        response = await async_views.user_post_view(
+            request, self.user_one.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Пост 14\n')
+        self.assertNotContains(response, 'Пост 4\n')
+        self.assertContains(response, 'Удалить', count=10)
+
+    async def test_user_post_view_unknown_user(self):
+        """Для несуществующего автора возвращается 404."""
+        with self.assertRaises(Http404):
+            await async_views.user_post_view(self.get_request('/'), 0)
+
+    async def test_guest_page_is_cached(self):
+        """Async-страница для гостя кэшируется и отдает ETag."""
+        first = await async_views.index(self.get_request('/'))
+        request = self.get_request('/')
+        request.META['HTTP_IF_NONE_MATCH'] = first['ETag']
+        second = await async_views.index(request)
+        self.assertEqual(second.status_code, 304)
+
+    async def test_cache_is_not_used_on_event_loop(self):
+        """Кэш ответов и карточек читается и пишется не в цикле
+        событий."""
+        with ExitStack() as stack:
+            for name in ('get', 'get_many', 'set', 'set_many', 'add'):
+                stack.enter_context(mock.patch.object(
+                    LocMemCache, name,
+                    off_event_loop(getattr(LocMemCache, name))))
+            for _ in range(2):
+                response = await async_views.user_post_view(
+                    self.get_request('/'), self.user_one.id)
+                self.assertEqual(response.status_code, 200)
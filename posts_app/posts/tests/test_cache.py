@@ -0,0 +1,211 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from posts.checks import check_response_cache
+from posts.models import Post
+from posts_app.metrics import render_metrics, template_metrics
+
+User = get_user_model()
+
+
+class ResponseCacheTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_one = User.objects.create_user(
+            name='UserOne',
+            email='user_one@test.test',
+        )
+        cls.post = Post.objects.create(
+            title='Пост для теста - заголовок',
+            body='Текст тестового поста',
+            user=cls.user_one,
+        )
+        cls.guest_client = Client()
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.user_one)
+        cls.api_client = APIClient()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_guest_page_is_served_from_cache(self):
+        """Повторный запрос гостя отдается из кэша без запросов к БД."""
+        url = reverse('user_post_view', args=[self.user_one.id])
+        first = self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            second = self.guest_client.get(url)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_guest_gets_not_modified(self):
+        """Гость с актуальным ETag получает 304. Last-Modified
+        не отдается, и If-Modified-Since без ETag не дает 304."""
+        url = reverse('index')
+        response = self.guest_client.get(url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        with self.assertNumQueries(0):
+            not_modified = self.guest_client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(ALLOWED_HOSTS=['.example.com', 'testserver'])
+    def test_unlisted_host_is_not_cached(self):
+        """Ответы кэшируются только для хостов из ALLOWED_HOSTS без
+        маски и без чужого порта, но ETag отдается всем."""
+        url = reverse('user_post_view', args=[self.user_one.id])
+        for host in ('any.example.com', 'testserver:8081'):
+            with self.subTest(host=host):
+                response = self.guest_client.get(url, HTTP_HOST=host)
+                self.assertTrue(response.has_header('ETag'))
+                with self.assertNumQueries(2):
+                    self.guest_client.get(url, HTTP_HOST=host)
+        self.guest_client.get(url, HTTP_HOST='TestServer')
+        with self.assertNumQueries(0):
+            self.guest_client.get(url)
+
+    def test_local_memory_cache_warning(self):
+        """check --deploy предупреждает о кэше ответов в памяти
+        процесса."""
+        self.assertEqual(
+            [error.id for error in check_response_cache(None)],
+            ['posts.W001'])
+
+    def test_authorized_page_is_not_cached(self):
+        """Страницы авторизованного пользователя не кэшируются."""
+        url = reverse('user_post_view', args=[self.user_one.id])
+        response = self.author_client.get(url)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertTrue(response.context.get('is_author'))
+
+    def test_new_post_invalidates_author_pages(self):
+        """Новый пост сбрасывает кэш ленты автора и списка
+        пользователей после фиксации транзакции."""
+        posts_url = reverse('user_post_view', args=[self.user_one.id])
+        api_url = reverse('api-user-posts', args=[self.user_one.id])
+        etags = {
+            posts_url: self.guest_client.get(posts_url)['ETag'],
+            api_url: self.api_client.get(api_url)['ETag'],
+            reverse('index'): self.guest_client.get(reverse('index'))['ETag'],
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author_client.post(
+                reverse('new_post'),
+                data={'title': 'Свежий пост', 'body': 'Текст'},
+            )
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+        response = self.api_client.get(api_url)
+        self.assertEqual(
+            response.data['results'][0]['title'], 'Свежий пост')
+
+    def test_api_list_is_served_from_cache(self):
+        """Список API отдается из кэша и поддерживает 304."""
+        url = reverse('api-user-list')
+        response = self.api_client.get(url)
+        with self.assertNumQueries(0):
+            cached = self.api_client.get(url)
+            not_modified = self.api_client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.data, response.data)
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_api_stream_gets_not_modified(self):
+        """Потоковый список отдается с ETag, отличным от ETag страницы,
+        и повторный запрос с ним получает 304 без запросов к БД."""
+        url = reverse('api-user-posts', args=[self.user_one.id])
+        page = self.api_client.get(url)
+        stream = self.api_client.get(url, {'stream': 1})
+        self.assertTrue(stream.streaming)
+        self.assertNotEqual(stream['ETag'], page['ETag'])
+        with self.assertNumQueries(0):
+            not_modified = self.api_client.get(
+                url, {'stream': 1}, HTTP_IF_NONE_MATCH=stream['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    @override_settings(API_ETAG_SOURCE='data')
+    def test_api_etag_from_data(self):
+        """ETag из данных базы не зависит от кэша, 304 стоит одного
+        запроса по индексу, а новый пост меняет ETag."""
+        url = reverse('api-user-posts', args=[self.user_one.id])
+        response = self.api_client.get(url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        cache.clear()
+        with self.assertNumQueries(1):
+            not_modified = self.api_client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        Post.objects.create(title='Свежий пост', body='Текст',
+                            user=self.user_one)
+        fresh = self.api_client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual(fresh.data['results'][0]['title'], 'Свежий пост')
+
+
+class FragmentCacheTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_one = User.objects.create_user(
+            name='UserOne',
+            email='user_one@test.test',
+        )
+        cls.post = Post.objects.create(
+            title='Пост для теста - заголовок',
+            body='Текст тестового поста',
+            user=cls.user_one,
+        )
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.user_one)
+
+    def setUp(self):
+        cache.clear()
+        template_metrics.clear()
+
+    def renders(self, template_name):
+        histogram = template_metrics.histograms.get(template_name)
+        return histogram.count if histogram else 0
+
+    def test_cards_are_rendered_once(self):
+        """Карточки повторно берутся из кэша фрагментов, время
+        рендеринга шаблонов попадает в метрики."""
+        for _ in range(2):
+            self.author_client.get(reverse('index'))
+            self.author_client.get(
+                reverse('user_post_view', args=[self.user_one.id]))
+        self.assertEqual(self.renders('usercard.html'), 1)
+        self.assertEqual(self.renders('postcard.html'), 1)
+        self.assertEqual(self.renders('posts/index.html'), 2)
+        self.assertIn(
+            'posts_app_template_render_seconds_count'
+            '{template="usercard.html"} 1', render_metrics())
+
+    def test_cards_are_invalidated_by_signals(self):
+        """Изменение поста и имени автора обновляет их карточки, а флаг
+        автора входит в ключ карточки поста."""
+        url = reverse('user_post_view', args=[self.user_one.id])
+        self.author_client.get(url)
+        self.assertContains(Client().get(url), 'Пост для теста')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = 'Новый заголовок'
+            self.post.save()
+            self.user_one.name = 'Переименованный'
+            self.user_one.save()
+        response = self.author_client.get(url)
+        self.assertContains(response, 'Новый заголовок')
+        self.assertContains(response, 'Автор: Переименованный')
+        self.assertContains(response, 'Удалить')
+        self.assertNotContains(Client().get(url), 'Удалить')
+        self.assertContains(
+            self.author_client.get(reverse('index')), 'Переименованный')
@@ -0,0 +1,55 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+class ExportPostsTest(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.author = User.objects.create_user(
+            name='Author', email='author@test.test')
+        self.other = User.objects.create_user(
+            name='Other', email='other@test.test')
+        for number in range(5):
+            Post.objects.create(
+                title=f'Пост {number}', body='Текст, "в кавычках"\nи строки',
+                user=self.author if number % 2 else self.other)
+
+    def test_export_jsonl_gzip_by_author(self):
+        """Проверяем, что выгрузка в .gz сжимается и содержит только
+        посты автора по возрастанию id."""
+        path = os.path.join(self.folder, 'posts.jsonl.gz')
+        call_command('export_posts', output=path, user=self.author.id,
+                     chunk_size=1, stdout=StringIO())
+        with gzip.open(path, 'rt', encoding='utf-8') as exported:
+            rows = [json.loads(line) for line in exported]
+        self.assertEqual(
+            [row['id'] for row in rows],
+            list(self.author.posts.order_by('id').values_list(
+                'id', flat=True)))
+        self.assertEqual(rows[0]['name'], 'Author')
+
+    def test_export_csv_loads_back(self):
+        """Проверяем, что выгрузку в CSV можно загрузить обратно
+        командой import_posts."""
+        path = os.path.join(self.folder, 'posts.csv')
+        call_command('export_posts', output=path, format='csv',
+                     chunk_size=2, stdout=StringIO())
+        Post.objects.all().delete()
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(self.author.posts.count(), 2)
+        self.assertEqual(
+            Post.objects.first().body, 'Текст, "в кавычках"\nи строки')
@@ -0,0 +1,145 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from posts.feeds import feed_post_ids, follow
+from posts.models import FeedItem, Follow, Post
+
+User = get_user_model()
+
+
+@override_settings(TASK_QUEUE_EAGER=True, FEED_FANOUT_THRESHOLD=3)
+class FollowFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader, cls.small, cls.big, *cls.fans = [
+            User.objects.create_user(
+                name=f'User{number}', email=f'user{number}@test.test')
+            for number in range(5)
+        ]
+        # С подпиской reader у big будет три подписчика - столько же,
+        # сколько порог рассылки.
+        for fan in cls.fans:
+            follow(fan, cls.big.id)
+
+    def setUp(self):
+        self.reader_client = APIClient()
+        self.reader_client.force_authenticate(self.reader)
+
+    def post_as(self, author, title):
+        client = APIClient()
+        client.force_authenticate(author)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(
+                reverse('api-post-list'),
+                {'title': title, 'body': 'Текст'}, format='json')
+        return response.data['id']
+
+    def follow_url(self, user):
+        return reverse('api-user-follow', args=[user.id])
+
+    def subscribe(self, user):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.reader_client.post(self.follow_url(user))
+
+    def feed_ids(self):
+        ids = []
+        url = reverse('api-feed')
+        while url:
+            data = self.reader_client.get(url).data
+            ids += [post['id'] for post in data['results']]
+            url = data['next']
+        return ids
+
+    def test_follow_and_unfollow(self):
+        """Подписка и отписка меняют счетчик подписчиков, повторная
+        подписка, подписка на себя и отписка без подписки - ошибки."""
+        self.assertEqual(self.subscribe(self.small).status_code, 201)
+        self.small.refresh_from_db()
+        self.assertEqual(self.small.followers_count, 1)
+        errors = [
+            (self.reader_client.post, self.follow_url(self.small), 400),
+            (self.reader_client.post, self.follow_url(self.reader), 400),
+            (self.reader_client.post,
+             reverse('api-user-follow', args=[0]), 404),
+            (APIClient().post, self.follow_url(self.small), 401),
+        ]
+        for method, url, status in errors:
+            with self.subTest(url=url, status=status):
+                self.assertEqual(method(url).status_code, status)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.reader_client.delete(self.follow_url(self.small))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(
+            self.reader_client.delete(
+                self.follow_url(self.small)).status_code, 404)
+        self.small.refresh_from_db()
+        self.assertEqual(self.small.followers_count, 0)
+
+    def test_feed_merges_pushed_and_pulled_posts(self):
+        """Посты автора с малым числом подписчиков рассылаются
+        в FeedItem, посты популярного автора читаются при запросе,
+        а лента сливает их по id на всех страницах."""
+        old_post = self.post_as(self.small, 'До подписки')
+        self.subscribe(self.small)
+        self.subscribe(self.big)
+        self.assertTrue(FeedItem.objects.filter(
+            user=self.reader, post_id=old_post).exists())
+        expected = [old_post]
+        for number in range(12):
+            author = (self.small, self.big)[number % 2]
+            expected.append(self.post_as(author, f'Пост {number}'))
+        self.post_as(self.fans[0], 'Чужой пост')
+        self.assertFalse(FeedItem.objects.filter(
+            post__user=self.big).exists())
+        self.assertEqual(FeedItem.objects.filter(
+            user=self.reader).count(), 7)
+        expected.reverse()
+        self.assertEqual(self.feed_ids(), expected)
+        first = self.reader_client.get(reverse('api-feed')).data
+        second = self.reader_client.get(first['next']).data
+        previous = self.reader_client.get(second['previous']).data
+        self.assertEqual(previous['results'], first['results'])
+
+    def test_unfollow_removes_posts_from_feed(self):
+        """После отписки посты автора пропадают из ленты."""
+        self.subscribe(self.small)
+        self.subscribe(self.big)
+        small_post = self.post_as(self.small, 'Малый')
+        big_post = self.post_as(self.big, 'Популярный')
+        self.assertEqual(self.feed_ids(), [big_post, small_post])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reader_client.delete(self.follow_url(self.small))
+        self.assertEqual(self.feed_ids(), [big_post])
+
+    def test_author_below_threshold_is_backfilled(self):
+        """Когда популярный автор теряет подписчика и его посты снова
+        рассылаются, последние посты дописываются в ленты."""
+        self.subscribe(self.big)
+        big_post = self.post_as(self.big, 'Популярный')
+        fan_client = APIClient()
+        fan_client.force_authenticate(self.fans[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            fan_client.delete(self.follow_url(self.big))
+        self.assertTrue(FeedItem.objects.filter(
+            user=self.reader, post_id=big_post).exists())
+        self.assertEqual(self.feed_ids(), [big_post])
+
+    def test_deleted_reader_releases_follows(self):
+        """Удаление подписчика уменьшает счетчики его авторов."""
+        self.fans[0].delete()
+        self.big.refresh_from_db()
+        self.assertEqual(self.big.followers_count, 1)
+        self.assertEqual(Follow.objects.filter(author=self.big).count(), 1)
+
+    def test_feed_reads_limited_ranges(self):
+        """Каждый источник ленты читает не больше limit строк."""
+        self.subscribe(self.small)
+        self.subscribe(self.big)
+        for number in range(6):
+            self.post_as(self.big, f'Пост {number}')
+        # Подписки, FeedItem читателя и посты популярного автора.
+        with self.assertNumQueries(3):
+            post_ids = feed_post_ids(self.reader.id, None, True, 4)
+        self.assertEqual(len(post_ids), 4)
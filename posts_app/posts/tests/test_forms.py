@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
@@ -34,6 +35,9 @@ class PostsFormTests(TestCase):
         cls.authorized_client = Client()
         cls.authorized_client.force_login(cls.user_two)
 
+    def setUp(self):
+        cache.clear()
+
     def test_create_valid_post(self):
         """Валидная форма создает запись в Post."""
         post_count = Post.objects.count()
@@ -95,3 +99,18 @@ class PostsFormTests(TestCase):
         )
         self.assertRedirects(response_guest, redir)
         self.assertEqual(Post.objects.count(), post_count)
+
+    def test_posts_count_follows_create_and_delete(self):
+        """Создание и удаление поста через формы меняет
+        счетчик постов автора."""
+        count_before = User.objects.get(id=self.user_one.id).posts_count
+        self.author_client.post(
+            reverse('new_post'),
+            data={'title': 'Счетчик', 'body': 'Текст'},
+        )
+        user = User.objects.get(id=self.user_one.id)
+        self.assertEqual(user.posts_count, count_before + 1)
+        post = Post.objects.filter(user=self.user_one).first()
+        self.author_client.post(reverse('post_delete', args=[post.id]))
+        user = User.objects.get(id=self.user_one.id)
+        self.assertEqual(user.posts_count, count_before)
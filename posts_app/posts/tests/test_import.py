@@ -0,0 +1,99 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from posts.cache import USERS_SCOPE, get_versions
+from posts.models import Post
+
+User = get_user_model()
+
+
+class ImportPostsTest(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.author = User.objects.create_user(
+            name='Author', email='author@test.test')
+
+    def write(self, name, content):
+        path = os.path.join(self.folder, name)
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write(content)
+        return path
+
+    def test_import_csv(self):
+        """Проверяем, что посты из CSV загружаются пачками, новые авторы
+        создаются один раз, существующие находятся по email, а счетчики
+        постов пересчитываются."""
+        path = self.write('posts.csv', (
+            'email,name,title,body\n'
+            'author@test.test,,Первый,Текст 1\n'
+            'new@test.test,Новый,Второй,Текст 2\n'
+            'new@TEST.test,Новый,Третий,Текст 3\n'
+        ))
+        out = StringIO()
+        call_command('import_posts', path, chunk_size=2, batch_size=1,
+                     stdout=out)
+        self.assertIn('Загружено постов: 3', out.getvalue())
+        new_user = User.objects.get(email='new@test.test')
+        self.assertEqual(new_user.name, 'Новый')
+        self.assertFalse(new_user.has_usable_password())
+        self.assertEqual(
+            list(new_user.posts.values_list('title', flat=True)),
+            ['Третий', 'Второй'])
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.posts_count, 1)
+        self.assertEqual(new_user.posts_count, 2)
+
+    def test_import_jsonl_with_password(self):
+        """Проверяем загрузку JSONL: все новые пользователи получают
+        один и тот же хэш пароля, посчитанный один раз."""
+        path = self.write('posts.jsonl', ''.join(
+            json.dumps({'email': f'user{number}@test.test',
+                        'title': f'Пост {number}', 'body': 'Текст'}) + '\n'
+            for number in range(3)))
+        call_command('import_posts', path, password='fixture-password',
+                     stdout=StringIO())
+        users = User.objects.filter(email__startswith='user')
+        self.assertEqual(users.count(), 3)
+        self.assertEqual(len({user.password for user in users}), 1)
+        user = users.first()
+        self.assertTrue(user.check_password('fixture-password'))
+        self.assertEqual(user.name, user.email.split('@')[0])
+
+    def test_import_resets_page_cache(self):
+        """Проверяем, что после загрузки меняется версия кэша списка
+        пользователей."""
+        version = get_versions([USERS_SCOPE])[USERS_SCOPE]
+        path = self.write(
+            'posts.csv', 'email,title,body\nauthor@test.test,Пост,Текст\n')
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertNotEqual(
+            get_versions([USERS_SCOPE])[USERS_SCOPE], version)
+
+    def test_invalid_rows(self):
+        """Проверяем, что строка без обязательных полей, с длинным
+        заголовком или с неверным JSON останавливает загрузку с номером
+        строки."""
+        cases = (
+            ('posts.csv', 'email,title\nauthor@test.test,Пост\n',
+             'Строка 1: нет полей body'),
+            ('posts.csv', f'email,title,body\na@test.test,{"x" * 61},Т\n',
+             'Строка 1: заголовок длиннее 60 символов'),
+            ('posts.jsonl', '{"email": "a@test.test"}\n{oops\n',
+             'Строка 1: нет полей title, body'),
+            ('posts.jsonl', '{oops\n', 'Строка 1: Expecting'),
+            ('posts.txt', '', 'Укажите формат'),
+        )
+        for name, content, message in cases:
+            with self.subTest(content=content):
+                path = self.write(name, content)
+                with self.assertRaisesMessage(CommandError, message):
+                    call_command('import_posts', path, stdout=StringIO())
+        self.assertFalse(Post.objects.exists())
@@ -0,0 +1,105 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Post
+from posts.pagination import KeysetPaginator, decode_cursor, encode_cursor
+
+User = get_user_model()
+
+
+class KeysetPaginatorTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_one = User.objects.create_user(
+            name='UserOne',
+            email='user_one@test.test',
+        )
+        Post.objects.bulk_create(
+            Post(title=f'Пост {number}', body='Текст', user=cls.user_one)
+            for number in range(25)
+        )
+        cls.ids = list(Post.objects.values_list('id', flat=True))
+        cls.paginator = KeysetPaginator(Post.objects.all(), 10)
+
+    def test_cursor_round_trip(self):
+        """Токен курсора распаковывается в исходные направление и позицию,
+        а поврежденный токен распознается как отсутствующий."""
+        token = encode_cursor('n', 42)
+        self.assertEqual(decode_cursor(token), ('n', 42))
+        for broken in ('', 'не-токен', encode_cursor('x', 1),
+                       encode_cursor('n', 10 ** 30),
+                       encode_cursor('n', [[1], 2])):
+            with self.subTest(broken=broken):
+                self.assertIsNone(decode_cursor(broken))
+
+    def test_pages_follow_ordering(self):
+        """Страницы идут по убыванию id без пропусков и повторов."""
+        received = []
+        page = self.paginator.get_page()
+        self.assertFalse(page.has_previous())
+        while True:
+            received.extend(post.id for post in page)
+            if not page.has_next():
+                break
+            page = self.paginator.get_page(page.next_cursor)
+        self.assertEqual(received, self.ids)
+
+    def test_previous_cursor_returns_previous_page(self):
+        """Курсор previous возвращает предыдущую страницу целиком."""
+        first = self.paginator.get_page()
+        second = self.paginator.get_page(first.next_cursor)
+        back = self.paginator.get_page(second.previous_cursor)
+        self.assertEqual(
+            [post.id for post in back],
+            [post.id for post in first])
+        self.assertFalse(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Некорректный курсор отдает первую страницу."""
+        for cursor in ('мусор', encode_cursor('n', 'abc')):
+            with self.subTest(cursor=cursor):
+                page = self.paginator.get_page(cursor)
+                self.assertEqual(page[0].id, self.ids[0])
+
+    def test_oversized_cursor_returns_first_page(self):
+        """Позиция курсора вне диапазона BIGINT не доходит до запроса:
+        страницы сайта и API отдают первую страницу, а не ошибку 500."""
+        urls = (
+            reverse('index'),
+            reverse('user_post_view', args=[self.user_one.id]),
+            reverse('api-user-list'),
+        )
+        for url in urls:
+            for direction in ('n', 'p'):
+                cursor = encode_cursor(direction, 10 ** 30)
+                with self.subTest(url=url, direction=direction):
+                    response = self.client.get(url, {'cursor': cursor})
+                    self.assertEqual(response.status_code, 200)
+        page = self.paginator.get_page(encode_cursor('p', -10 ** 30))
+        self.assertEqual(page[0].id, self.ids[0])
+
+    def test_deep_page_does_not_count_or_offset(self):
+        """Глубокая страница выбирается одним запросом без OFFSET."""
+        page = self.paginator.get_page()
+        page = self.paginator.get_page(page.next_cursor)
+        with self.assertNumQueries(1) as context:
+            self.paginator.get_page(page.next_cursor)
+        sql = context.captured_queries[0]['sql'].upper()
+        self.assertNotIn('OFFSET', sql)
+        self.assertNotIn('COUNT(', sql)
+
+    async def test_async_page_matches_sync_page(self):
+        """aget_page возвращает те же страницы, что и get_page."""
+        cursor = None
+        for _ in range(3):
+            page = await self.paginator.aget_page(cursor)
+            expected = await sync_to_async(self.paginator.get_page)(cursor)
+            self.assertEqual(
+                [post.id for post in page], [post.id for post in expected])
+            self.assertEqual(page.next_cursor, expected.next_cursor)
+            cursor = page.next_cursor
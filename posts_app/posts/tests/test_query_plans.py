@@ -0,0 +1,29 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from posts.models import Post
+from posts.query_plans import explain, plan_problems
+
+
+class QueryPlansTest(TestCase):
+    def test_view_queries_use_indexes(self):
+        """Проверяем, что запросы страниц и API не читают таблицы
+        целиком и не сортируют строки без индекса."""
+        out = StringIO()
+        call_command('check_query_plans', stdout=out)
+        self.assertIn('Все запросы используют индексы', out.getvalue())
+
+    def test_plan_problems_reports_unindexed_query(self):
+        """Проверяем, что запрос без подходящего индекса попадает
+        в список проблем."""
+        queries = (
+            Post.objects.filter(body='text'),
+            Post.objects.filter(user_id=1).order_by('title'),
+        )
+        for queryset in queries:
+            with self.subTest(query=str(queryset.query)):
+                self.assertTrue(
+                    plan_problems(explain(queryset), connection.vendor))
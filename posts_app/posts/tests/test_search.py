@@ -0,0 +1,121 @@
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+from posts.search import (PostgresSearchBackend, SearchPaginator,
+                          SQLiteSearchBackend, get_search_backend,
+                          split_terms)
+
+User = get_user_model()
+
+
+class PostsSearchTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_one = User.objects.create_user(
+            name='UserOne',
+            email='user_one@test.test',
+        )
+        cls.cats = Post.objects.create(
+            title='Коты и кошки',
+            body='Коты спят, кошки играют, коты едят.',
+            user=cls.user_one,
+        )
+        cls.dogs = Post.objects.create(
+            title='Собаки',
+            body='Собаки лают на котов.',
+            user=cls.user_one,
+        )
+        cls.other = Post.objects.create(
+            title='Погода',
+            body='Сегодня идет дождь.',
+            user=cls.user_one,
+        )
+        cls.guest_client = Client()
+
+    def search_ids(self, query, per_page=10):
+        paginator = SearchPaginator(Post.objects.all(), query, per_page)
+        return [post.id for post in paginator.get_page()]
+
+    def test_search_uses_database_index(self):
+        """На SQLite поиск идет по индексу FTS5, на PostgreSQL -
+        по GIN-индексу tsvector."""
+        expected = {
+            'sqlite': SQLiteSearchBackend,
+            'postgresql': PostgresSearchBackend,
+        }[connection.vendor]
+        self.assertIsInstance(get_search_backend(), expected)
+
+    def test_index_exists_after_migrate(self):
+        """После всех миграций, в том числе пересоздающих таблицу постов
+        в SQLite, на месте триггеры FTS5 или GIN-индекс."""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                    "AND tbl_name = 'posts_post'")
+                expected = {
+                    'posts_post_fts_ai', 'posts_post_fts_ad',
+                    'posts_post_fts_au'}
+            else:
+                cursor.execute(
+                    "SELECT indexname FROM pg_indexes "
+                    "WHERE tablename = 'posts_post'")
+                expected = {'posts_post_search_idx'}
+            names = {row[0] for row in cursor.fetchall()}
+        self.assertLessEqual(expected, names)
+
+    def test_search_ranks_matches(self):
+        """Поиск находит посты по префиксу слова и ставит выше
+        пост с большим числом совпадений."""
+        self.assertEqual(self.search_ids('кот'), [self.cats.id, self.dogs.id])
+        self.assertEqual(self.search_ids('дождь'), [self.other.id])
+        self.assertEqual(self.search_ids('кот дождь'), [])
+
+    def test_search_ignores_query_syntax(self):
+        """Операторы языка запросов в строке поиска не ломают запрос."""
+        self.assertEqual(split_terms('"кот" OR -собака*'),
+                         ['кот', 'OR', 'собака'])
+        self.assertEqual(self.search_ids('NEAR( "кот'), [])
+        self.assertEqual(self.search_ids(''), [])
+
+    def test_search_index_follows_changes(self):
+        """Индекс обновляется при изменении и удалении постов."""
+        Post.objects.filter(id=self.other.id).update(body='Снег')
+        self.assertEqual(self.search_ids('дождь'), [])
+        self.assertEqual(self.search_ids('снег'), [self.other.id])
+        Post.objects.filter(id=self.cats.id).delete()
+        self.assertEqual(self.search_ids('кот'), [self.dogs.id])
+
+    def test_search_pages_by_cursor(self):
+        """Результаты поиска разбиваются на страницы курсором."""
+        paginator = SearchPaginator(Post.objects.all(), 'кот', 1)
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+        self.assertEqual([post.id for post in first], [self.cats.id])
+        self.assertEqual([post.id for post in second], [self.dogs.id])
+        self.assertFalse(second.has_next())
+        back = paginator.get_page(second.previous_cursor)
+        self.assertEqual([post.id for post in back], [self.cats.id])
+
+    def test_search_page_shows_results(self):
+        """HTML-страница поиска выводит найденные посты."""
+        response = self.guest_client.get(
+            reverse('post_search'), {'q': 'собаки'})
+        page = response.context.get('page')
+        self.assertEqual([post.id for post in page], [self.dogs.id])
+        self.assertEqual(response.context.get('query'), 'собаки')
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке находит посты через полнотекстовый индекс."""
+        model_admin = site._registry[Post]
+        request = RequestFactory().get('/')
+        queryset, may_have_duplicates = model_admin.get_search_results(
+            request, Post.objects.all(), 'дождь')
+        self.assertEqual(list(queryset), [self.other])
+        self.assertFalse(may_have_duplicates)
@@ -0,0 +1,146 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from posts.feeds import follow
+from posts.models import FeedItem, Post, Task
+from posts.tasks import enqueue, queue_stats, task
+from posts_app.metrics import render_metrics
+
+User = get_user_model()
+
+calls = []
+
+
+@task('tests.record', batch=True)
+def record(payloads):
+    calls.append(payloads)
+
+
+@task('tests.fail')
+def fail(number):
+    raise ValueError(number)
+
+
+@override_settings(TASK_QUEUE_EAGER=False, FEED_FANOUT_THRESHOLD=3)
+class TaskQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, cls.reader = [
+            User.objects.create_user(
+                name=f'User{number}', email=f'user{number}@test.test')
+            for number in range(2)
+        ]
+
+    def setUp(self):
+        calls.clear()
+
+    def run_workers(self, **options):
+        out = StringIO()
+        call_command('run_workers', workers=1, burst=True, stdout=out,
+                     **options)
+        return out.getvalue()
+
+    def test_post_side_effects_run_in_worker(self):
+        """Рассылка нового поста ставится в очередь вместе с постом
+        и выполняется воркером, а не в запросе."""
+        follow(self.reader, self.author.id)
+        self.run_workers()
+        client = APIClient()
+        client.force_authenticate(self.author)
+        response = client.post(
+            reverse('api-post-list'),
+            {'title': 'Новый пост', 'body': 'Текст'}, format='json')
+        self.assertFalse(FeedItem.objects.filter(
+            post_id=response.data['id']).exists())
+        self.assertEqual(
+            list(Task.objects.values_list('name', 'args')),
+            [('feeds.fanout_posts', [self.author.id, [response.data['id']]])])
+        self.assertIn('Выполнено задач: 1', self.run_workers())
+        self.assertTrue(FeedItem.objects.filter(
+            user=self.reader, post_id=response.data['id']).exists())
+        self.assertFalse(Task.objects.exists())
+
+    def test_rolled_back_task_is_not_queued(self):
+        """Задача, поставленная в откаченной транзакции, пропадает."""
+        with transaction.atomic():
+            Post.objects.create(title='Пост', body='Текст', user=self.author)
+            enqueue(record, 1)
+            transaction.set_rollback(True)
+        self.assertFalse(Task.objects.exists())
+
+    def test_same_type_tasks_run_as_batch(self):
+        """Задачи одного типа из пачки выполняются одним вызовом,
+        а задачи, захваченные другим воркером, пропускаются."""
+        for number in range(3):
+            enqueue(record, number)
+        Task.objects.create(
+            name='tests.record', args=[99], claimed_by='other',
+            available_at=timezone.now() + timedelta(minutes=5))
+        self.assertIn('Выполнено задач: 3', self.run_workers())
+        self.assertEqual(calls, [[[0], [1], [2]]])
+        self.assertEqual(Task.objects.get().claimed_by, 'other')
+
+    @override_settings(TASK_MAX_ATTEMPTS=3, TASK_RETRY_DELAY=60)
+    def test_failed_task_is_retried_with_backoff(self):
+        """Задача с ошибкой откладывается с растущей паузой, а после
+        TASK_MAX_ATTEMPTS попыток получает статус failed."""
+        enqueue(fail, 1)
+        enqueue(record, 2)
+        with self.assertLogs('posts_app.tasks', 'ERROR'):
+            output = self.run_workers()
+        self.assertIn('отложено для повтора: 1', output)
+        self.assertEqual(calls, [[[2]]])
+        failed = Task.objects.get()
+        self.assertEqual(failed.attempts, 1)
+        self.assertEqual(failed.status, Task.QUEUED)
+        self.assertIn('ValueError: 1', failed.error)
+        self.assertGreater(
+            failed.available_at, timezone.now() + timedelta(seconds=50))
+        stats = queue_stats()
+        self.assertEqual((stats['queued'], stats['lag']), (1, 0.0))
+        for attempts in (2, 3):
+            Task.objects.update(available_at=timezone.now())
+            with self.assertLogs('posts_app.tasks', 'ERROR'):
+                self.run_workers()
+            failed.refresh_from_db()
+            self.assertEqual(failed.attempts, attempts)
+        self.assertEqual(failed.status, Task.FAILED)
+        self.assertEqual(queue_stats()['failed'], 1)
+
+    def test_queue_metrics(self):
+        """Размер очереди и задержка самой старой задачи есть
+        в /metrics."""
+        Task.objects.create(
+            name='tests.record', args=[1],
+            available_at=timezone.now() - timedelta(seconds=30))
+        stats = queue_stats()
+        self.assertEqual(stats['queued'], 1)
+        self.assertGreaterEqual(stats['lag'], 30)
+        self.assertIn('posts_app_tasks_queued 1', render_metrics())
+
+    @override_settings(TASK_QUEUE_EAGER=True)
+    def test_eager_mode_runs_after_commit(self):
+        """В режиме TASK_QUEUE_EAGER задача выполняется после фиксации
+        транзакции, без строки в очереди."""
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue(record, 1)
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, [[[1]]])
+        self.assertFalse(Task.objects.exists())
+
+    def test_unknown_task_fails(self):
+        """Задача, которой нет в коде, не выполняется и откладывается."""
+        Task.objects.create(name='tests.missing', args=[])
+        with mock.patch('posts.tasks.logger') as logger:
+            self.run_workers()
+        logger.exception.assert_called_once()
+        self.assertEqual(Task.objects.get().attempts, 1)
@@ -0,0 +1,165 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from posts.models import Post
+from posts.pagination import encode_cursor
+from posts.timeline import timeline
+
+User = get_user_model()
+
+SMALL_TIMELINE = {'SIZE': 15, 'TIMEOUT': 60, 'SHARED_CACHE_ALIAS': None}
+
+
+@override_settings(FEED_TIMELINE=SMALL_TIMELINE)
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user_one = User.objects.create_user(
+            name='UserOne', email='user_one@test.test')
+        cls.user_two = User.objects.create_user(
+            name='UserTwo', email='user_two@test.test')
+        Post.objects.bulk_create(
+            Post(title=f'Пост {number}', body='Текст',
+                 user=(cls.user_one, cls.user_two)[number % 2])
+            for number in range(25))
+
+    def setUp(self):
+        cache.clear()
+        timeline.clear()
+        self.guest_client = APIClient()
+        self.author_client = APIClient()
+        self.author_client.force_authenticate(self.user_one)
+
+    def feed_ids(self, params=None):
+        response = self.guest_client.get(reverse('api-post-list'), params)
+        return [post['id'] for post in response.data['results']], response
+
+    def test_feed_pages_follow_all_posts(self):
+        """Лента отдает посты всех авторов от новых к старым: страницы
+        внутри буфера и за его пределами, вперед и назад."""
+        expected = list(Post.objects.values_list('id', flat=True))
+        received, pages = [], []
+        params = None
+        while True:
+            ids, response = self.feed_ids(params)
+            received += ids
+            pages.append(response.data)
+            if response.data['next'] is None:
+                break
+            params = {'cursor': response.data['next'].split('cursor=')[1]}
+        self.assertEqual(received, expected)
+        previous = self.guest_client.get(pages[-1]['previous']).data
+        self.assertEqual(previous['results'], pages[-2]['results'])
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Курсор с id вне диапазона BIGINT или не числом отдает
+        первую страницу ленты в API и на сайте, а не ошибку 500."""
+        first, _ = self.feed_ids()
+        for position in (10 ** 30, -10 ** 30, 'abc', [1, 2]):
+            for direction in ('n', 'p'):
+                cursor = encode_cursor(direction, position)
+                with self.subTest(position=position, direction=direction):
+                    ids, response = self.feed_ids({'cursor': cursor})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(ids, first)
+                    response = self.client.get(
+                        reverse('feed'), {'cursor': cursor})
+                    self.assertEqual(response.status_code, 200)
+
+    def test_first_page_is_served_from_memory(self):
+        """После загрузки буфера первая страница, новый пост и удаление
+        не требуют запросов к базе для чтения ленты."""
+        self.feed_ids()
+        with self.assertNumQueries(0):
+            ids, _ = self.feed_ids()
+        self.assertEqual(ids[0], Post.objects.first().id)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.author_client.post(
+                reverse('api-post-list'),
+                {'title': 'Свежий пост', 'body': 'Текст'}, format='json')
+        with self.assertNumQueries(0):
+            ids, _ = self.feed_ids()
+        self.assertEqual(ids[0], response.data['id'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author_client.delete(
+                reverse('api-post-detail', args=[response.data['id']]))
+        with self.assertNumQueries(0):
+            ids, _ = self.feed_ids()
+        self.assertNotIn(response.data['id'], ids)
+        self.assertEqual(timeline.stats()['warmups'], 1)
+
+    def test_posts_committed_out_of_order_stay_sorted(self):
+        """Пост с меньшим id, зафиксированный позже, встает в буфер
+        на свое место, и первая страница идет по убыванию id."""
+        self.feed_ids()
+        callbacks, ids = [], []
+        for title in ('Первый', 'Второй'):
+            with self.captureOnCommitCallbacks() as captured:
+                response = self.author_client.post(
+                    reverse('api-post-list'),
+                    {'title': title, 'body': 'Текст'}, format='json')
+            callbacks.append(captured)
+            ids.append(response.data['id'])
+        for captured in reversed(callbacks):
+            for callback in captured:
+                callback()
+        with self.assertNumQueries(0):
+            first, _ = self.feed_ids()
+        self.assertEqual(first[:2], ids[::-1])
+        self.assertEqual(first, sorted(first, reverse=True))
+
+    def test_bulk_create_and_new_post_form_push(self):
+        """Посты из массового создания и формы сайта попадают
+        в ленту и на HTML-страницу ленты."""
+        self.feed_ids()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author_client.post(
+                reverse('api-post-bulk'),
+                [{'title': 'Пакет 1', 'body': 'Текст'},
+                 {'title': 'Пакет 2', 'body': 'Текст'}], format='json')
+        site_client = self.client
+        site_client.force_login(self.user_two)
+        with self.captureOnCommitCallbacks(execute=True):
+            site_client.post(
+                reverse('new_post'), {'title': 'С сайта', 'body': 'Текст'})
+        response = self.guest_client.get(reverse('api-post-list'))
+        self.assertEqual(
+            [post['title'] for post in response.data['results'][:3]],
+            ['С сайта', 'Пакет 2', 'Пакет 1'])
+        self.assertEqual(timeline.stats()['warmups'], 1)
+        response = self.client.get(reverse('feed'))
+        self.assertContains(response, 'С сайта')
+        self.assertContains(response, 'UserTwo')
+
+    def test_user_rename_reloads_timeline(self):
+        """Смена имени автора сбрасывает буфер ленты."""
+        self.feed_ids()
+        self.user_one.name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user_one.save()
+        response = self.client.get(reverse('feed'))
+        self.assertContains(response, 'Renamed')
+        self.assertEqual(timeline.stats()['warmups'], 2)
+
+    @override_settings(FEED_TIMELINE={
+        **SMALL_TIMELINE, 'SHARED_CACHE_ALIAS': 'default'})
+    def test_shared_snapshot_warms_other_workers(self):
+        """Процесс с пустым буфером загружает снимок из общего кэша
+        без запроса к базе."""
+        first, _ = self.feed_ids()
+        timeline.clear()
+        with self.assertNumQueries(0):
+            ids, _ = self.feed_ids()
+        self.assertEqual(ids, first)
+        self.assertEqual(timeline.stats()['warmups'], 0)
+
+    @override_settings(FEED_TIMELINE={**SMALL_TIMELINE, 'SIZE': 0})
+    def test_disabled_timeline_reads_database(self):
+        """При нулевом размере буфера лента читается из базы."""
+        ids, _ = self.feed_ids()
+        self.assertEqual(
+            ids, list(Post.objects.values_list('id', flat=True)[:10]))
+        self.assertEqual(timeline.stats()['hits'], 0)
@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client, TestCase
 
 from posts.models import Post
@@ -35,12 +36,16 @@ class PostsURLTests(TestCase):
         cls.author_client.force_login(cls.user_one)
         cls.authorized_client.force_login(cls.user_two)
 
+    def setUp(self):
+        cache.clear()
+
     def test_urls_are_available_for_guest(self):
         """Проверка доступности страниц из списка
         неавторизованному пользователю."""
         urls_for_guest = [
             ('/', 200),
             (f'/users/{self.user_one.id}/posts/', 200),
+            ('/search/?q=пост', 200),
             (f'/posts/{self.post.id}/delete/', 302),
             ('/posts/new/', 302),
             ('/404/', 404),
@@ -94,6 +99,7 @@ class PostsURLTests(TestCase):
         templates_url_names = [
             ('/', 'posts/index.html'),
             (f'/users/{self.user_one.id}/posts/', 'posts/posts.html'),
+            ('/search/', 'posts/search.html'),
             ('/404/', 'posts/misc/404.html'),
             ('/403/', 'posts/misc/403.html'),
             ('/500/', 'posts/misc/500.html'),
@@ -1,14 +1,18 @@
 from django import forms
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
 from posts.models import Post
 
+from .mixins import QueryCountMixin
+
 User = get_user_model()
 
 
-class PostsViewsTests(TestCase):
+class PostsViewsTests(QueryCountMixin, TestCase):
 
     @classmethod
     def setUpClass(cls):
@@ -42,6 +46,9 @@ class PostsViewsTests(TestCase):
         cls.authorized_client = Client()
         cls.authorized_client.force_login(cls.user_two)
 
+    def setUp(self):
+        cache.clear()
+
     def test_url_uses_correct_template(self):
         """URL-адрес использует соответствующий шаблон."""
         post = self.post[-1]
@@ -105,3 +112,34 @@ class PostsViewsTests(TestCase):
         self.assertEqual(post.title, expected_post.title)
         self.assertEqual(post.body, expected_post.body)
         self.assertEqual(post.user, expected_post.user)
+
+    def test_posts_page_follows_cursor(self):
+        """Страница posts выводит следующую страницу по курсору
+        из контекста первой страницы."""
+        url = reverse('user_post_view', args=[self.user_one.id])
+        first_page = self.guest_client.get(url).context.get('page')
+        self.assertEqual(len(first_page), settings.PAGE_NO)
+        response = self.guest_client.get(
+            url, {'cursor': first_page.next_cursor})
+        second_page = response.context.get('page')
+        self.assertLess(second_page[0].id, first_page[-1].id)
+        self.assertTrue(second_page.has_previous())
+
+    def test_pages_run_fixed_number_of_queries(self):
+        """Каждая страница списков выполняет одинаковое число запросов,
+        автор поста не загружается отдельно для каждой карточки."""
+        pages = [
+            (reverse('index'), 1),
+            (reverse('user_post_view', args=[self.user_one.id]), 2),
+        ]
+        for url, num in pages:
+            with self.subTest(url=url):
+                self.assertPageQueries(self.guest_client, url, num)
+
+    def test_post_delete_loads_author_with_post(self):
+        """Страница post_delete получает пост и автора одним запросом."""
+        post = self.post[0]
+        url = reverse('post_delete', args=[post.id])
+        with self.assertNumQueries(3):
+            # Сессия, пользователь из сессии, пост вместе с автором.
+            self.author_client.get(url)
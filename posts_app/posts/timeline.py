@@ -0,0 +1,277 @@
+import bisect
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import router, transaction
+from django.dispatch import receiver
+
+from .cache import FEED_SCOPE, bump_versions, get_versions
+from .models import Post
+from .pagination import KeysetPaginator
+
+User = get_user_model()
+
+
+def feed_entry(post):
+    """Функция возвращает копию поста для ленты: только поля, которые
+    нужны API и карточке, и автора с одним именем. Для поста без id
+    (bulk_create без RETURNING) или без загруженного автора
+    возвращает None."""
+    if post.pk is None or not Post.user.is_cached(post):
+        return None
+    entry = Post(
+        id=post.id, title=post.title, body=post.body,
+        user_id=post.user_id, created_at=post.created_at,
+        updated_at=post.updated_at)
+    entry.user = User(id=post.user.id, name=post.user.name)
+    return entry
+
+
+class Timeline:
+    """Класс хранит последние size постов всех авторов в памяти процесса
+    (кольцевой буфер от новых к старым). Буфер заполняется из базы при
+    первом чтении, новые посты добавляются в начало, а удаленные
+    помечаются и пропускаются при чтении. Буфер действителен, пока
+    не изменилась версия области FEED_SCOPE и не прошло timeout
+    секунд: изменения из других процессов меняют версию, и буфер
+    загружается заново. Если задан общий кэш Django, в нем хранится
+    снимок буфера, и процессы загружают его вместо запроса к базе."""
+
+    shared_key = 'posts:feed:timeline'
+
+    def __init__(self, size, timeout, shared_alias=None):
+        self.lock = threading.Lock()
+        self.configure(size, timeout, shared_alias)
+
+    def configure(self, size, timeout, shared_alias=None):
+        with self.lock:
+            self.size = size
+            self.timeout = timeout
+            self.shared_alias = shared_alias
+            self.reset()
+            self.hits = self.misses = self.warmups = 0
+
+    def reset(self):
+        self.entries = deque(maxlen=self.size)
+        self.deleted = set()
+        # Буфер содержит все посты базы, а не только последние size.
+        self.complete = False
+        self.version = None
+        self.loaded_at = 0.0
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    def clear(self):
+        with self.lock:
+            self.reset()
+            self.hits = self.misses = self.warmups = 0
+
+    def _fresh(self, version):
+        return (
+            self.version == version
+            and time.monotonic() - self.loaded_at < self.timeout)
+
+    def _snapshot(self):
+        return {
+            'version': self.version,
+            'entries': list(self.entries),
+            'deleted': set(self.deleted),
+            'complete': self.complete,
+        }
+
+    def _restore(self, snapshot):
+        self.entries = deque(snapshot['entries'], maxlen=self.size)
+        self.deleted = set(snapshot['deleted'])
+        self.complete = snapshot['complete']
+        self.version = snapshot['version']
+        self.loaded_at = time.monotonic()
+
+    def warm(self, version):
+        """Метод загружает буфер из общего кэша или из базы. Посты
+        читаются из основной базы: реплика может еще не содержать
+        пост, из-за которого сменилась версия."""
+        shared = self.shared
+        snapshot = shared.get(self.shared_key) if shared else None
+        if snapshot is None or snapshot['version'] != version:
+            posts = list(
+                Post.objects.for_feed().using(router.db_for_write(Post))
+                .order_by('-id')[:self.size])
+            snapshot = {
+                'version': version,
+                'entries': posts,
+                'deleted': set(),
+                'complete': len(posts) < self.size,
+            }
+            if shared is not None:
+                shared.set(self.shared_key, snapshot, self.timeout)
+            with self.lock:
+                self.warmups += 1
+        with self.lock:
+            self._restore(snapshot)
+
+    def rows(self, position, forward, limit):
+        """Метод возвращает до limit постов после позиции курсора
+        (id) в порядке запроса KeysetPaginator или None, если буфер
+        не содержит всех нужных постов и страницу надо читать из
+        базы."""
+        if not self.size or not (
+                position is None or isinstance(position, int)):
+            return None
+        version = get_versions([FEED_SCOPE])[FEED_SCOPE]
+        with self.lock:
+            fresh = self._fresh(version)
+        if not fresh:
+            self.warm(version)
+        with self.lock:
+            rows = self._select(position, forward, limit)
+            if rows is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return rows
+
+    def _select(self, position, forward, limit):
+        # Буфер содержит все посты с id не меньше id последней записи.
+        oldest = self.entries[-1].id if self.entries else None
+        live = [
+            post for post in self.entries if post.id not in self.deleted]
+        if forward:
+            rows = [
+                post for post in live
+                if position is None or post.id < position][:limit]
+            if len(rows) == limit or self.complete:
+                return rows
+            return None
+        if position is None or not (
+                self.complete or (oldest is not None and position >= oldest)):
+            return None
+        return [post for post in reversed(live) if post.id > position][:limit]
+
+    def _update(self, apply):
+        """Метод меняет буфер функцией apply и присваивает области
+        FEED_SCOPE новую версию. Буфер, устаревший еще до изменения,
+        не трогается: его заново загрузит следующее чтение."""
+        version = get_versions([FEED_SCOPE])[FEED_SCOPE]
+        new_version = bump_versions([FEED_SCOPE])
+        with self.lock:
+            if not self._fresh(version):
+                return
+            apply()
+            self.version = new_version
+            snapshot = self._snapshot()
+        if self.shared is not None:
+            self.shared.set(self.shared_key, snapshot, self.timeout)
+
+    def push(self, posts):
+        """Метод добавляет новые посты в буфер. Транзакции фиксируются
+        не в порядке id, поэтому каждый пост встает на свое место
+        по убыванию id. Самые старые записи вытесняются, и буфер
+        перестает быть полным."""
+        entries = [feed_entry(post) for post in posts]
+        if not self.size or any(entry is None for entry in entries):
+            bump_versions([FEED_SCOPE])
+            return
+
+        def apply():
+            for entry in entries:
+                index = bisect.bisect_left(
+                    self.entries, -entry.id, key=lambda post: -post.id)
+                if (index < len(self.entries)
+                        and self.entries[index].id == entry.id):
+                    continue
+                if len(self.entries) == self.size:
+                    # Пост старше всех записей полного буфера в него
+                    # не входит: его страницы читаются из базы.
+                    if index == self.size:
+                        continue
+                    self.deleted.discard(self.entries.pop().id)
+                    self.complete = False
+                self.entries.insert(index, entry)
+        self._update(apply)
+
+    def delete(self, post_ids):
+        """Метод помечает удаленные посты: запись остается в буфере,
+        но при чтении пропускается."""
+        if not self.size:
+            bump_versions([FEED_SCOPE])
+            return
+        post_ids = set(post_ids)
+
+        def apply():
+            self.deleted.update(
+                post.id for post in self.entries if post.id in post_ids)
+        self._update(apply)
+
+    def push_on_commit(self, posts):
+        posts = list(posts)
+        transaction.on_commit(lambda: self.push(posts))
+
+    def delete_on_commit(self, post_ids):
+        post_ids = list(post_ids)
+        transaction.on_commit(lambda: self.delete(post_ids))
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'warmups': self.warmups,
+                'size': len(self.entries) - len(self.deleted),
+            }
+
+
+def timeline_options():
+    return {
+        'size': settings.FEED_TIMELINE['SIZE'],
+        'timeout': settings.FEED_TIMELINE['TIMEOUT'],
+        'shared_alias': settings.FEED_TIMELINE['SHARED_CACHE_ALIAS'],
+    }
+
+
+timeline = Timeline(**timeline_options())
+
+
+@receiver(setting_changed)
+def reset_timeline(setting, **kwargs):
+    if setting == 'FEED_TIMELINE':
+        timeline.configure(**timeline_options())
+
+
+def timeline_metrics():
+    """Метрики ленты последних постов для /metrics."""
+    stats = timeline.stats()
+    return [
+        ('posts_app_feed_timeline_hits_total', 'counter',
+         'Страницы ленты, отданные из памяти', stats['hits']),
+        ('posts_app_feed_timeline_misses_total', 'counter',
+         'Страницы ленты, прочитанные из базы', stats['misses']),
+        ('posts_app_feed_timeline_warmups_total', 'counter',
+         'Загрузки ленты из базы', stats['warmups']),
+        ('posts_app_feed_timeline_size', 'gauge',
+         'Постов в ленте процесса', stats['size']),
+    ]
+
+
+class TimelinePaginator(KeysetPaginator):
+    """Класс выдает страницы общей ленты (от новых постов к старым).
+    Страница берется из timeline, если буфер содержит все ее посты,
+    иначе читается из базы по тому же курсору."""
+
+    def valid_position(self, position):
+        return type(position) is int
+
+    def get_page(self, cursor=None):
+        forward, position = self.decode_position(cursor)
+        rows = timeline.rows(position, forward, self.per_page + 1)
+        if rows is not None:
+            page = self._page_from_rows(rows, forward, position)
+            if page is not None:
+                return page
+        return super().get_page(cursor)
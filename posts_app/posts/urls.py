@@ -1,14 +1,20 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import async_views, views
+
+# Под ASGI страницы списков обслуживаются async-представлениями.
+list_views = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
-    path('', views.index, name='index'),
+    path('', list_views.index, name='index'),
     path('users/<int:user_id>/posts/',
-         views.user_post_view,
+         list_views.user_post_view,
          name='user_post_view'),
     path('posts/<int:post_id>/delete/', views.post_delete, name='post_delete'),
     path('posts/new/', views.new_post, name='new_post'),
+    path('feed/', views.feed, name='feed'),
+    path('search/', views.post_search, name='post_search'),
     path('404/', views.page_not_found, name='err404'),
     path('500/', views.server_error, name='err500'),
     path('403/', views.forbidden_action, name='err403'),
@@ -1,34 +1,42 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect, render
 
+from posts_app.replicas import read_from_replica
+
+from .cache import FEED_SCOPE, USERS_SCOPE, author_scope, cache_public_page
 from .forms import PostForm
 from .models import Post
+from .pagination import KeysetPaginator
+from .search import SearchPaginator
+from .timeline import TimelinePaginator
 
 User = get_user_model()
 
 
+@cache_public_page(lambda: [USERS_SCOPE])
+@read_from_replica
 def index(request):
     """Функция возвращает объект класса BaseManager (результат SQL-запроса)
     со статьями из БД Posts и возвращает сгенерированную страницу."""
     user_list = User.objects.all()
-    paginator = Paginator(user_list, settings.PAGE_NO)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    paginator = KeysetPaginator(user_list, settings.PAGE_NO)
+    page = paginator.get_page(request.GET.get('cursor'))
     return render(request, 'posts/index.html', {'page': page})
 
 
+@cache_public_page(lambda user_id: [author_scope(user_id)])
+@read_from_replica
 def user_post_view(request, user_id):
     """Функция возвращает объект класса BaseManager (результат SQL-запроса)
     со статьями из БД Posts и возвращает сгенерированную страницу."""
     user = get_object_or_404(User, id=user_id)
-    post_list = user.posts.all()
+    post_list = Post.objects.with_author().filter(user=user)
     is_author = bool(request.user == user)
-    paginator = Paginator(post_list, settings.PAGE_NO)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    paginator = KeysetPaginator(post_list, settings.PAGE_NO)
+    page = paginator.get_page(request.GET.get('cursor'))
 
     return render(
         request,
@@ -37,16 +45,42 @@ def user_post_view(request, user_id):
     )
 
 
+@cache_public_page(lambda: [FEED_SCOPE])
+@read_from_replica
+def feed(request):
+    """Функция возвращает страницу общей ленты: посты всех авторов
+    от новых к старым. Первые страницы берутся из буфера последних
+    постов без запроса к базе."""
+    paginator = TimelinePaginator(Post.objects.for_feed(), settings.PAGE_NO)
+    page = paginator.get_page(request.GET.get('cursor'))
+    return render(request, 'posts/feed.html', {'page': page})
+
+
+def post_search(request):
+    """Функция ищет посты по словам из параметра q и возвращает
+    страницу с результатами, упорядоченными по релевантности."""
+    query = request.GET.get('q', '')
+    paginator = SearchPaginator(
+        Post.objects.with_author(), query, settings.PAGE_NO)
+    page = paginator.get_page(request.GET.get('cursor'))
+    return render(
+        request,
+        'posts/search.html',
+        {'page': page, 'query': query},
+    )
+
+
 @login_required
 def post_delete(request, post_id):
     """Функция обрабатывает запрос на удаление статьи из базы."""
-    post = get_object_or_404(Post, id=post_id)
-    post_user_id = post.user.id
-    if request.user != post.user:
+    post = get_object_or_404(Post.objects.with_author(), id=post_id)
+    if request.user.id != post.user_id:
         return redirect('err403')
     if request.method == 'POST':
-        post.delete()
-        return redirect('user_post_view', user_id=post_user_id)
+        with transaction.atomic():
+            post.delete()
+            User.objects.change_posts_count(post.user_id, -1)
+        return redirect('user_post_view', user_id=post.user_id)
     return render(request, 'posts/post_delete.html', {'post': post})
 
 
@@ -61,7 +95,9 @@ def new_post(request):
     if form.is_valid():
         post = form.save(commit=False)
         post.user = request.user
-        post.save()
+        with transaction.atomic():
+            post.save()
+            User.objects.change_posts_count(post.user_id, 1)
         return redirect('user_post_view', user_id=request.user.id)
     return render(request, 'posts/new.html', {'form': form})
 
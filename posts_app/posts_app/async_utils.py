@@ -0,0 +1,20 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.contrib.auth.models import AnonymousUser
+from django.utils.functional import SimpleLazyObject, empty
+
+
+async def aget_user(request):
+    """Функция загружает пользователя запроса в async-представлении
+    и заменяет им ленивый request.user: обращение к нему из шаблона
+    или декоратора иначе выполнило бы синхронный запрос к базе.
+    Без cookie сессии посетитель анонимный и база не нужна."""
+    user = request.user
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            user = await sync_to_async(get_user)(request)
+        else:
+            user = AnonymousUser()
+        request.user = user
+    return user
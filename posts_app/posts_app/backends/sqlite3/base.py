@@ -0,0 +1,19 @@
+from django.db.backends.sqlite3 import base
+
+from .pragmas import apply_pragmas
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Бэкенд SQLite, который при открытии каждого соединения применяет
+    PRAGMA из OPTIONS['pragmas']: режим журнала WAL, ожидание снятия
+    блокировки, размер кэша страниц, mmap и т.д."""
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        apply_pragmas(conn, self.settings_dict['OPTIONS'].get('pragmas', {}))
+        return conn
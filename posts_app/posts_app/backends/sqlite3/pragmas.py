@@ -0,0 +1,24 @@
+import re
+
+ALLOWED_PRAGMAS = {
+    'journal_mode',
+    'synchronous',
+    'busy_timeout',
+    'cache_size',
+    'mmap_size',
+    'temp_store',
+    'wal_autocheckpoint',
+    'journal_size_limit',
+}
+VALUE_RE = re.compile(r'^-?\w+$')
+
+
+def apply_pragmas(connection, pragmas):
+    """Функция выполняет PRAGMA из словаря {имя: значение} на открытом
+    соединении sqlite3. Имена проверяются по списку разрешенных,
+    значения - по формату, так как PRAGMA не принимает параметры."""
+    for name, value in pragmas.items():
+        value = str(value)
+        if name not in ALLOWED_PRAGMAS or not VALUE_RE.match(value):
+            raise ValueError(f'Недопустимая настройка SQLite: {name}={value}')
+        connection.execute(f'PRAGMA {name} = {value}')
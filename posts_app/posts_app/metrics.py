@@ -0,0 +1,186 @@
+import bisect
+import hmac
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (
+    1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+TEMPLATE_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    """Класс накапливает наблюдения по корзинам с фиксированными
+    границами: памяти нужно столько, сколько корзин, а добавление
+    значения - один бинарный поиск."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            total += count
+            yield bound, total
+
+
+class RequestMetrics:
+    """Класс хранит метрики запросов процесса по имени URL:
+    число ответов по статусам и гистограммы времени ответа,
+    времени в базе, числа SQL-запросов и размера ответа."""
+
+    histograms = (
+        ('posts_app_request_duration_seconds', DURATION_BUCKETS,
+         'Время обработки запроса'),
+        ('posts_app_request_db_seconds', DURATION_BUCKETS,
+         'Время SQL-запросов при обработке запроса'),
+        ('posts_app_request_queries', QUERY_BUCKETS,
+         'Число SQL-запросов на запрос'),
+        ('posts_app_response_size_bytes', SIZE_BUCKETS,
+         'Размер ответа (без потоковых ответов)'),
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.responses = defaultdict(int)
+            self.views = defaultdict(self._new_histograms)
+
+    def _new_histograms(self):
+        return {
+            name: Histogram(buckets)
+            for name, buckets, _ in self.histograms
+        }
+
+    def observe(self, view, status, duration, db_time, queries, size):
+        with self.lock:
+            self.responses[(view, status)] += 1
+            histograms = self.views[view]
+            histograms['posts_app_request_duration_seconds'].observe(
+                duration)
+            histograms['posts_app_request_db_seconds'].observe(db_time)
+            histograms['posts_app_request_queries'].observe(queries)
+            if size is not None:
+                histograms['posts_app_response_size_bytes'].observe(size)
+
+    def render(self):
+        lines = [
+            '# HELP posts_app_responses_total Число ответов',
+            '# TYPE posts_app_responses_total counter',
+        ]
+        with self.lock:
+            for (view, status), count in sorted(self.responses.items()):
+                lines.append(
+                    f'posts_app_responses_total{{view="{view}",'
+                    f'status="{status}"}} {count}')
+            for name, _, description in self.histograms:
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                for view, histograms in sorted(self.views.items()):
+                    histogram = histograms[name]
+                    for bound, total in histogram.cumulative():
+                        lines.append(
+                            f'{name}_bucket{{view="{view}",le="{bound}"}} '
+                            f'{total}')
+                    lines.append(
+                        f'{name}_sum{{view="{view}"}} {histogram.sum}')
+                    lines.append(
+                        f'{name}_count{{view="{view}"}} {histogram.count}')
+        return lines
+
+
+class LabeledHistogram:
+    """Класс хранит гистограммы одной метрики по значениям метки,
+    например время рендеринга по имени шаблона."""
+
+    def __init__(self, name, label, buckets, description):
+        self.name = name
+        self.label = label
+        self.buckets = buckets
+        self.description = description
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.histograms = defaultdict(
+                lambda: Histogram(self.buckets))
+
+    def observe(self, label_value, value):
+        with self.lock:
+            self.histograms[label_value].observe(value)
+
+    def render(self):
+        name, label = self.name, self.label
+        lines = [
+            f'# HELP {name} {self.description}',
+            f'# TYPE {name} histogram',
+        ]
+        with self.lock:
+            for value, histogram in sorted(self.histograms.items()):
+                for bound, total in histogram.cumulative():
+                    lines.append(
+                        f'{name}_bucket{{{label}="{value}",le="{bound}"}} '
+                        f'{total}')
+                lines.append(f'{name}_sum{{{label}="{value}"}} '
+                             f'{histogram.sum}')
+                lines.append(f'{name}_count{{{label}="{value}"}} '
+                             f'{histogram.count}')
+        return lines
+
+
+request_metrics = RequestMetrics()
+template_metrics = LabeledHistogram(
+    'posts_app_template_render_seconds', 'template', TEMPLATE_BUCKETS,
+    'Время рендеринга шаблона')
+_collectors = []
+
+
+def register_collector(collector):
+    """Функция добавляет в /metrics метрики другого модуля. collector -
+    функция без аргументов, которая возвращает список кортежей
+    (имя, тип, описание, значение)."""
+    _collectors.append(collector)
+
+
+def render_metrics():
+    lines = request_metrics.render() + template_metrics.render()
+    for collector in _collectors:
+        for name, kind, description, value in collector():
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.append(f'{name} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """Функция отдает метрики процесса в текстовом формате Prometheus.
+    Если задан settings.METRICS_TOKEN, нужен заголовок
+    Authorization: Bearer <токен>. Каждый воркер gunicorn хранит
+    свои метрики, поэтому Prometheus должен опрашивать воркеры
+    по отдельности или суммировать их."""
+    token = settings.METRICS_TOKEN
+    if token and not hmac.compare_digest(
+            request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
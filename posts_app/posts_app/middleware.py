@@ -0,0 +1,97 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import (iscoroutinefunction, markcoroutinefunction,
+                          sync_to_async)
+from django.conf import settings
+from django.db import connections
+
+from .metrics import request_metrics
+
+slow_request_logger = logging.getLogger('posts_app.slow_requests')
+
+
+class QueryTracker:
+    """Класс считает SQL-запросы и время их выполнения во всех базах
+    через execute_wrapper соединений текущего потока."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.stack = ExitStack()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+    def start(self):
+        for connection in connections.all():
+            self.stack.enter_context(connection.execute_wrapper(self))
+
+    def stop(self):
+        self.stack.close()
+
+
+class MetricsMiddleware:
+    """Middleware записывает для каждого имени URL время ответа,
+    время в базе, число SQL-запросов и размер ответа в метрики
+    процесса (/metrics). Запросы дольше settings.SLOW_REQUEST_THRESHOLD
+    секунд пишутся в лог posts_app.slow_requests. При
+    settings.QUERY_COUNT_HEADER число запросов отдается в заголовке
+    X-Query-Count. Под ASGI счетчик подключается к соединениям в
+    потоке, где async-ORM выполняет запросы этого запроса."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        tracker = QueryTracker()
+        tracker.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            tracker.stop()
+        return self.record(request, response, started, tracker)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        tracker = QueryTracker()
+        await sync_to_async(tracker.start)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(tracker.stop)()
+        return self.record(request, response, started, tracker)
+
+    def record(self, request, response, started, tracker):
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        size = None if response.streaming else len(response.content)
+        request_metrics.observe(
+            view, response.status_code, duration, tracker.duration,
+            tracker.count, size)
+        threshold = settings.SLOW_REQUEST_THRESHOLD
+        if threshold is not None and duration >= threshold:
+            slow_request_logger.warning(
+                'Медленный запрос %s %s: view=%s status=%s '
+                'time=%.3fs db=%.3fs queries=%s size=%s',
+                request.method, request.get_full_path(), view,
+                response.status_code, duration, tracker.duration,
+                tracker.count, size)
+        if settings.QUERY_COUNT_HEADER:
+            response['X-Query-Count'] = str(tracker.count)
+        return response
@@ -0,0 +1,186 @@
+import cProfile
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core import signing
+from django.http import FileResponse, Http404
+from django.shortcuts import render
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_QUERY_PARAM = 'profile'
+SIGNING_SALT = 'posts_app.profiling'
+PROFILE_NAME = re.compile(r'^[\w.-]+\.(prof|collapsed)$')
+UNSAFE_CHARS = re.compile(r'[^\w-]')
+
+
+def make_profile_token():
+    """Функция выдает подписанный токен для заголовка X-Profile.
+    Токен действует settings.PROFILE_TOKEN_MAX_AGE секунд."""
+    return signing.TimestampSigner(salt=SIGNING_SALT).sign('profile')
+
+
+def valid_profile_token(token):
+    try:
+        signing.TimestampSigner(salt=SIGNING_SALT).unsign(
+            token, max_age=settings.PROFILE_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+class StackSampler:
+    """Класс раз в interval секунд снимает стек потока thread_id
+    и считает одинаковые стеки. Результат - строки в формате
+    collapsed для flamegraph: "корень;...;функция число"."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    @staticmethod
+    def label(frame):
+        code = frame.f_code
+        filename = os.path.basename(code.co_filename)
+        return f'{code.co_name} ({filename}:{code.co_firstlineno})'
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self.label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def collapsed(self):
+        return ''.join(
+            f'{stack} {count}\n' for stack, count in self.stacks.items())
+
+
+def profile_files():
+    """Функция возвращает сохраненные профили, новые первыми."""
+    folder = settings.PROFILE_DIR
+    if not os.path.isdir(folder):
+        return []
+    entries = [
+        entry for entry in os.scandir(folder)
+        if entry.is_file() and PROFILE_NAME.match(entry.name)
+    ]
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    return entries
+
+
+def save_profile(name, profiler, sampler):
+    folder = settings.PROFILE_DIR
+    os.makedirs(folder, exist_ok=True)
+    profiler.dump_stats(os.path.join(folder, f'{name}.prof'))
+    with open(os.path.join(folder, f'{name}.collapsed'), 'w') as output:
+        output.write(sampler.collapsed())
+    for entry in profile_files()[settings.PROFILE_MAX_FILES:]:
+        os.remove(entry.path)
+
+
+class ProfilingMiddleware:
+    """Middleware профилирует отдельные запросы: cProfile сохраняет
+    статистику в формате pstats (.prof), а сэмплер стеков - стеки
+    в формате collapsed для flamegraph (.collapsed). Профилируется
+    запрос сотрудника с ?profile=1, запрос с подписанным заголовком
+    X-Profile (токен выдает страница профилей в админке) и каждый
+    settings.PROFILE_SAMPLE_RATE-й в среднем запрос. Под ASGI запросы
+    одного потока перемежаются, поэтому там профилирование отключено."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.get_response(request)
+        if not self.should_profile(request):
+            return self.get_response(request)
+        sampler = StackSampler(
+            threading.get_ident(), settings.PROFILE_SAMPLE_INTERVAL)
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        sampler.start()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+            sampler.stop()
+        elapsed = int((time.perf_counter() - started) * 1000)
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        view = UNSAFE_CHARS.sub('_', view)
+        name = (f'{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}-'
+                f'{view}-{elapsed}ms')
+        save_profile(name, profiler, sampler)
+        response['X-Profile-Name'] = name
+        return response
+
+    @staticmethod
+    def should_profile(request):
+        token = request.headers.get(PROFILE_HEADER)
+        if token and valid_profile_token(token):
+            return True
+        if (request.GET.get(PROFILE_QUERY_PARAM)
+                and request.user.is_authenticated and request.user.is_staff):
+            return True
+        rate = settings.PROFILE_SAMPLE_RATE
+        return bool(rate) and random.randrange(rate) == 0
+
+
+@staff_member_required
+def profile_list(request):
+    """Страница админки со списком профилей и токеном для X-Profile."""
+    profiles = [
+        {
+            'name': entry.name,
+            'size': entry.stat().st_size,
+            'created': datetime.fromtimestamp(entry.stat().st_mtime),
+        }
+        for entry in profile_files()
+    ]
+    return render(request, 'admin/profiles.html', {
+        'title': 'Профили запросов',
+        'profiles': profiles,
+        'header': PROFILE_HEADER,
+        'token': make_profile_token(),
+        'token_max_age': settings.PROFILE_TOKEN_MAX_AGE,
+    })
+
+
+@staff_member_required
+def profile_download(request, name):
+    """Функция отдает файл профиля."""
+    if not PROFILE_NAME.match(name):
+        raise Http404
+    path = os.path.join(settings.PROFILE_DIR, name)
+    if not os.path.isfile(path):
+        raise Http404
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=name)
@@ -0,0 +1,259 @@
+import contextvars
+import itertools
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import (iscoroutinefunction, markcoroutinefunction,
+                          sync_to_async)
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .async_utils import aget_user
+
+PIN_COOKIE = 'primary_pin'
+
+_current_replica = contextvars.ContextVar('current_replica', default=None)
+_primary_only = contextvars.ContextVar('primary_only', default=False)
+_round_robin = {}
+_lag = {}
+_lock = threading.Lock()
+
+
+def _pin_key(user_id):
+    return f'replicas:pin:{user_id}'
+
+
+def _sqlite_mtime(path):
+    # В режиме WAL запись меняет файл -wal, а файл базы - только при
+    # контрольной точке.
+    return max(
+        os.path.getmtime(name) for name in (path, f'{path}-wal')
+        if os.path.exists(name))
+
+
+def replica_lag(alias):
+    """Функция возвращает отставание реплики от основной базы
+    в секундах. Для PostgreSQL - время с последней примененной
+    транзакции, для SQLite - разница времени изменения файлов базы
+    и журнала WAL. Недоступная реплика получает бесконечное
+    отставание."""
+    connection = connections[alias]
+    try:
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT COALESCE(EXTRACT(EPOCH FROM now() - '
+                    'pg_last_xact_replay_timestamp()), 0)')
+                return max(float(cursor.fetchone()[0]), 0.0)
+        primary = connections[DEFAULT_DB_ALIAS].settings_dict['NAME']
+        replica = connection.settings_dict['NAME']
+        return max(_sqlite_mtime(primary) - _sqlite_mtime(replica), 0)
+    except Exception:
+        return math.inf
+
+
+def _cached_lag(alias):
+    now = time.monotonic()
+    with _lock:
+        checked = _lag.get(alias)
+        if checked is not None and checked[0] > now:
+            return checked[1]
+    lag = replica_lag(alias)
+    with _lock:
+        _lag[alias] = (now + settings.REPLICA_LAG_CHECK_INTERVAL, lag)
+    return lag
+
+
+def choose_replica():
+    """Функция выбирает реплику из settings.REPLICA_DATABASES:
+    по кругу (round_robin) или с наименьшим отставанием (least_lag).
+    Возвращает None, если реплик нет или все отстают больше
+    settings.REPLICA_MAX_LAG секунд."""
+    aliases = tuple(settings.REPLICA_DATABASES)
+    if not aliases:
+        return None
+    if settings.REPLICA_SELECTION == 'least_lag':
+        lags = {alias: _cached_lag(alias) for alias in aliases}
+        alias = min(aliases, key=lags.get)
+        return alias if lags[alias] <= settings.REPLICA_MAX_LAG else None
+    with _lock:
+        if aliases not in _round_robin:
+            _round_robin[aliases] = itertools.cycle(aliases)
+        return next(_round_robin[aliases])
+
+
+def is_pinned(request):
+    """Функция проверяет, писал ли пользователь в базу последние
+    settings.REPLICA_STICKY_SECONDS секунд. Такие запросы читают
+    из основной базы, чтобы пользователь сразу видел свои изменения."""
+    if PIN_COOKIE in request.COOKIES:
+        return True
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        user = _token_user(request)
+    return bool(user is not None and cache.get(_pin_key(user.id)))
+
+
+def _token_user(request):
+    """Функция возвращает пользователя по токену из заголовка
+    Authorization или None. Нужна представлениям без авторизации DRF
+    (async-списки API): клиент API, только что писавший в базу,
+    закреплен за основной базой по id пользователя."""
+    if 'HTTP_AUTHORIZATION' not in request.META:
+        return None
+    from rest_framework.exceptions import AuthenticationFailed
+
+    from api.authentication import CachedTokenAuthentication
+    try:
+        credentials = CachedTokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return credentials[0] if credentials else None
+
+
+def pin_to_primary(request, response):
+    """Функция закрепляет пользователя за основной базой после записи:
+    браузеру ставится cookie, а для API-клиентов без cookie запись
+    хранится в кэше по id пользователя."""
+    seconds = settings.REPLICA_STICKY_SECONDS
+    response.set_cookie(PIN_COOKIE, '1', max_age=seconds, httponly=True)
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        cache.set(_pin_key(user.id), True, seconds)
+
+
+def select_replica(request):
+    if _primary_only.get() or is_pinned(request):
+        return None
+    return choose_replica()
+
+
+def start_replica_reads(request):
+    """Функция включает чтение из реплики для текущего запроса
+    и возвращает токен для stop_replica_reads."""
+    return _current_replica.set(select_replica(request))
+
+
+async def astart_replica_reads(request):
+    """Асинхронный вариант start_replica_reads. Проверка закрепления
+    за основной базой читает кэш и проверяет токен авторизации, а замер
+    отставания реплик обращается к базе, поэтому реплика выбирается
+    в потоке."""
+    await aget_user(request)
+    if not settings.REPLICA_DATABASES:
+        return _current_replica.set(None)
+    alias = await sync_to_async(select_replica)(request)
+    return _current_replica.set(alias)
+
+
+def stop_replica_reads(token):
+    _current_replica.reset(token)
+
+
+def current_replica():
+    return _current_replica.get()
+
+
+@contextmanager
+def primary_reads():
+    """Контекстный менеджер направляет чтение внутри блока в основную
+    базу, даже если представлению разрешено читать из реплики."""
+    primary_token = _primary_only.set(True)
+    replica_token = _current_replica.set(None)
+    try:
+        yield
+    finally:
+        _current_replica.reset(replica_token)
+        _primary_only.reset(primary_token)
+
+
+def use_replica(queryset):
+    """Функция привязывает queryset к реплике текущего запроса, чтобы
+    потоковый ответ читал из нее и после выхода из представления."""
+    alias = current_replica()
+    return queryset.using(alias) if alias else queryset
+
+
+def read_from_replica(view):
+    """Декоратор разрешает представлению читать из реплики.
+    Подходит и для async-представлений."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await view(request, *args, **kwargs)
+            token = await astart_replica_reads(request)
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                stop_replica_reads(token)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+        token = start_replica_reads(request)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            stop_replica_reads(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Роутер направляет чтение в реплику только внутри представлений,
+    которым это разрешено (read_from_replica, ReplicaReadMixin).
+    Все остальные запросы, запись и миграции идут в основную базу."""
+
+    def db_for_read(self, model, **hints):
+        return current_replica()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.REPLICA_DATABASES
+
+
+class ReplicaPinMiddleware:
+    """Middleware закрепляет пользователя за основной базой после
+    успешного изменяющего запроса (POST, PUT, PATCH, DELETE).
+    Работает и под WSGI, и под ASGI без переключения в поток."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self.should_pin(request, response):
+            pin_to_primary(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self.should_pin(request, response):
+            await sync_to_async(pin_to_primary)(request, response)
+        return response
+
+    @staticmethod
+    def should_pin(request, response):
+        return bool(
+            settings.REPLICA_DATABASES
+            and request.method not in ('GET', 'HEAD', 'OPTIONS')
+            and response.status_code < 400)
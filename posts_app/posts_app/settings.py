@@ -11,7 +11,10 @@ os.makedirs(BASE_DIR / 'app_db', exist_ok=True)
 
 SECRET_KEY = os.getenv('SECRET_KEY', default='insecure')
 DEBUG = False
-ALLOWED_HOSTS = ['*']
+# Хосты сайта через запятую. Страницы кэшируются только для хостов,
+# указанных без маски (posts.cache.cache_host).
+ALLOWED_HOSTS = os.getenv(
+    'ALLOWED_HOSTS', default='localhost,127.0.0.1,[::1]').split(',')
 INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
@@ -28,25 +31,73 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'posts_app.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'posts_app.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'posts_app.replicas.ReplicaPinMiddleware',
+    'users.middleware.PasswordHashingBusyMiddleware',
 ]
 
+# Метрики запросов (/metrics). Если задан METRICS_TOKEN, Prometheus
+# передает его в заголовке Authorization: Bearer <токен>.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', default='')
+# Запросы дольше порога (в секундах) пишутся в лог
+# posts_app.slow_requests; пустое значение отключает лог.
+SLOW_REQUEST_THRESHOLD = (
+    float(os.getenv('SLOW_REQUEST_THRESHOLD'))
+    if os.getenv('SLOW_REQUEST_THRESHOLD') else None)
+# Заголовок X-Query-Count с числом SQL-запросов ответа. Нужен бенчмаркам
+# (benchmarks.run), в обычной работе выключен.
+QUERY_COUNT_HEADER = bool(os.getenv('QUERY_COUNT_HEADER', default=''))
+
+# Профилирование отдельных запросов (posts_app.profiling). Профили
+# сохраняются в PROFILE_DIR, хранятся последние PROFILE_MAX_FILES файлов.
+# PROFILE_SAMPLE_RATE = N профилирует в среднем каждый N-й запрос,
+# 0 - только запросы с ?profile=1 от сотрудника или с заголовком X-Profile.
+PROFILE_DIR = os.getenv('PROFILE_DIR') or BASE_DIR / 'profiles'
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', default=200))
+PROFILE_SAMPLE_RATE = int(os.getenv('PROFILE_SAMPLE_RATE', default=0))
+PROFILE_SAMPLE_INTERVAL = float(
+    os.getenv('PROFILE_SAMPLE_INTERVAL', default=0.001))
+PROFILE_TOKEN_MAX_AGE = int(os.getenv('PROFILE_TOKEN_MAX_AGE', default=3600))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'slow_requests': {
+            'class': 'logging.StreamHandler',
+        } if not os.getenv('SLOW_REQUEST_LOG') else {
+            'class': 'logging.FileHandler',
+            'filename': os.getenv('SLOW_REQUEST_LOG'),
+        },
+    },
+    'loggers': {
+        'posts_app.slow_requests': {
+            'handlers': ['slow_requests'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 ROOT_URLCONF = 'posts_app.urls'
 
 TEMPLATES_DIR = BASE_DIR.joinpath('templates')
 INCLUDES = TEMPLATES_DIR.joinpath('posts/includes')
 
+# Шаблоны компилируются один раз на процесс (cached.Loader), время
+# рендеринга пишется в метрики (posts_app.template_backend).
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'posts_app.template_backend.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR, INCLUDES],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -54,18 +105,107 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'posts_app.wsgi.application'
 
-DATABASES = {
+DB_ENGINE = os.getenv('DB_ENGINE', default='sqlite')
+
+# WAL позволяет читателям не ждать писателя, busy_timeout заставляет
+# соединение ждать снятия блокировки вместо ошибки "database is locked".
+# Пустое значение SQLITE_TUNING отключает настройку.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', default=5000)),
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', default=-20000)),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', default=268435456)),
+    'temp_store': 'MEMORY',
+} if os.getenv('SQLITE_TUNING', default='1') else {}
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', default='posts_app'),
+            'USER': os.getenv('POSTGRES_USER', default='posts_app'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', default=''),
+            'HOST': os.getenv('DB_HOST', default='db'),
+            'PORT': os.getenv('DB_PORT', default='5432'),
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+            'CONN_HEALTH_CHECKS': True,
+            # PgBouncer в режиме transaction не поддерживает серверные
+            # курсоры, поэтому при работе через него они отключаются.
+            'DISABLE_SERVER_SIDE_CURSORS': (
+                os.getenv('DB_POOLER', default='') == 'pgbouncer'),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'posts_app.backends.sqlite3',
+            'NAME': os.getenv(
+                'SQLITE_PATH', default=BASE_DIR / 'app_db' / 'posts_app.db'),
+            'OPTIONS': {'pragmas': SQLITE_PRAGMAS},
+        }
+    }
+
+# Реплики только для чтения: хосты для PostgreSQL или пути к файлам
+# для SQLite через запятую. Из реплик читают только страницы списков.
+DB_REPLICAS = [
+    replica for replica in os.getenv('DB_REPLICAS', default='').split(',')
+    if replica
+]
+for number, replica in enumerate(DB_REPLICAS, start=1):
+    location = (
+        {'HOST': replica} if DB_ENGINE == 'postgresql'
+        else {'NAME': BASE_DIR / replica})
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        **location,
+        'TEST': {'MIRROR': 'default'},
+    }
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['posts_app.replicas.ReplicaRouter']
+# round_robin - по кругу, least_lag - реплика с наименьшим отставанием.
+REPLICA_SELECTION = os.getenv('REPLICA_SELECTION', default='round_robin')
+REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG', default=10))
+REPLICA_LAG_CHECK_INTERVAL = 1
+# Сколько секунд после записи пользователь читает из основной базы;
+# столько же после изменения области кэша из основной базы строятся
+# кэшируемые страницы (posts.cache.fill_reads).
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', default=5))
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+# Кэш ответов хранит и версии данных, поэтому должен быть общим для
+# всех процессов; locmem годится только для одного процесса.
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'app_db' / 'posts_app.db',
+        'BACKEND': CACHE_BACKENDS[
+            os.getenv('CACHE_BACKEND', default='locmem')],
+        'LOCATION': os.getenv('CACHE_LOCATION', default='posts_app'),
     }
 }
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', default=300))
+# Источник версий для ETag списков API: 'version' - счетчики в кэше,
+# 'data' - max(id) и количество строк из базы (posts.cache.data_versions).
+API_ETAG_SOURCE = os.getenv('API_ETAG_SOURCE', default='version')
+# Отрендеренные карточки пользователей и постов (posts.fragments).
+FRAGMENT_CACHE_TIMEOUT = int(
+    os.getenv('FRAGMENT_CACHE_TIMEOUT', default=RESPONSE_CACHE_TIMEOUT))
 
 AUTH_USER_MODEL = 'users.User'
 AUTH_PASSWORD_VALIDATORS = [
@@ -83,6 +223,41 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Алгоритм хэширования паролей: pbkdf2, scrypt или argon2 (нужен пакет
+# argon2-cffi). Остальные алгоритмы списка только проверяют старые
+# хэши: при входе такой хэш пересчитывается выбранным алгоритмом.
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', default='pbkdf2')
+PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'users.hashers.TunedPBKDF2PasswordHasher',
+    'scrypt': 'users.hashers.TunedScryptPasswordHasher',
+    'argon2': 'users.hashers.TunedArgon2PasswordHasher',
+}
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_CLASSES[PASSWORD_HASHER],
+    *(hasher for name, hasher in PASSWORD_HASHER_CLASSES.items()
+      if name != PASSWORD_HASHER),
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.getenv('PASSWORD_PBKDF2_ITERATIONS', default=600000))
+PASSWORD_SCRYPT_WORK_FACTOR = int(
+    os.getenv('PASSWORD_SCRYPT_WORK_FACTOR', default=2 ** 14))
+PASSWORD_ARGON2_TIME_COST = int(
+    os.getenv('PASSWORD_ARGON2_TIME_COST', default=2))
+PASSWORD_ARGON2_MEMORY_COST = int(
+    os.getenv('PASSWORD_ARGON2_MEMORY_COST', default=102400))
+PASSWORD_ARGON2_PARALLELISM = int(
+    os.getenv('PASSWORD_ARGON2_PARALLELISM', default=8))
+# Пул хэширования паролей (users.hashing): пусто - хэширование в потоке
+# запроса, thread или process - в пуле из PASSWORD_HASHING_WORKERS
+# потоков или процессов. Запрос, не дождавшийся места в пуле за
+# PASSWORD_HASHING_WAIT секунд, получает ответ 503.
+PASSWORD_HASHING_POOL = os.getenv('PASSWORD_HASHING_POOL', default='')
+PASSWORD_HASHING_WORKERS = int(
+    os.getenv('PASSWORD_HASHING_WORKERS', default=2))
+PASSWORD_HASHING_WAIT = float(
+    os.getenv('PASSWORD_HASHING_WAIT', default=1.0))
+
 LANGUAGE_CODE = 'ru'
 TIME_ZONE = 'UTC'
 USE_I18N = True
@@ -93,15 +268,76 @@ STATIC_ROOT = BASE_DIR / 'static'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+PAGE_NO = 10
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
+    'PAGE_SIZE': PAGE_NO,
+}
+
+# Кэш токенов (api.authentication): LOCAL_TIMEOUT - время жизни токена
+# в памяти процесса. Столько секунд другие воркеры принимают токен после
+# выхода, смены пароля или блокировки пользователя. TIMEOUT - время
+# жизни записи в общем кэше SHARED_CACHE_ALIAS, отзыв удаляет ее сразу.
+TOKEN_AUTH_CACHE = {
+    'MAX_SIZE': int(os.getenv('TOKEN_AUTH_CACHE_SIZE', default=10000)),
+    'TIMEOUT': int(os.getenv('TOKEN_AUTH_CACHE_TIMEOUT', default=60)),
+    'LOCAL_TIMEOUT': int(
+        os.getenv('TOKEN_AUTH_CACHE_LOCAL_TIMEOUT', default=5)),
+    'SHARED_CACHE_ALIAS': os.getenv('TOKEN_AUTH_SHARED_CACHE') or None,
+}
+
+# Общая лента последних постов (posts.timeline): размер буфера в памяти
+# процесса, время жизни буфера и имя общего кэша из CACHES для снимка
+# буфера (необязательно). При FEED_TIMELINE_SIZE=0 лента читается из базы.
+FEED_TIMELINE = {
+    'SIZE': int(os.getenv('FEED_TIMELINE_SIZE', default=1000)),
+    'TIMEOUT': int(os.getenv('FEED_TIMELINE_TIMEOUT', default=60)),
+    'SHARED_CACHE_ALIAS': os.getenv('FEED_TIMELINE_SHARED_CACHE') or None,
 }
 
+# Лента подписок (posts.feeds): посты авторов, у которых меньше
+# FEED_FANOUT_THRESHOLD подписчиков, рассылаются в ленты подписчиков при
+# публикации, посты популярных авторов читаются при запросе ленты.
+# Рассылка выполняется фоновой задачей.
+FEED_FANOUT_THRESHOLD = int(os.getenv('FEED_FANOUT_THRESHOLD', default=1000))
+FEED_FANOUT_BATCH_SIZE = int(os.getenv('FEED_FANOUT_BATCH_SIZE', default=1000))
+# Сколько последних постов автора попадает в ленту нового подписчика.
+FEED_BACKFILL_POSTS = int(os.getenv('FEED_BACKFILL_POSTS', default=100))
+
+# Очередь фоновых задач (posts.tasks) в таблице posts_task. Задачи
+# выполняет команда manage.py run_workers: TASK_WORKERS воркеров в пуле
+# потоков или процессов (TASK_WORKER_POOL), каждый берет до
+# TASK_BATCH_SIZE готовых задач за раз. Задача с ошибкой повторяется
+# через TASK_RETRY_DELAY * 2 ** (попытка - 1) секунд, после
+# TASK_MAX_ATTEMPTS попыток остается в таблице со статусом failed.
+# Захваченная задача, не выполненная за TASK_LOCK_TIMEOUT секунд
+# (воркер упал), возвращается в очередь. При TASK_QUEUE_EAGER задачи
+# выполняются в процессе приложения сразу после фиксации транзакции.
+TASK_QUEUE_EAGER = bool(os.getenv('TASK_QUEUE_EAGER', default=''))
+TASK_WORKERS = int(os.getenv('TASK_WORKERS', default=2))
+TASK_WORKER_POOL = os.getenv('TASK_WORKER_POOL', default='thread')
+TASK_BATCH_SIZE = int(os.getenv('TASK_BATCH_SIZE', default=100))
+TASK_MAX_ATTEMPTS = int(os.getenv('TASK_MAX_ATTEMPTS', default=5))
+TASK_RETRY_DELAY = float(os.getenv('TASK_RETRY_DELAY', default=10))
+TASK_LOCK_TIMEOUT = int(os.getenv('TASK_LOCK_TIMEOUT', default=300))
+TASK_POLL_INTERVAL = float(os.getenv('TASK_POLL_INTERVAL', default=1.0))
+
+# Async-представления списков для запуска под ASGI (uvicorn).
+ASYNC_VIEWS = bool(os.getenv('ASYNC_VIEWS', default=''))
+
+STREAM_CHUNK_SIZE = 2000
+BULK_MAX_ITEMS = 10000
+# Наибольший размер тела NDJSON для /api/posts/bulk/.
+BULK_MAX_BYTES = 10 * 1024 * 1024
+BULK_BATCH_SIZE = 500
+
 CORS_ORIGIN_ALLOW_ALL = True
 CORS_URLS_REGEX = r'^/api/.*$'
 CSRF_TRUSTED_ORIGINS = os.getenv(
@@ -109,6 +345,5 @@ CSRF_TRUSTED_ORIGINS = os.getenv(
     default='http://127.0.0.1:8000'
 ).split(',')
 
-PAGE_NO = 10
 LOGIN_URL = reverse_lazy('login')
 LOGIN_REDIRECT_URL = reverse_lazy('index')
@@ -0,0 +1,37 @@
+import time
+
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+from .metrics import template_metrics
+
+
+class TimedTemplate(Template):
+    """Шаблон, который записывает время рендеринга в метрику
+    posts_app_template_render_seconds под своим именем."""
+
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            template_metrics.observe(
+                self.template.origin.template_name or 'string',
+                time.perf_counter() - started)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Бэкенд шаблонов Django, который замеряет рендеринг шаблонов,
+    загруженных через него: страниц из render() и карточек из
+    кэша фрагментов. Вложенные {% include %} входят во время
+    шаблона, который их включает."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(
+                self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
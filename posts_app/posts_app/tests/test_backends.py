@@ -0,0 +1,38 @@
+import sqlite3
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from posts_app.backends.sqlite3.pragmas import apply_pragmas
+
+
+class SQLitePragmasTests(SimpleTestCase):
+
+    def test_apply_pragmas_rejects_unknown_settings(self):
+        """Неизвестные PRAGMA и значения с лишними символами
+        не выполняются."""
+        sqlite_connection = sqlite3.connect(':memory:')
+        invalid = [
+            {'writable_schema': 'ON'},
+            {'cache_size': '1; DROP TABLE posts_post'},
+        ]
+        for pragmas in invalid:
+            with self.subTest(pragmas=pragmas):
+                with self.assertRaises(ValueError):
+                    apply_pragmas(sqlite_connection, pragmas)
+
+
+@skipUnless(connection.vendor == 'sqlite' and settings.SQLITE_PRAGMAS,
+            'Только для SQLite с включенной настройкой PRAGMA')
+class SQLiteBackendTests(TestCase):
+
+    def test_connection_uses_configured_pragmas(self):
+        """Соединение Django открывается с PRAGMA из настроек."""
+        pragmas = settings.SQLITE_PRAGMAS
+        with connection.cursor() as cursor:
+            for name in ('busy_timeout', 'cache_size'):
+                with self.subTest(name=name):
+                    cursor.execute(f'PRAGMA {name}')
+                    self.assertEqual(cursor.fetchone()[0], pragmas[name])
@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import (Client, RequestFactory, TestCase,
+                         override_settings)
+from django.urls import reverse
+
+from posts_app.metrics import Histogram, request_metrics
+from posts_app.middleware import MetricsMiddleware
+
+User = get_user_model()
+
+
+class MetricsMiddlewareTests(TestCase):
+
+    def setUp(self):
+        request_metrics.clear()
+
+    @override_settings(QUERY_COUNT_HEADER=True)
+    def test_header_contains_number_of_queries(self):
+        """В заголовке X-Query-Count передается число SQL-запросов,
+        выполненных представлением."""
+        def view(request):
+            User.objects.count()
+            User.objects.exists()
+            return HttpResponse()
+
+        response = MetricsMiddleware(view)(RequestFactory().get('/'))
+        self.assertEqual(response['X-Query-Count'], '2')
+
+    def test_metrics_endpoint_reports_views(self):
+        """/metrics отдает метрики по имени URL в формате Prometheus."""
+        client = Client()
+        client.get(reverse('index'))
+        response = client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        content = response.content.decode()
+        expected = (
+            'posts_app_responses_total{view="index",status="200"} 1',
+            'posts_app_request_queries_count{view="index"} 1',
+            'posts_app_token_cache_hits_total',
+        )
+        for line in expected:
+            with self.subTest(line=line):
+                self.assertIn(line, content)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_endpoint_checks_token(self):
+        """С METRICS_TOKEN метрики отдаются только с токеном."""
+        url = reverse('metrics')
+        self.assertEqual(Client().get(url).status_code, 403)
+        response = Client().get(url, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(SLOW_REQUEST_THRESHOLD=0)
+    def test_slow_request_is_logged(self):
+        """Запрос дольше порога пишется в лог медленных запросов."""
+        with self.assertLogs('posts_app.slow_requests', 'WARNING') as logs:
+            Client().get(reverse('index'))
+        self.assertIn('view=index', logs.output[0])
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Корзины гистограммы накопительные, последняя - +Inf."""
+        histogram = Histogram((1, 10))
+        for value in (0.5, 5, 50):
+            histogram.observe(value)
+        self.assertEqual(
+            list(histogram.cumulative()), [(1, 1), (10, 2), ('+Inf', 3)])
@@ -0,0 +1,94 @@
+import os
+import pstats
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts_app.profiling import make_profile_token
+
+User = get_user_model()
+
+
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(
+            name='Staff', email='staff@test.test', is_staff=True)
+        cls.user = User.objects.create_user(
+            name='UserOne', email='user_one@test.test')
+
+    def setUp(self):
+        cache.clear()
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.enterContext(override_settings(
+            PROFILE_DIR=self.folder, PROFILE_SAMPLE_RATE=0))
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def saved_files(self):
+        return sorted(os.listdir(self.folder))
+
+    def test_staff_query_flag_saves_profile(self):
+        """Запрос сотрудника с ?profile=1 сохраняет файлы .prof
+        и .collapsed, имя профиля возвращается в заголовке."""
+        response = self.staff_client.get(
+            reverse('index'), {'profile': '1'})
+        name = response['X-Profile-Name']
+        self.assertIn('index', name)
+        self.assertEqual(
+            self.saved_files(), [f'{name}.collapsed', f'{name}.prof'])
+        stats = pstats.Stats(os.path.join(self.folder, f'{name}.prof'))
+        self.assertTrue(stats.total_calls)
+
+    def test_query_flag_ignored_for_non_staff(self):
+        """Параметр ?profile=1 от обычного пользователя и гостя
+        игнорируется."""
+        client = Client()
+        client.get(reverse('index'), {'profile': '1'})
+        client.force_login(self.user)
+        response = client.get(reverse('index'), {'profile': '1'})
+        self.assertNotIn('X-Profile-Name', response)
+        self.assertEqual(self.saved_files(), [])
+
+    def test_signed_header_saves_profile(self):
+        """Подписанный токен в заголовке X-Profile включает профилирование,
+        поддельный - нет."""
+        Client().get(reverse('index'), HTTP_X_PROFILE='profile:forged:sig')
+        self.assertEqual(self.saved_files(), [])
+        response = Client().get(
+            reverse('index'), HTTP_X_PROFILE=make_profile_token())
+        self.assertIn('X-Profile-Name', response)
+        self.assertEqual(len(self.saved_files()), 2)
+
+    def test_sample_rate(self):
+        """При PROFILE_SAMPLE_RATE=1 профилируется каждый запрос,
+        в папке остаются последние PROFILE_MAX_FILES файлов."""
+        with override_settings(PROFILE_SAMPLE_RATE=1, PROFILE_MAX_FILES=2):
+            for _ in range(3):
+                response = Client().get(reverse('index'))
+                self.assertIn('X-Profile-Name', response)
+        self.assertEqual(len(self.saved_files()), 2)
+
+    def test_profile_list_and_download(self):
+        """Страница профилей доступна только сотрудникам и отдает
+        файлы по ссылкам, имена вне папки профилей не принимаются."""
+        name = self.staff_client.get(
+            reverse('index'), {'profile': '1'})['X-Profile-Name']
+        response = Client().get(reverse('profile_list'))
+        self.assertEqual(response.status_code, 302)
+        response = self.staff_client.get(reverse('profile_list'))
+        self.assertContains(response, f'{name}.prof')
+        response = self.staff_client.get(
+            reverse('profile_download', args=[f'{name}.collapsed']))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment', response['Content-Disposition'])
+        for bad_name in ('..%2Fdb.sqlite3', 'missing.prof', 'settings.py'):
+            response = self.staff_client.get(
+                reverse('profile_list') + bad_name)
+            self.assertEqual(response.status_code, 404)
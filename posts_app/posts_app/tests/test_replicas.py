@@ -0,0 +1,125 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.cache import USERS_SCOPE, bump_versions
+from posts_app import replicas
+
+User = get_user_model()
+
+
+@override_settings(
+    REPLICA_DATABASES=['replica1', 'replica2'],
+    REPLICA_SELECTION='round_robin',
+    REPLICA_MAX_LAG=10,
+)
+class ReplicaRouterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            name='UserOne', email='user_one@test.test')
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        replicas._lag.clear()
+        cache.clear()
+
+    def get_request(self, user=None, **cookies):
+        request = self.factory.get('/')
+        request.COOKIES.update(cookies)
+        request.user = user or AnonymousUser()
+        return request
+
+    def read_alias(self, request):
+        token = replicas.start_replica_reads(request)
+        try:
+            return User.objects.all().db
+        finally:
+            replicas.stop_replica_reads(token)
+
+    def test_reads_go_to_primary_outside_replica_views(self):
+        """Вне представлений списков чтение идет в основную базу,
+        запись - всегда в основную."""
+        self.assertEqual(User.objects.all().db, 'default')
+        token = replicas.start_replica_reads(self.get_request())
+        try:
+            self.assertEqual(
+                replicas.ReplicaRouter().db_for_write(User), 'default')
+        finally:
+            replicas.stop_replica_reads(token)
+
+    def test_round_robin_uses_all_replicas(self):
+        """Реплики выбираются по очереди."""
+        aliases = {self.read_alias(self.get_request()) for _ in range(4)}
+        self.assertEqual(aliases, {'replica1', 'replica2'})
+
+    @override_settings(REPLICA_SELECTION='least_lag')
+    def test_least_lag_skips_lagging_replicas(self):
+        """Выбирается реплика с наименьшим отставанием, а если все
+        отстают больше REPLICA_MAX_LAG - основная база."""
+        cases = (
+            ({'replica1': 5, 'replica2': 1}, 'replica2'),
+            ({'replica1': 20, 'replica2': 30}, 'default'),
+        )
+        for lags, expected in cases:
+            replicas._lag.clear()
+            with self.subTest(lags=lags):
+                with mock.patch.object(
+                        replicas, 'replica_lag', side_effect=lags.get):
+                    self.assertEqual(
+                        self.read_alias(self.get_request()), expected)
+
+    def test_write_pins_user_to_primary(self):
+        """После изменяющего запроса пользователь читает из основной
+        базы: браузер - по cookie, API-клиент - по записи в кэше."""
+        request = self.factory.post('/')
+        request.user = self.user
+        middleware = replicas.ReplicaPinMiddleware(
+            lambda request: HttpResponse())
+        response = middleware(request)
+        self.assertIn(replicas.PIN_COOKIE, response.cookies)
+        self.assertEqual(
+            self.read_alias(
+                self.get_request(**{replicas.PIN_COOKIE: '1'})),
+            'default')
+        self.assertEqual(
+            self.read_alias(self.get_request(user=self.user)), 'default')
+
+    def test_fresh_pages_are_filled_from_primary(self):
+        """Вскоре после изменения области кэшируемая страница строится
+        из основной базы, а не из реплики, которая могла отстать."""
+        chosen = []
+
+        def choose_replica():
+            chosen.append('replica1')
+            return 'replica1'
+
+        bump_versions([USERS_SCOPE])
+        with mock.patch.object(
+                replicas, 'choose_replica', side_effect=choose_replica):
+            for url in (reverse('index'), reverse('api-user-list')):
+                with self.subTest(url=url):
+                    self.assertEqual(self.client.get(url).status_code, 200)
+        # Страница кэшируется без обращения к реплике: реплики
+        # replica1 в тестах нет, и чтение из нее завершилось бы ошибкой.
+        self.assertEqual(len(chosen), 1)
+
+    def test_sqlite_lag_includes_wal(self):
+        """Для SQLite в режиме WAL время изменения базы учитывает
+        файл -wal: запись меняет только его."""
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'db.sqlite3')
+            for name, mtime in ((path, 100), (f'{path}-wal', 200)):
+                open(name, 'w').close()
+                os.utime(name, (mtime, mtime))
+            self.assertEqual(replicas._sqlite_mtime(path), 200)
+            os.remove(f'{path}-wal')
+            self.assertEqual(replicas._sqlite_mtime(path), 100)
@@ -1,8 +1,15 @@
 from django.contrib import admin
 from django.urls import include, path
 
+from .metrics import metrics_view
+from .profiling import profile_download, profile_list
+
 urlpatterns = [
+    path('admin/profiles/', profile_list, name='profile_list'),
+    path('admin/profiles/<str:name>', profile_download,
+         name='profile_download'),
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('auth/', include('users.urls')),
     path('api/', include('api.urls')),
     path('', include('posts.urls')),
@@ -48,6 +48,7 @@ class MyUserAdmin(UserAdmin):
         'id',
         'email',
         'name',
+        'posts_count',
         'is_staff',
     )
     list_filter = ('email',)
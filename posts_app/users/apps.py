@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from posts_app.metrics import register_collector
+
+        from .hashing import hashing_metrics
+        register_collector(hashing_metrics)
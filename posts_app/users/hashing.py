@@ -0,0 +1,109 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import (check_password, is_password_usable,
+                                         make_password)
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+EXECUTORS = {'thread': ThreadPoolExecutor, 'process': ProcessPoolExecutor}
+
+
+class PasswordHashingBusy(Exception):
+    """Все места пула хэширования заняты дольше
+    settings.PASSWORD_HASHING_WAIT секунд."""
+
+
+def _verify(password, encoded):
+    """Функция проверяет пароль и сообщает, нужно ли пересчитать хэш
+    (сменился алгоритм или его параметры). Выполняется в пуле, поэтому
+    возвращает результат, а не сохраняет пользователя сама."""
+    updated = []
+    valid = check_password(password, encoded, setter=updated.append)
+    return valid, bool(updated)
+
+
+class PasswordHashingPool:
+    """Класс ограничивает число одновременных хэширований паролей
+    в процессе. При settings.PASSWORD_HASHING_POOL = 'thread' или
+    'process' хэширование выполняется в пуле из
+    settings.PASSWORD_HASHING_WORKERS потоков или процессов. Запрос,
+    который не дождался места в пуле за settings.PASSWORD_HASHING_WAIT
+    секунд, получает PasswordHashingBusy: всплеск входов не занимает
+    все потоки воркера ожиданием медленного хэша."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+        self.slots = None
+        self.active = 0
+        self.rejected = 0
+
+    def start(self):
+        with self.lock:
+            if self.executor is None:
+                workers = settings.PASSWORD_HASHING_WORKERS
+                self.slots = threading.BoundedSemaphore(workers)
+                self.executor = EXECUTORS[settings.PASSWORD_HASHING_POOL](
+                    workers)
+        return self.executor
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+            self.executor = None
+
+    def run(self, function, *args):
+        if not settings.PASSWORD_HASHING_POOL:
+            return function(*args)
+        executor = self.start()
+        slots = self.slots
+        if not slots.acquire(timeout=settings.PASSWORD_HASHING_WAIT):
+            with self.lock:
+                self.rejected += 1
+            raise PasswordHashingBusy
+        with self.lock:
+            self.active += 1
+        try:
+            return executor.submit(function, *args).result()
+        finally:
+            with self.lock:
+                self.active -= 1
+            slots.release()
+
+
+hashing_pool = PasswordHashingPool()
+
+
+@receiver(setting_changed)
+def reset_hashing_pool(setting, **kwargs):
+    if setting.startswith('PASSWORD_HASHING_'):
+        hashing_pool.shutdown()
+
+
+def hash_password(password):
+    """Функция хэширует пароль алгоритмом из PASSWORD_HASHERS через
+    пул. Непригодный пароль (None) хэшировать не нужно."""
+    if password is None:
+        return make_password(None)
+    return hashing_pool.run(make_password, password)
+
+
+def verify_password(password, encoded):
+    """Функция возвращает пару (пароль верен, хэш нужно пересчитать)."""
+    if password is None or not is_password_usable(encoded):
+        return False, False
+    return hashing_pool.run(_verify, password, encoded)
+
+
+def hashing_metrics():
+    """Метрики пула хэширования паролей для /metrics."""
+    return [
+        ('posts_app_password_hashing_active', 'gauge',
+         'Хэширований пароля в пуле сейчас', hashing_pool.active),
+        ('posts_app_password_hashing_rejected_total', 'counter',
+         'Запросов, не дождавшихся места в пуле хэширования',
+         hashing_pool.rejected),
+    ]
@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Команда пересчитывает счетчики постов у всех пользователей.
+    Нужна для исправления расхождений после импорта данных."""
+
+    help = 'Пересчитывает поле posts_count у всех пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Сколько пользователей обновлять одним запросом',
+        )
+
+    def handle(self, *args, **options):
+        updated = User.objects.rebuild_posts_count(options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитаны счетчики: {updated}'))
@@ -0,0 +1,23 @@
+from django.http import HttpResponse, JsonResponse
+from django.utils.deprecation import MiddlewareMixin
+
+from .hashing import PasswordHashingBusy
+
+BUSY_MESSAGE = 'Сервер перегружен входами, повторите попытку позже.'
+
+
+class PasswordHashingBusyMiddleware(MiddlewareMixin):
+    """Middleware отвечает 503 с заголовком Retry-After, если пул
+    хэширования паролей занят. Клиентам API ответ отдается в JSON."""
+
+    retry_after = 1
+
+    def process_exception(self, request, exception):
+        if not isinstance(exception, PasswordHashingBusy):
+            return None
+        if request.path.startswith('/api/'):
+            response = JsonResponse({'detail': BUSY_MESSAGE}, status=503)
+        else:
+            response = HttpResponse(BUSY_MESSAGE, status=503)
+        response['Retry-After'] = str(self.retry_after)
+        return response
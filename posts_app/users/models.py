@@ -1,9 +1,12 @@
 from django.apps import apps
-from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import AbstractUser, UserManager
-from django.db.models import CharField, EmailField
+from django.db.models import (CharField, Count, EmailField, F, Max,
+                              OuterRef, PositiveIntegerField, Subquery)
+from django.db.models.functions import Coalesce, Greatest
 from django.utils.translation import gettext_lazy as _
 
+from .hashing import hash_password, verify_password
+
 
 class CustomUserManager(UserManager):
     """Класс для обработки операций с моделью User. Данный класс
@@ -20,7 +23,7 @@ class CustomUserManager(UserManager):
             self.model._meta.app_label, self.model._meta.object_name)
 
         user = self.model(email=email, **extra_fields)
-        user.password = make_password(password)
+        user.password = hash_password(password)
         user.save(using=self._db)
         return user
 
@@ -40,6 +43,40 @@ class CustomUserManager(UserManager):
 
         return self._create_user(email, password, **extra_fields)
 
+    def change_posts_count(self, user_id, delta):
+        """Метод атомарно меняет счетчик постов пользователя
+        на delta одним UPDATE, без чтения строки в память.
+        Счетчик, разошедшийся с таблицей постов, не уходит ниже нуля."""
+        return self.filter(id=user_id).update(
+            posts_count=Greatest(F('posts_count') + delta, 0))
+
+    def change_followers_count(self, user_id, delta):
+        """Метод атомарно меняет счетчик подписчиков пользователя
+        так же, как change_posts_count меняет счетчик постов."""
+        return self.filter(id=user_id).update(
+            followers_count=Greatest(F('followers_count') + delta, 0))
+
+    def rebuild_posts_count(self, batch_size=10000):
+        """Метод пересчитывает счетчики постов всех пользователей
+        по таблице постов. Пересчет идет одним UPDATE на каждый
+        диапазон из batch_size идентификаторов пользователей."""
+        posts_model = self.model.posts.rel.related_model
+        counts = (
+            posts_model.objects
+            .filter(user=OuterRef('pk'))
+            .order_by()
+            .values('user')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        last_id = self.aggregate(last_id=Max('id'))['last_id'] or 0
+        updated = 0
+        for start in range(0, last_id + 1, batch_size):
+            updated += self.filter(
+                id__gte=start, id__lt=start + batch_size,
+            ).update(posts_count=Coalesce(Subquery(counts), 0))
+        return updated
+
 
 class User(AbstractUser):
     """Класс User создает БД SQL для хранения
@@ -55,6 +92,10 @@ class User(AbstractUser):
 
     email = EmailField(_('email address'), blank=False, unique=True)
     name = CharField('Имя', max_length=150, blank=False)
+    posts_count = PositiveIntegerField(
+        'Количество постов', default=0, db_index=True, editable=False)
+    followers_count = PositiveIntegerField(
+        'Количество подписчиков', default=0, editable=False)
 
     class Meta:
         ordering = ['-id']
@@ -63,3 +104,19 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.email
+
+    def set_password(self, raw_password):
+        """Метод хэширует пароль через пул хэширования (users.hashing)."""
+        self.password = hash_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        """Метод проверяет пароль через пул хэширования. Если хэш
+        посчитан не предпочтительным алгоритмом из PASSWORD_HASHERS
+        или с другими параметрами, он пересчитывается и сохраняется."""
+        valid, must_update = verify_password(raw_password, self.password)
+        if valid and must_update:
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=['password'])
+        return valid
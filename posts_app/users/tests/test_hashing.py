@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from users.hashing import (PasswordHashingBusy, hash_password, hashing_pool,
+                           verify_password)
+
+User = get_user_model()
+
+PASSWORD = 'Hashing-Test-Password'
+FAST_HASHERS = dict(
+    PASSWORD_PBKDF2_ITERATIONS=1000,
+    PASSWORD_SCRYPT_WORK_FACTOR=2 ** 4,
+)
+SCRYPT_FIRST = [
+    'users.hashers.TunedScryptPasswordHasher',
+    'users.hashers.TunedPBKDF2PasswordHasher',
+]
+
+
+@override_settings(**FAST_HASHERS)
+class PasswordRehashTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            name='UserOne', email='user_one@test.test', password=PASSWORD)
+
+    def login(self):
+        return APIClient().post(
+            reverse('api-login'),
+            {'email': 'user_one@test.test', 'password': PASSWORD})
+
+    def test_login_rehashes_with_preferred_algorithm(self):
+        """Хэш старого алгоритма при входе пересчитывается алгоритмом,
+        выбранным в настройках, и вход продолжает работать."""
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$'))
+        with override_settings(PASSWORD_HASHERS=SCRYPT_FIRST):
+            self.assertEqual(self.login().status_code, 200)
+            self.user.refresh_from_db()
+            self.assertTrue(self.user.password.startswith('scrypt$'))
+            self.assertEqual(self.login().status_code, 200)
+
+    def test_login_rehashes_after_cost_change(self):
+        """Хэш пересчитывается при смене числа итераций PBKDF2,
+        а неверный пароль хэш не меняет."""
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=1500):
+            APIClient().post(
+                reverse('api-login'),
+                {'email': 'user_one@test.test', 'password': 'wrong'})
+            self.user.refresh_from_db()
+            self.assertIn('$1000$', self.user.password)
+            self.assertEqual(self.login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertIn('$1500$', self.user.password)
+
+
+@override_settings(
+    PASSWORD_HASHING_POOL='thread', PASSWORD_HASHING_WORKERS=1,
+    PASSWORD_HASHING_WAIT=0.05, **FAST_HASHERS)
+class PasswordHashingPoolTests(TestCase):
+    def test_pool_hashes_and_verifies(self):
+        """Хэширование и проверка пароля выполняются в пуле."""
+        encoded = hash_password(PASSWORD)
+        self.assertEqual(verify_password(PASSWORD, encoded), (True, False))
+        self.assertEqual(verify_password('wrong', encoded), (False, False))
+        self.assertEqual(verify_password(None, encoded), (False, False))
+
+    def test_busy_pool_returns_503(self):
+        """Если все места пула заняты, вход через API и сайт получает 503
+        с Retry-After, а счетчик отказов растет."""
+        User.objects.create_user(
+            name='UserOne', email='user_one@test.test', password=PASSWORD)
+        hashing_pool.start()
+        hashing_pool.slots.acquire()
+        self.addCleanup(hashing_pool.slots.release)
+        rejected = hashing_pool.rejected
+        with self.assertRaises(PasswordHashingBusy):
+            hash_password(PASSWORD)
+        response = APIClient().post(
+            reverse('api-login'),
+            {'email': 'user_one@test.test', 'password': PASSWORD})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertIn('detail', response.json())
+        response = self.client.post(
+            reverse('login'),
+            {'username': 'user_one@test.test', 'password': PASSWORD})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(hashing_pool.rejected, rejected + 3)
@@ -1,7 +1,12 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 from django.utils.translation import gettext_lazy as _
 
+from posts.models import Post
+
 User = get_user_model()
 
 
@@ -31,3 +36,20 @@ class UsersModelsTest(TestCase):
     def test_user_str_method_returns_email(self):
         """Проверяем, что метод str возвращает email."""
         self.assertEqual(str(self.user), self.user.email)
+
+    def test_rebuild_posts_count_repairs_counters(self):
+        """Команда rebuild_posts_count пересчитывает счетчики постов
+        по таблице постов, в том числе у пользователей без постов."""
+        user_two = User.objects.create_user(
+            name='UserTwo',
+            email='user_two@test.test',
+        )
+        Post.objects.bulk_create(
+            Post(title=f'Пост {number}', body='Текст', user=self.user)
+            for number in range(3)
+        )
+        User.objects.filter(id=user_two.id).update(posts_count=7)
+        call_command('rebuild_posts_count', batch_size=1, stdout=StringIO())
+        counts = dict(User.objects.values_list('id', 'posts_count'))
+        self.assertEqual(counts[self.user.id], 3)
+        self.assertEqual(counts[user_two.id], 0)